@@ -0,0 +1,143 @@
+"""
+File: analytics.py
+Author: John Pignato
+
+TLDR:
+Single sweep breadth first analysis of a board's reachable state space
+
+Explaination:
+Starting from the initial board a breadth first search visits every reachable state once using
+the packed state encoding. Along the way it records the size of every BFS layer, how many goal
+states exist and which state is farthest from the start. Layers can be expanded by a pool of
+worker processes. Results are plain dicts so they can be dumped straight to JSON.
+
+Usage:
+    python3 rush_hour_app/analytics.py game_data/test.board --processes 4
+"""
+import sys
+import json
+import argparse
+from multiprocessing import Pool
+from packed_board import PackedBoard
+import rush_hour_solver as solver
+
+#states handed to a worker at once
+CHUNK_SIZE = 4096
+
+#board of the current worker process
+_worker_board = None
+
+
+def _init_worker(board: PackedBoard):
+    global _worker_board
+    _worker_board = board
+
+
+def _expand_chunk(states: list)->list:
+    children = []
+    for state in states:
+        children.extend(_worker_board.neighbors(state))
+    return children
+
+
+def expand_layer(board: PackedBoard, frontier: list, pool=None):
+    """
+    Expands every state in a layer
+
+    Args:
+        board (PackedBoard): board being searched
+        frontier (list): packed states of the layer
+        pool (Pool, optional): worker pool built with _init_worker. Defaults to None (expand in process).
+
+    Yields:
+        list: child states, one list per chunk of the layer
+    """
+    if pool is None or len(frontier) < CHUNK_SIZE:
+        for state in frontier:
+            yield board.neighbors(state)
+        return
+    chunks = [frontier[i:i+CHUNK_SIZE] for i in range(0, len(frontier), CHUNK_SIZE)]
+    yield from pool.imap_unordered(_expand_chunk, chunks)
+
+
+def analyze_board(board: PackedBoard, start: int, processes: int = 1)->dict:
+    """
+    Runs one BFS sweep over every state reachable from start
+
+    Args:
+        board (PackedBoard): board being searched
+        start (int): packed initial state
+        processes (int, optional): worker processes used to expand layers. Defaults to 1.
+
+    Returns:
+        dict: reachable set size, layer histogram, goal state count and farthest state
+    """
+    pool = Pool(processes, _init_worker, (board,)) if processes > 1 else None
+    try:
+        seen = {start}
+        frontier = [start]
+        layer_sizes = []
+        goal_states = 0
+        shortest_solution = None
+        while True:
+            layer_goals = sum(1 for state in frontier if board.is_goal(state))
+            if layer_goals and shortest_solution is None:
+                shortest_solution = len(layer_sizes)
+            goal_states += layer_goals
+            layer_sizes.append(len(frontier))
+            next_frontier = []
+            for children in expand_layer(board, frontier, pool):
+                for child in children:
+                    if child not in seen:
+                        seen.add(child)
+                        next_frontier.append(child)
+            if not next_frontier:
+                break
+            frontier = next_frontier
+    finally:
+        if pool is not None:
+            pool.terminate()
+
+    return {
+        'cars': len(board.car_ids),
+        'reachable_states': len(seen),
+        'layer_sizes': layer_sizes,
+        'goal_states': goal_states,
+        'shortest_solution': shortest_solution,
+        'farthest_state': {
+            'distance': len(layer_sizes) - 1,
+            'board': board.decode(frontier[0]),
+        },
+    }
+
+
+def analyze(csv_contents: list, processes: int = 1)->dict:
+    """
+    Analyzes the reachable state space of a board
+
+    Args:
+        csv_contents (list): lines of a '.board' file
+        processes (int, optional): worker processes used to expand layers. Defaults to 1.
+
+    Returns:
+        dict: analysis report
+    """
+    board, start = PackedBoard.from_csv(csv_contents)
+    return analyze_board(board, start, processes)
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Reachable state space analytics for rush hour boards")
+    parser.add_argument('boards', nargs='+', help="'.board' files to analyze")
+    parser.add_argument('--processes', type=int, default=1, help="worker processes per layer")
+    args = parser.parse_args(argv)
+    reports = {}
+    for board_file in args.boards:
+        file_contents, file_path = solver.csv_reader(board_file)
+        reports[file_path] = analyze(file_contents, args.processes)
+    json.dump(reports, sys.stdout, indent=2)
+    print()
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,271 @@
+"""
+File: checkpoint.py
+Author: John Pignato
+
+TLDR:
+Incremental checkpoints so long searches can be resumed after the process dies
+
+Explaination:
+Both checkpoint kinds are append only files. Records are buffered in memory and written every
+few seconds, so a checkpoint costs one small write. fsync runs on a background thread so the
+search never waits on the disk. A record cut off by a crash is ignored when the file is loaded.
+
+SearchCheckpoint (a_star):
+    Every closed state is logged as (packed state, move that reached it) and every push onto the
+    open list as (closed index of its parent, move, f value). The closed log gives the closed set
+    and, by undoing each state's move, its parent pointer and history. Pushes whose state is not
+    closed rebuild the open list exactly. The last closed state is reopened on resume since its
+    expansion may not have finished.
+
+LayerCheckpoint (level_bfs):
+    Every completed layer is appended as a count followed by its sorted packed states.
+"""
+import os
+import json
+import time
+import struct
+import threading
+from array import array
+from packed_board import PackedBoard
+
+SEARCH_MAGIC = b'RHCK'
+LAYER_MAGIC = b'RHCL'
+#records are written out at least this often
+FLUSH_SECONDS = 5.0
+#or as soon as this many bytes are buffered
+FLUSH_BYTES = 1 << 20
+CLOSED = struct.Struct('<cQBb')
+PUSHED = struct.Struct('<cIBbf')
+#car id and parent index of the initial state, which has no move
+NO_CAR = 255
+NO_PARENT = 0xFFFFFFFF
+
+
+#same "fingerprint" stringify_grid gives a board state
+fingerprint = json.dumps
+
+
+def board_signature(board: PackedBoard)->list:
+    return [board.rows, board.cols, [[car_id] + list(board.cars[car_id]) for car_id in board.car_ids]]
+
+
+class _AppendLog:
+    """
+    Buffered append only file with a JSON header and background fsync
+    """
+
+    def __init__(self, path: str, magic: bytes, header: dict, resume: bool):
+        self.path = path
+        self.magic = magic
+        self.header = header
+        self.buffer = bytearray()
+        self.last_flush = time.monotonic()
+        self.__sync_thread = None
+        self.body = b''
+        if resume and os.path.exists(path):
+            with open(path, 'rb') as fi:
+                contents = fi.read()
+            size = struct.unpack_from('<I', contents, len(magic))[0] if contents[:len(magic)] == magic else None
+            if size is None or json.loads(contents[len(magic) + 4:len(magic) + 4 + size]) != header:
+                raise ValueError("{} is not a checkpoint of this search".format(path))
+            self.body = contents[len(magic) + 4 + size:]
+            self.file = open(path, 'ab')
+        else:
+            encoded = json.dumps(header).encode()
+            self.file = open(path, 'wb')
+            self.file.write(magic + struct.pack('<I', len(encoded)) + encoded)
+
+    def truncate_to(self, valid: int):
+        """
+        Drops a record cut off by a crash from the end of the file
+        """
+        if valid < len(self.body):
+            self.file.truncate(self.file.tell() - (len(self.body) - valid))
+            self.file.seek(0, os.SEEK_END)
+
+    def append(self, record: bytes):
+        self.buffer += record
+        if len(self.buffer) >= FLUSH_BYTES or time.monotonic() - self.last_flush >= FLUSH_SECONDS:
+            self.flush()
+
+    def flush(self):
+        self.file.write(self.buffer)
+        self.file.flush()
+        self.buffer.clear()
+        self.last_flush = time.monotonic()
+        if self.__sync_thread is None or not self.__sync_thread.is_alive():
+            self.__sync_thread = threading.Thread(target=os.fsync, args=(self.file.fileno(),), daemon=True)
+            self.__sync_thread.start()
+
+    def close(self):
+        if self.file.closed:
+            return
+        self.flush()
+        self.__sync_thread.join()
+        self.file.close()
+
+
+class SearchCheckpoint:
+    """
+    Closed set, parent pointers and open list log of an a_star search
+    """
+
+    def __init__(self, path: str, board: PackedBoard, grid: list, resume: bool = False):
+        """
+        Args:
+            path (str): checkpoint file
+            board (PackedBoard): packed encoding of the board being solved
+            grid (list): initial state of board
+            resume (bool, optional): continue from an existing checkpoint file. Defaults to False.
+        """
+        self.board = board
+        self.start = board.encode(grid)
+        self.__log = _AppendLog(path, SEARCH_MAGIC, {'board': board_signature(board), 'start': self.start}, resume)
+        self.__steps = {car_id: 1 << shift for car_id, shift in zip(board.car_ids, board.shifts)}
+        #packed states of closed nodes in closing order
+        self.__closed = []
+
+    def __child(self, state: int, move: tuple)->int:
+        return state + move[1] * self.__steps[move[0]]
+
+    def resume(self)->tuple:
+        """
+        Rebuilds the search from the checkpoint file
+
+        Returns:
+            tuple: visited list and open list (f, state fingerprint, history) entries, None if there is nothing to resume
+        """
+        body = self.__log.body
+        closed_moves = []
+        pushes = []
+        offset = 0
+        while offset < len(body):
+            kind = body[offset:offset + 1]
+            record = CLOSED if kind == b'C' else PUSHED
+            if offset + record.size > len(body):
+                break
+            fields = record.unpack_from(body, offset)
+            if kind == b'C':
+                last_closed = (offset, len(pushes))
+                self.__closed.append(fields[1])
+                closed_moves.append(None if fields[2] == NO_CAR else (fields[2], fields[3]))
+            else:
+                pushes.append(fields[1:])
+            offset += record.size
+        if self.__closed:
+            #the last closed state may have been cut off mid expansion (or be the goal of a finished
+            #search). Reopen it so it is popped and expanded again straight away
+            self.__closed.pop()
+            closed_moves.pop()
+            offset, pushed = last_closed
+            del pushes[pushed:]
+        self.__log.truncate_to(offset)
+        if not pushes:
+            return None
+
+        index_of = {state: index for index, state in enumerate(self.__closed)}
+        histories = {}
+
+        def history(index: int)->list:
+            moves = []
+            while index not in histories and closed_moves[index] is not None:
+                moves.append(closed_moves[index])
+                car_id, delta = closed_moves[index]
+                index = index_of[self.__child(self.__closed[index], (car_id, -delta))]
+            base = histories.get(index, [])
+            return base + moves[::-1]
+
+        entries = []
+        for parent, car_id, delta, f_value in pushes:
+            if parent == NO_PARENT:
+                state, moves = self.start, []
+            else:
+                if parent not in histories:
+                    histories[parent] = history(parent)
+                state = self.__child(self.__closed[parent], (car_id, delta))
+                moves = histories[parent] + [(car_id, delta)]
+            if state not in index_of:
+                entries.append((f_value, fingerprint(self.board.decode(state)), moves))
+        visited = [fingerprint(self.board.decode(state)) for state in self.__closed]
+        return visited, entries
+
+    def closed(self, grid: list, history: list):
+        """
+        Logs a state moved onto the closed set
+
+        Args:
+            grid (list): board state
+            history (list): moves that reached it
+        """
+        state = self.board.encode(grid)
+        car_id, delta = history[-1] if history else (NO_CAR, 0)
+        self.__closed.append(state)
+        self.__log.append(CLOSED.pack(b'C', state, car_id, delta))
+
+    def pushed(self, move: tuple, f_value: float):
+        """
+        Logs a state pushed onto the open list by the last closed state
+
+        Args:
+            move (tuple): (car id, delta) move from the last closed state, None for the initial state
+            f_value (float): priority of the entry
+        """
+        if move is None:
+            self.__log.append(PUSHED.pack(b'P', NO_PARENT, NO_CAR, 0, f_value))
+        else:
+            self.__log.append(PUSHED.pack(b'P', len(self.__closed) - 1, move[0], move[1], f_value))
+
+    def close(self):
+        self.__log.close()
+
+
+class LayerCheckpoint:
+    """
+    Completed layer log of a level synchronous BFS
+    """
+
+    def __init__(self, path: str, board: PackedBoard, sources: list, resume: bool = False):
+        """
+        Args:
+            path (str): checkpoint file
+            board (PackedBoard): board being searched
+            sources (list): packed initial states
+            resume (bool, optional): continue from an existing checkpoint file. Defaults to False.
+        """
+        header = {'board': board_signature(board), 'sources': sorted(set(sources))}
+        self.__log = _AppendLog(path, LAYER_MAGIC, header, resume)
+
+    def resume(self)->list:
+        """
+        Reads back every completed layer
+
+        Returns:
+            list: sorted layers as uint64 arrays
+        """
+        body = self.__log.body
+        layers = []
+        offset = 0
+        while offset + 8 <= len(body):
+            count = struct.unpack_from('<Q', body, offset)[0]
+            end = offset + 8 + count * 8
+            if end > len(body):
+                break
+            layer = array('Q')
+            layer.frombytes(body[offset + 8:end])
+            layers.append(layer)
+            offset = end
+        self.__log.truncate_to(offset)
+        return layers
+
+    def completed(self, layer: array):
+        """
+        Logs a completed layer and writes it out straight away
+
+        Args:
+            layer (array): sorted packed states
+        """
+        self.__log.append(struct.pack('<Q', len(layer)) + layer.tobytes())
+        self.__log.flush()
+
+    def close(self):
+        self.__log.close()
@@ -0,0 +1,211 @@
+"""
+File: clusters.py
+Author: John Pignato
+
+TLDR:
+Enumerates every placement of a set of cars and splits them into clusters of mutually reachable states
+
+Explaination:
+A set of cars is the goal car plus pieces such as H2 (horizontal car), H3 (horizontal truck), V2 and
+V3. A car never leaves its lane, so the placements are enumerated one lane assignment at a time: each
+piece is given a row (horizontal) or column (vertical) and PackedBoard.placements lists every legal
+state of that assignment. Horizontal pieces can share the goal row with the goal car, as long as the
+row still has room for all of them. A piece right of the goal car can never get out of its way, so
+those placements end up in clusters without goal states.
+
+Identical pieces sharing a lane can never pass each other, so swapping them only relabels a state.
+Only states where they are in car id order are enumerated, which keeps every cluster counted once.
+
+Clusters are found by union-by-BFS: the first placement not seen yet starts a BFS that visits its
+whole cluster. Each cluster is reported with its size, its number of goal states and the largest
+distance to a goal, found by a BFS backwards from all of its goal states (None if it has none).
+
+Lane assignments are searched in a process pool. The output file holds one JSON line per finished
+assignment, so a run that is stopped can be started again with the same arguments and only searches
+the assignments missing from the file.
+
+Usage:
+    python3 rush_hour_app/clusters.py H2 H2 V2 V3 --out clusters.jsonl
+"""
+import os
+import sys
+import json
+import argparse
+import itertools
+from multiprocessing import Pool
+from collections import namedtuple
+from packed_board import PackedBoard
+from level_bfs import level_bfs
+from corpus import canonical
+import rush_hour_solver as solver
+
+PIECES = {'H2': ('H', 2), 'H3': ('H', 3), 'V2': ('V', 2), 'V3': ('V', 3)}
+GOAL_CAR_ID = 0
+
+ClusterStats = namedtuple('ClusterStats', ['size', 'goals', 'max_distance', 'hardest'])
+
+
+def goal_row(rows: int)->int:
+    return solver.GOAL_POS[0] if rows == 6 else rows // 2 - 1
+
+
+def lane_assignments(pieces: list, rows: int, cols: int):
+    """
+    Enumerates the ways of putting every piece in a lane
+
+    Args:
+        pieces (list): piece names, like ['H2', 'V3']
+        rows (int): board rows
+        cols (int): board columns
+
+    Yields:
+        list: (direction, length, lane) per piece, grouped by piece kind
+    """
+    kinds = sorted(set(pieces))
+    choices = []
+    for kind in kinds:
+        direction, length = PIECES[kind]
+        lanes = range(rows) if direction == 'H' else range(cols)
+        choices.append([[(direction, length, lane) for lane in combination]
+                        for combination in itertools.combinations_with_replacement(lanes, pieces.count(kind))])
+    for assignment in itertools.product(*choices):
+        cars = [car for kind in assignment for car in kind]
+        #lanes that can not hold their cars have no placements, the goal row also holds the goal car
+        used = {}
+        for direction, length, lane in cars:
+            used[direction, lane] = used.get((direction, lane), 0) + length
+        used['H', goal_row(rows)] = used.get(('H', goal_row(rows)), 0) + 2
+        if all(total <= (cols if direction == 'H' else rows) for (direction, _), total in used.items()):
+            yield cars
+
+
+def assignment_board(assignment: list, rows: int, cols: int)->PackedBoard:
+    """
+    Builds the board of a lane assignment, car 0 is the goal car and car i + 1 the i-th piece
+    """
+    cars = {GOAL_CAR_ID: solver.car(0, goal_row(rows), 'H', 2, True)}
+    for car_id, (direction, length, lane) in enumerate(assignment, 1):
+        x_pos, y_pos = (0, lane) if direction == 'H' else (lane, 0)
+        cars[car_id] = solver.car(x_pos, y_pos, direction, length, False)
+    return PackedBoard(cars, rows, cols, GOAL_CAR_ID)
+
+
+def enumerate_clusters(board: PackedBoard, assignment: list)->list:
+    """
+    Splits the placements of one lane assignment into clusters
+
+    Args:
+        board (PackedBoard): board of the assignment
+        assignment (list): (direction, length, lane) per piece
+
+    Returns:
+        list: ClusterStats of every cluster
+    """
+    #indexes of identical pieces sharing a lane, which have to stay in order
+    pairs = [(first + 1, second + 1) for first, second in itertools.combinations(range(len(assignment)), 2)
+             if assignment[first] == assignment[second]]
+    visited = set()
+    clusters = []
+    for state in board.placements():
+        if state in visited:
+            continue
+        if pairs:
+            offsets = board.offsets(state)
+            if any(offsets[first] > offsets[second] for first, second in pairs):
+                continue
+        layers = level_bfs(board, state, stop_at_goal=False, use_numpy=False).layers
+        members = [member for layer in layers for member in layer]
+        visited.update(members)
+        goals = [member for member in members if board.is_goal(member)]
+        if not goals:
+            clusters.append(ClusterStats(len(members), 0, None, None))
+            continue
+        distances = level_bfs(board, goals, stop_at_goal=False, use_numpy=False).layers
+        hardest = canonical(board.decode(distances[-1][0]), GOAL_CAR_ID)[0]
+        clusters.append(ClusterStats(len(members), len(goals), len(distances) - 1, hardest))
+    return clusters
+
+
+def cluster_job(job: tuple)->dict:
+    """
+    Enumerates the clusters of one (index, lane assignment, rows, cols) job
+    """
+    index, assignment, rows, cols = job
+    clusters = enumerate_clusters(assignment_board(assignment, rows, cols), assignment)
+    return {'assignment': index, 'lanes': assignment, 'clusters': [cluster._asdict() for cluster in clusters]}
+
+
+def finished_assignments(out: str)->set:
+    """
+    Reads the assignments an earlier run finished, cutting off a line it was stopped in the middle of
+
+    Args:
+        out (str): output file
+
+    Returns:
+        set: finished assignment indexes
+    """
+    finished = set()
+    if not os.path.exists(out):
+        return finished
+    valid = 0
+    with open(out, 'rb+') as fi:
+        for line in fi:
+            try:
+                finished.add(json.loads(line)['assignment'])
+            except (ValueError, KeyError):
+                break
+            if not line.endswith(b'\n'):
+                break
+            valid += len(line)
+        fi.truncate(valid)
+    return finished
+
+
+def enumerate_all(pieces: list, rows: int = 6, cols: int = 6, processes: int = 1, out: str = None):
+    """
+    Enumerates the clusters of every lane assignment
+
+    Args:
+        pieces (list): piece names, like ['H2', 'V3']
+        rows (int, optional): board rows. Defaults to 6.
+        cols (int, optional): board columns. Defaults to 6.
+        processes (int, optional): worker processes. Defaults to 1.
+        out (str, optional): output file, assignments already in it are skipped. Defaults to None.
+
+    Yields:
+        dict: assignment index, lanes and clusters of every assignment searched
+    """
+    for piece in pieces:
+        if piece not in PIECES:
+            raise ValueError("unknown piece {}, expected one of {}".format(piece, ', '.join(PIECES)))
+    finished = finished_assignments(out) if out else set()
+    jobs = ((index, assignment, rows, cols) for index, assignment in enumerate(lane_assignments(pieces, rows, cols))
+            if index not in finished)
+    if processes <= 1:
+        yield from map(cluster_job, jobs)
+        return
+    with Pool(processes) as pool:
+        yield from pool.imap_unordered(cluster_job, jobs)
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Enumerates the clusters of a set of rush hour cars")
+    parser.add_argument('pieces', nargs='+', help="pieces besides the goal car: {}".format(', '.join(PIECES)))
+    parser.add_argument('--rows', type=int, default=6)
+    parser.add_argument('--cols', type=int, default=6)
+    parser.add_argument('--processes', type=int, default=os.cpu_count())
+    parser.add_argument('--out', help="JSON lines file, a run is resumed from it. Defaults to stdout.")
+    args = parser.parse_args(argv)
+    out = open(args.out, 'a') if args.out else sys.stdout
+    try:
+        for result in enumerate_all(args.pieces, args.rows, args.cols, args.processes, args.out):
+            out.write(json.dumps(result) + '\n')
+            out.flush()
+    finally:
+        if out is not sys.stdout:
+            out.close()
+
+
+if __name__ == '__main__':
+    main()
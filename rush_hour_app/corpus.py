@@ -0,0 +1,241 @@
+"""
+File: corpus.py
+Author: John Pignato
+
+TLDR:
+One file, one puzzle per line corpus format with a streaming parser and '.board' converters
+
+Explaination:
+Each line holds a 6x6 board as the common 36 character string, read row by row from the top left:
+'o' (or '.') is an empty cell, 'A' is the goal car and every other letter is one car or truck.
+Other whitespace separated tokens on the line (for example the move count and cluster size of the
+well known puzzle databases) are kept as metadata. Blank lines and lines starting with '#' are skipped.
+
+    60 IBBxooIooLDDJAALooJoKEEMFFKooMGGHHHM 2332     <- 'x' walls are not supported by the solver
+    ooBoCCooBoooAABoooDDDooEoooooEoooooE
+
+read_corpus streams entries without loading the file, board_to_csv turns a board string into the
+lines of a '.board' file and csv_to_board goes back. iter_boards lets batch tools take '.board'
+files and corpus files alike. A line or file that can not be read (walls, bad cars, a missing file)
+never stops the stream: iter_board_entries hands it over with the error and iter_boards skips it
+with a warning naming the file and line.
+
+Usage:
+    python3 rush_hour_app/corpus.py from-boards game_data/*.board --out puzzles.txt
+    python3 rush_hour_app/corpus.py to-boards puzzles.txt --out-dir boards/
+"""
+import os
+import sys
+import argparse
+from collections import namedtuple
+import rush_hour_solver as solver
+
+SIZE = 6
+EMPTY = 'o.'
+WALL = 'x'
+GOAL = 'A'
+#labels handed to the other cars when writing a board string, in order of first appearance
+LABELS = 'BCDEFGHIJKLMNPQRSTUVWYZ'
+
+#line number in the corpus file, board string, other tokens on the line
+CorpusEntry = namedtuple('CorpusEntry', ['line', 'board', 'fields'])
+
+
+def read_corpus(corpus, size: int = SIZE, strict: bool = True):
+    """
+    Streams the puzzles of a corpus
+
+    Args:
+        corpus (str|file): corpus file path or an open text file
+        size (int, optional): board side. Defaults to 6.
+        strict (bool, optional): raise ValueError on a line without exactly one board, otherwise the
+            line is yielded with board None. Defaults to True.
+
+    Yields:
+        CorpusEntry: one puzzle
+    """
+    fi = open(corpus) if isinstance(corpus, str) else corpus
+    try:
+        for number, line in enumerate(fi, 1):
+            tokens = line.split()
+            if not tokens or tokens[0].startswith('#'):
+                continue
+            boards = [index for index, token in enumerate(tokens) if len(token) == size * size and not token.isdigit()]
+            if len(boards) != 1:
+                if strict:
+                    raise ValueError("line {} does not hold exactly one {} cell board".format(number, size * size))
+                yield CorpusEntry(number, None, tokens)
+                continue
+            yield CorpusEntry(number, tokens[boards[0]], [token for index, token in enumerate(tokens) if index != boards[0]])
+    finally:
+        if fi is not corpus:
+            fi.close()
+
+
+def board_to_csv(board: str, size: int = SIZE)->list:
+    """
+    Converts a board string into '.board' file lines
+
+    Args:
+        board (str): board string
+        size (int, optional): board side. Defaults to 6.
+
+    Returns:
+        list: lines of a '.board' file, car ids number the cars in order of appearance
+    """
+    if len(board) != size * size:
+        raise ValueError("board string must be {} characters long".format(size * size))
+    cells = {}
+    for index, label in enumerate(board):
+        if label in EMPTY:
+            continue
+        if label == WALL:
+            raise ValueError("walls are not supported")
+        cells.setdefault(label, []).append(divmod(index, size))
+    if GOAL not in cells:
+        raise ValueError("board has no goal car '{}'".format(GOAL))
+    lines = ["{0},{0}".format(size)]
+    for car_id, (label, covered) in enumerate(cells.items()):
+        rows = {row for row, _ in covered}
+        cols = {col for _, col in covered}
+        if len(rows) == 1:
+            direction = 'H'
+            contiguous = max(cols) - min(cols) + 1 == len(covered)
+        elif len(cols) == 1:
+            direction = 'V'
+            contiguous = max(rows) - min(rows) + 1 == len(covered)
+        else:
+            contiguous = False
+        if not contiguous or len(covered) < 2:
+            raise ValueError("car '{}' is not a straight line of at least two cells".format(label))
+        row, col = covered[0]
+        lines.append("{},{},{},{},{},{}".format(car_id, col, row, direction, len(covered), 'T' if label == GOAL else 'F'))
+    return lines
+
+
+def canonical(grid: list, goal_car_id: int)->tuple:
+    """
+    Canonical board string of a board state: the goal car is 'A' and the other cars are labelled
+    in order of first appearance, so the labels do not depend on how the cars were numbered
+
+    Args:
+        grid (list): a board state matrix
+        goal_car_id (int): id of the goal car
+
+    Returns:
+        tuple: board string, car ids in order of first appearance (board_to_csv id -> car id)
+    """
+    order = []
+    labels = {goal_car_id: GOAL}
+    names = iter(LABELS)
+    cells = []
+    for row in grid:
+        for cell in row:
+            if cell == -1:
+                cells.append(EMPTY[0])
+                continue
+            if cell not in labels:
+                try:
+                    labels[cell] = next(names)
+                except StopIteration:
+                    raise ValueError("board has more cars than labels")
+            if cell not in order:
+                order.append(cell)
+            cells.append(labels[cell])
+    return ''.join(cells), order
+
+
+def csv_to_board(csv_contents: list)->str:
+    """
+    Converts '.board' file lines into a board string
+
+    Args:
+        csv_contents (list): lines of a '.board' file
+
+    Returns:
+        str: canonical board string
+    """
+    grid = solver.init_represent(csv_contents)
+    if len(grid) != len(grid[0]):
+        raise ValueError("only square boards have a board string")
+    return canonical(grid, solver.GOAL_CAR_ID)[0]
+
+
+def iter_board_entries(paths: list):
+    """
+    Streams boards from '.board' files and corpus files alike, handing over the ones that can not be read
+
+    Args:
+        paths (list): '.board' file paths (one board each) or corpus file paths
+
+    Yields:
+        tuple: name ("file" or "file:line"), lines of a '.board' file (None if unreadable), error message (None if readable)
+    """
+    for path in paths:
+        if path.endswith('.board'):
+            try:
+                file_contents, _ = solver.csv_reader(path)
+            except OSError as error:
+                yield path, None, str(error)
+                continue
+            yield path, file_contents, None
+            continue
+        try:
+            entries = read_corpus(path, strict=False)
+            for entry in entries:
+                name = "{}:{}".format(path, entry.line)
+                if entry.board is None:
+                    yield name, None, "line does not hold exactly one board"
+                    continue
+                try:
+                    yield name, board_to_csv(entry.board), None
+                except ValueError as error:
+                    yield name, None, str(error)
+        except OSError as error:
+            yield path, None, str(error)
+
+
+def iter_boards(paths: list):
+    """
+    Streams boards from '.board' files and corpus files alike, skipping the ones that can not be read
+    with a warning on stderr
+
+    Args:
+        paths (list): '.board' file paths (one board each) or corpus file paths
+
+    Yields:
+        tuple: name ("file" or "file:line"), lines of a '.board' file
+    """
+    for name, file_contents, error in iter_board_entries(paths):
+        if error is not None:
+            print("skipping {}: {}".format(name, error), file=sys.stderr)
+            continue
+        yield name, file_contents
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Converts between '.board' files and corpus files")
+    commands = parser.add_subparsers(dest='command', required=True)
+    from_boards = commands.add_parser('from-boards', help="write '.board' files into one corpus file")
+    from_boards.add_argument('boards', nargs='+')
+    from_boards.add_argument('--out', required=True)
+    to_boards = commands.add_parser('to-boards', help="write every corpus line to its own '.board' file")
+    to_boards.add_argument('corpus')
+    to_boards.add_argument('--out-dir', required=True)
+    args = parser.parse_args(argv)
+
+    if args.command == 'from-boards':
+        with open(args.out, 'w') as fo:
+            for board_file in args.boards:
+                file_contents, _ = solver.csv_reader(board_file)
+                fo.write(csv_to_board(file_contents) + '\n')
+    else:
+        os.makedirs(args.out_dir, exist_ok=True)
+        name = os.path.splitext(os.path.basename(args.corpus))[0]
+        for entry in read_corpus(args.corpus):
+            with open(os.path.join(args.out_dir, "{}_{:06d}.board".format(name, entry.line)), 'w') as fo:
+                fo.write('\n'.join(board_to_csv(entry.board)))
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,129 @@
+"""
+File: counting.py
+Author: John Pignato
+
+TLDR:
+Counts (and optionally lists) every optimal solution of a board
+
+Explaination:
+A breadth first search from the board stops at the first layer holding a goal state, so every
+shortest solution ends at a goal state of that layer. The number of shortest paths to a state in
+layer d+1 is the sum over its neighbours in layer d, which is filled in one layer at a time
+(dynamic programming over the BFS layers). The total is the sum over the goal states of the last
+layer. Only one count per explored state is stored, so nothing grows with the number of paths.
+
+paths() streams the solutions one at a time by walking back from each goal state through the
+layers, only ever holding the path being built.
+
+Usage:
+    python3 rush_hour_app/counting.py game_data/board1.board --paths 5
+"""
+import sys
+import json
+import argparse
+from bisect import bisect_left
+from packed_board import PackedBoard
+from level_bfs import level_bfs, contains
+import rush_hour_solver as solver
+
+
+class OptimalSolutions:
+    """
+    Shortest path counts of a board
+    """
+
+    def __init__(self, board: PackedBoard, start: int, processes: int = 1):
+        """
+        Args:
+            board (PackedBoard): board being solved
+            start (int): packed initial state
+            processes (int, optional): worker processes for the BFS. Defaults to 1.
+        """
+        self.board = board
+        result = level_bfs(board, start, processes)
+        self.layers = result.layers
+        self.goals = [state for state in self.layers[-1] if board.is_goal(state)] if result.path is not None else []
+        #number of shortest paths from start to every state, aligned with the sorted layers
+        self.counts = [[1] * len(self.layers[0])]
+        for depth in range(len(self.layers) - 1):
+            current, following = self.layers[depth], self.layers[depth + 1]
+            counts = [0] * len(following)
+            for state, count in zip(current, self.counts[depth]):
+                for child in board.neighbors(state):
+                    index = bisect_left(following, child)
+                    if index < len(following) and following[index] == child:
+                        counts[index] += count
+            self.counts.append(counts)
+
+    @property
+    def length(self)->int:
+        """
+        Moves in an optimal solution, None if the board has none
+        """
+        return len(self.layers) - 1 if self.goals else None
+
+    @property
+    def count(self)->int:
+        """
+        Number of distinct optimal solutions
+        """
+        last = self.layers[-1]
+        return sum(self.counts[-1][bisect_left(last, goal)] for goal in self.goals)
+
+    def paths(self):
+        """
+        Streams every optimal solution
+
+        Yields:
+            list: tuple moves from the initial state to a goal state
+        """
+        moves = []
+
+        def walk(state: int, depth: int):
+            if depth == 0:
+                yield moves[::-1]
+                return
+            for parent, (car_id, delta) in self.board.expand(state):
+                if contains(self.layers[depth - 1], parent):
+                    moves.append((car_id, -delta))
+                    yield from walk(parent, depth - 1)
+                    moves.pop()
+
+        for goal in self.goals:
+            yield from walk(goal, len(self.layers) - 1)
+
+
+def count_solutions(csv_contents: list, processes: int = 1)->OptimalSolutions:
+    """
+    Counts the optimal solutions of a board
+
+    Args:
+        csv_contents (list): lines of a '.board' file
+        processes (int, optional): worker processes for the BFS. Defaults to 1.
+
+    Returns:
+        OptimalSolutions: counts, length and a path generator
+    """
+    board, start = PackedBoard.from_csv(csv_contents)
+    return OptimalSolutions(board, start, processes)
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Counts the optimal solutions of a rush hour board")
+    parser.add_argument('board', help="'.board' file to solve")
+    parser.add_argument('--paths', type=int, default=0, help="also list up to this many solutions")
+    parser.add_argument('--processes', type=int, default=1)
+    args = parser.parse_args(argv)
+    file_contents, _ = solver.csv_reader(args.board)
+    solutions = count_solutions(file_contents, args.processes)
+    json.dump({'length': solutions.length, 'count': solutions.count, 'goal_states': len(solutions.goals)}, sys.stdout)
+    print()
+    for number, path in enumerate(solutions.paths()):
+        if number >= args.paths:
+            break
+        json.dump(path, sys.stdout)
+        print()
+
+
+if __name__ == '__main__':
+    main()
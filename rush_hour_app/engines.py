@@ -0,0 +1,349 @@
+"""
+File: engines.py
+Author: John Pignato
+
+TLDR:
+Every search engine behind one call signature
+
+Explaination:
+An engine is a function engine(board, start, **options) taking a PackedBoard and the packed
+initial state and returning a list of (car id, delta) moves, or None if the board has no
+solution. Every engine also takes stats=SolverStats() and fills in its search counters (see
+solver_stats.py); solve_with_stats returns them next to the path. ENGINES maps engine names to the function and whether its answers are optimal.
+Passing a SlideBoard runs any of them under the slide metric.
+    astar         the grid based a_star from rush_hour_solver
+    packed_astar  A* on packed states with the admissible blocking heuristic (weight > 1 trades optimality for speed)
+    greedy        best first search on the heuristic alone
+    bfs           level synchronous breadth first search
+    bidirectional breadth first search from the board and from every goal state at once
+    ida           iterative deepening A*, memory bounded by an optional transposition table
+
+Engines are configured with a spec string, "name" or "name:key=value,key=value" (for example
+"packed_astar:weight=2"), which parse_engine splits into the name and its options.
+"""
+import json
+from collections import namedtuple
+from helpers.heap import Heap
+from packed_board import PackedBoard, SlideBoard
+from level_bfs import level_bfs
+from solver_stats import SolverStats
+import rush_hour_solver as solver
+
+Engine = namedtuple('Engine', ['solve', 'optimal'])
+
+
+def rebuild(parents: dict, state: int)->list:
+    """
+    Follows parent pointers back to the root
+
+    Args:
+        parents (dict): packed state -> (parent state, move), None for the root
+        state (int): packed state to walk back from
+
+    Returns:
+        list: tuple moves from the root to state
+    """
+    path = []
+    while parents[state] is not None:
+        state, move = parents[state]
+        path.append(move)
+    path.reverse()
+    return path
+
+
+def classic_a_star(board: PackedBoard, start: int, stats: SolverStats = None)->list:
+    """
+    Runs the grid based a_star on a packed board
+    """
+    solver.cars.clear()
+    solver.cars.update(board.cars)
+    solver.GOAL_CAR_ID = board.goal_car_id
+    return solver.a_star(board.decode(start), slide=board.slide, stats=stats)
+
+
+def packed_a_star(board: PackedBoard, start: int, weight: float = 1.0, stats: SolverStats = None)->list:
+    """
+    A* on packed states with f = g + weight * h. Optimal when weight is 1.
+    """
+    stats = stats if stats is not None else SolverStats()
+    expanded = generated = duplicates = peak_open = 0
+    g_values = {start: 0}
+    parents = {start: None}
+    priority_queue = Heap(is_max=False)
+    priority_queue.add((weight * board.heuristic(start), 0, start))
+    try:
+        while len(priority_queue) > 0:
+            peak_open = max(peak_open, len(priority_queue))
+            f_value, neg_g, state = priority_queue.pop()
+            if -neg_g > g_values[state]:
+                continue #stale entry
+            if board.is_goal(state):
+                with stats.timed('rebuild'):
+                    return rebuild(parents, state)
+            g_value = -neg_g + 1
+            children = board.expand(state)
+            expanded += 1
+            generated += len(children)
+            for child, move in children:
+                if g_value < g_values.get(child, g_value + 1):
+                    g_values[child] = g_value
+                    parents[child] = (state, move)
+                    priority_queue.add((g_value + weight * board.heuristic(child), -g_value, child))
+                else:
+                    duplicates += 1
+        return None
+    finally:
+        #one heuristic call per state pushed
+        stats.add(expanded, generated, duplicates, peak_open, len(parents), generated - duplicates + 1)
+
+
+def greedy(board: PackedBoard, start: int, stats: SolverStats = None)->list:
+    """
+    Best first search ordered by the heuristic alone. Fast but not optimal.
+    """
+    stats = stats if stats is not None else SolverStats()
+    expanded = generated = duplicates = peak_open = 0
+    parents = {start: None}
+    priority_queue = Heap(is_max=False)
+    priority_queue.add((board.heuristic(start), start))
+    try:
+        while len(priority_queue) > 0:
+            peak_open = max(peak_open, len(priority_queue))
+            h_value, state = priority_queue.pop()
+            if board.is_goal(state):
+                with stats.timed('rebuild'):
+                    return rebuild(parents, state)
+            children = board.expand(state)
+            expanded += 1
+            generated += len(children)
+            for child, move in children:
+                if child not in parents:
+                    parents[child] = (state, move)
+                    priority_queue.add((board.heuristic(child), child))
+                else:
+                    duplicates += 1
+        return None
+    finally:
+        stats.add(expanded, generated, duplicates, peak_open, len(parents), len(parents))
+
+
+def bfs(board: PackedBoard, start: int, processes: int = 1, stats: SolverStats = None)->list:
+    """
+    Level synchronous breadth first search
+    """
+    return level_bfs(board, start, processes, stats=stats).path
+
+
+def bidirectional(board: PackedBoard, start: int, stats: SolverStats = None)->list:
+    """
+    Breadth first search from the board and from every goal state, expanding the smaller frontier
+    one full layer at a time. Every move can be undone so the backward search uses the same moves.
+    """
+    stats = stats if stats is not None else SolverStats()
+    forward = {start: None}
+    backward = {goal: None for goal in board.goal_states()}
+    if not backward:
+        return None
+    if start in backward:
+        return []
+    depths = [{start: 0}, dict.fromkeys(backward, 0)]
+    frontiers = [[start], list(backward)]
+    layer_depths = [0, 0]
+    parents = [forward, backward]
+    best = None
+    expanded = generated = duplicates = peak_open = 0
+    while frontiers[0] and frontiers[1]:
+        peak_open = max(peak_open, len(frontiers[0]) + len(frontiers[1]))
+        side = 0 if len(frontiers[0]) <= len(frontiers[1]) else 1
+        other = 1 - side
+        next_frontier = []
+        expanded += len(frontiers[side])
+        for state in frontiers[side]:
+            children = board.expand(state)
+            generated += len(children)
+            for child, move in children:
+                if child in parents[side]:
+                    duplicates += 1
+                    continue
+                parents[side][child] = (state, move)
+                depths[side][child] = depths[side][state] + 1
+                next_frontier.append(child)
+                if child in depths[other]:
+                    cost = depths[0][child] + depths[1][child]
+                    if best is None or cost < best[0]:
+                        best = (cost, child)
+        frontiers[side] = next_frontier
+        layer_depths[side] += 1
+        #any shorter path would have met inside the two searched balls already
+        if best is not None and best[0] <= layer_depths[0] + layer_depths[1] + 1:
+            break
+    stats.add(expanded, generated, duplicates, peak_open, len(forward) + len(backward))
+    if best is None:
+        return None
+    with stats.timed('rebuild'):
+        meet = best[1]
+        path = rebuild(forward, meet)
+        state = meet
+        while backward[state] is not None:
+            state, (car_id, delta) = backward[state]
+            path.append((car_id, -delta))
+    return path
+
+
+def ida_star(board: PackedBoard, start: int, table_size: int = 1000000, stats: SolverStats = None)->list:
+    """
+    Iterative deepening A*. Memory is the current path plus a transposition table of at most
+    table_size states, which prunes states reached again with no fewer moves in the same iteration.
+    """
+    stats = stats if stats is not None else SolverStats()
+    path_states = {start}
+    moves = []
+    found = object()
+    #expanded, generated, duplicates, heuristic evaluations, peak path length, peak table size
+    counts = [0, 0, 0, 0, 0, 0]
+
+    def search(state: int, g_value: int, bound: int, table: dict):
+        counts[3] += 1
+        f_value = g_value + board.heuristic(state)
+        if f_value > bound:
+            return f_value
+        if board.is_goal(state):
+            return found
+        smallest = None
+        children = board.expand(state)
+        counts[0] += 1
+        counts[1] += len(children)
+        counts[4] = max(counts[4], len(path_states))
+        counts[5] = max(counts[5], len(table))
+        for child, move in children:
+            if child in path_states or table.get(child, g_value + 2) <= g_value + 1:
+                counts[2] += 1
+                continue
+            if len(table) < table_size:
+                table[child] = g_value + 1
+            path_states.add(child)
+            moves.append(move)
+            result = search(child, g_value + 1, bound, table)
+            if result is found:
+                return found
+            moves.pop()
+            path_states.discard(child)
+            if result is not None and (smallest is None or result < smallest):
+                smallest = result
+        return smallest
+
+    bound = board.heuristic(start)
+    try:
+        while True:
+            result = search(start, 0, bound, {start: 0})
+            if result is found:
+                return list(moves)
+            if result is None:
+                return None
+            bound = result
+    finally:
+        stats.add(counts[0], counts[1], counts[2], counts[4], counts[5], counts[3] + 1)
+
+
+ENGINES = {
+    'astar': Engine(classic_a_star, False),
+    'packed_astar': Engine(packed_a_star, True),
+    'greedy': Engine(greedy, False),
+    'bfs': Engine(bfs, True),
+    'bidirectional': Engine(bidirectional, True),
+    'ida': Engine(ida_star, True),
+}
+
+
+def parse_engine(spec: str)->tuple:
+    """
+    Splits an engine spec into its name and options
+
+    Args:
+        spec (str): "name" or "name:key=value,key=value"
+
+    Returns:
+        tuple: engine name, options dict (values parsed as JSON when possible)
+    """
+    name, _, option_text = spec.partition(':')
+    if name not in ENGINES:
+        raise ValueError("Unknown engine '{}', pick one of {}".format(name, ', '.join(ENGINES)))
+    options = {}
+    for pair in filter(None, option_text.split(',')):
+        key, _, value = pair.partition('=')
+        try:
+            options[key] = json.loads(value)
+        except ValueError:
+            options[key] = value
+    return name, options
+
+
+def is_optimal(name: str, options: dict = None)->bool:
+    """
+    Checks if an engine configuration always returns optimal solutions
+
+    Args:
+        name (str): engine name
+        options (dict, optional): engine options. Defaults to None.
+
+    Returns:
+        bool: answers are optimal
+    """
+    return ENGINES[name].optimal and (options or {}).get('weight', 1) == 1
+
+
+def run_engine(name: str, board: PackedBoard, start: int, stats: SolverStats, **options)->list:
+    """
+    Runs an engine, timing its search phase apart from the rebuild phase it times itself
+
+    Args:
+        name (str): engine name
+        board (PackedBoard): board being solved
+        start (int): packed initial state
+        stats (SolverStats): stats filled in by the run
+
+    Returns:
+        list: tuple moves to traverse to goal state, None if there is none
+    """
+    rebuild_seconds = stats.phases['rebuild']
+    with stats.timed('search'):
+        path = ENGINES[name].solve(board, start, stats=stats, **options)
+    stats.phases['search'] -= stats.phases['rebuild'] - rebuild_seconds
+    return path
+
+
+def solve_with_stats(csv_contents: list, engine: str = 'packed_astar', slide: bool = False, **options)->tuple:
+    """
+    Solves a board with a named engine, counting and timing every phase
+
+    Args:
+        csv_contents (list): lines of a '.board' file
+        engine (str, optional): engine name. Defaults to 'packed_astar'.
+        slide (bool, optional): count a slide of any length as one move. Defaults to False.
+
+    Returns:
+        tuple: tuple moves (None if there is no solution), SolverStats
+    """
+    stats = SolverStats()
+    with stats.timed('parse'):
+        grid = solver.init_represent(csv_contents)
+    with stats.timed('precompute'):
+        board = (SlideBoard if slide else PackedBoard)(solver.cars, len(grid), len(grid[0]), solver.GOAL_CAR_ID)
+        start = board.encode(grid)
+    return run_engine(engine, board, start, stats, **options), stats
+
+
+def solve(csv_contents: list, engine: str = 'packed_astar', slide: bool = False, **options)->list:
+    """
+    Solves a board with a named engine
+
+    Args:
+        csv_contents (list): lines of a '.board' file
+        engine (str, optional): engine name. Defaults to 'packed_astar'.
+        slide (bool, optional): count a slide of any length as one move. Defaults to False.
+
+    Returns:
+        list: tuple moves to traverse to goal state, None if there is none
+    """
+    board, start = (SlideBoard if slide else PackedBoard).from_csv(csv_contents)
+    return ENGINES[engine].solve(board, start, **options)
@@ -0,0 +1,314 @@
+"""
+File: external_bfs.py
+Author: John Pignato
+
+TLDR:
+Disk backed breadth first search for boards whose state space does not fit in memory
+
+Explaination:
+Every BFS layer lives in its own file of sorted, unique, little endian uint64 packed states.
+To build layer d+1, layer d is streamed from disk and expanded. The children are buffered in
+memory until the memory limit is hit, then sorted and spilled to a run file. Once layer d is
+done, the run files are k-way merged and duplicates are removed as the merge goes (delayed
+duplicate detection). Any state that is also in layer d or layer d-1 is dropped as well, since
+every move can be undone and a child can only be one layer away from its parent.
+
+After a layer is complete a small progress file is rewritten atomically. If the process dies,
+running it again with the same work directory picks up after the last completed layer.
+
+Usage:
+    python3 rush_hour_app/external_bfs.py game_data/test.board --work-dir /tmp/bfs --memory-limit 64
+"""
+import os
+import sys
+import json
+import mmap
+import heapq
+import argparse
+from array import array
+from collections import namedtuple
+from packed_board import PackedBoard
+import rush_hour_solver as solver
+
+#states read from a layer or run file at once
+READ_CHUNK = 1 << 16
+#rough in-memory cost of one buffered child state (set entry + int object)
+BUFFERED_STATE_BYTES = 100
+PROGRESS_FILE = 'progress.json'
+
+ExternalResult = namedtuple('ExternalResult', ['path', 'goal', 'layer_sizes'])
+
+
+def layer_path(work_dir: str, depth: int)->str:
+    return os.path.join(work_dir, 'layer_{:05d}.bin'.format(depth))
+
+
+def read_states(path: str):
+    """
+    Streams the packed states of a layer or run file
+
+    Args:
+        path (str): file of uint64 states
+
+    Yields:
+        int: packed state
+    """
+    if path is None or not os.path.exists(path):
+        return
+    with open(path, 'rb') as fi:
+        while True:
+            chunk = array('Q')
+            try:
+                chunk.fromfile(fi, READ_CHUNK)
+            except EOFError:
+                pass
+            if not chunk:
+                return
+            yield from chunk
+
+
+def unique_difference(states, *excluded):
+    """
+    Removes repeats from a sorted stream and drops anything found in sorted excluded streams
+
+    Args:
+        states (iterable): sorted packed states
+        excluded (iterable): sorted packed states to drop
+
+    Yields:
+        int: packed state
+    """
+    excluded = [iter(stream) for stream in excluded]
+    heads = [next(stream, None) for stream in excluded]
+    last = None
+    for state in states:
+        if state == last:
+            continue
+        last = state
+        seen = False
+        for index, stream in enumerate(excluded):
+            while heads[index] is not None and heads[index] < state:
+                heads[index] = next(stream, None)
+            if heads[index] == state:
+                seen = True
+        if not seen:
+            yield state
+
+
+def layer_contains(path: str, state: int)->bool:
+    """
+    Binary search of a layer file through mmap
+
+    Args:
+        path (str): layer file
+        state (int): packed state
+
+    Returns:
+        bool: state is in the layer
+    """
+    size = os.path.getsize(path)
+    if size == 0:
+        return False
+    with open(path, 'rb') as fi, mmap.mmap(fi.fileno(), 0, access=mmap.ACCESS_READ) as mapped:
+        states = memoryview(mapped).cast('Q')
+        try:
+            low, high = 0, len(states)
+            while low < high:
+                middle = (low + high) // 2
+                if states[middle] < state:
+                    low = middle + 1
+                else:
+                    high = middle
+            return low < len(states) and states[low] == state
+        finally:
+            states.release()
+
+
+class ExternalBFS:
+    """
+    Layer by layer BFS that keeps every layer on disk
+    """
+
+    def __init__(self, board: PackedBoard, work_dir: str, memory_limit: int = 256 << 20):
+        """
+        Args:
+            board (PackedBoard): board being searched
+            work_dir (str): directory for layer, run and progress files
+            memory_limit (int, optional): bytes of children buffered before spilling a run. Defaults to 256MB.
+        """
+        if board.state_bits > 64:
+            raise ValueError("Board needs {} bits per state, external BFS supports 64".format(board.state_bits))
+        self.board = board
+        self.work_dir = work_dir
+        self.buffer_states = max(1, memory_limit // BUFFERED_STATE_BYTES)
+        os.makedirs(work_dir, exist_ok=True)
+
+    def signature(self)->list:
+        return [self.board.rows, self.board.cols, [[car_id] + list(self.board.cars[car_id])
+                                                   for car_id in self.board.car_ids]]
+
+    def __load_progress(self, start: int)->dict:
+        try:
+            with open(os.path.join(self.work_dir, PROGRESS_FILE)) as fi:
+                progress = json.load(fi)
+        except FileNotFoundError:
+            return None
+        if progress['board'] != self.signature() or progress['start'] != start:
+            raise ValueError("{} holds a search of a different board".format(self.work_dir))
+        return progress
+
+    def __save_progress(self, progress: dict):
+        temp_path = os.path.join(self.work_dir, PROGRESS_FILE + '.tmp')
+        with open(temp_path, 'w') as fo:
+            json.dump(progress, fo)
+            fo.flush()
+            os.fsync(fo.fileno())
+        os.replace(temp_path, os.path.join(self.work_dir, PROGRESS_FILE))
+
+    def __clean_partial(self):
+        for name in os.listdir(self.work_dir):
+            if name.startswith('run_') or name.endswith('.tmp'):
+                os.remove(os.path.join(self.work_dir, name))
+
+    def __spill(self, children: set, runs: list):
+        path = os.path.join(self.work_dir, 'run_{:05d}.bin'.format(len(runs)))
+        with open(path, 'wb') as fo:
+            array('Q', sorted(children)).tofile(fo)
+        runs.append(path)
+        children.clear()
+
+    def __next_layer(self, depth: int)->tuple:
+        """
+        Builds layer depth+1 from layer depth
+
+        Returns:
+            tuple: states in the new layer, first goal state found in it (None if none)
+        """
+        runs = []
+        children = set()
+        for state in read_states(layer_path(self.work_dir, depth)):
+            children.update(self.board.neighbors(state))
+            if len(children) >= self.buffer_states:
+                self.__spill(children, runs)
+        if children:
+            self.__spill(children, runs)
+
+        previous = layer_path(self.work_dir, depth - 1) if depth > 0 else None
+        merged = heapq.merge(*[read_states(run) for run in runs])
+        new_states = unique_difference(merged, read_states(previous), read_states(layer_path(self.work_dir, depth)))
+        temp_path = layer_path(self.work_dir, depth + 1) + '.tmp'
+        count = 0
+        goal = None
+        out = array('Q')
+        with open(temp_path, 'wb') as fo:
+            for state in new_states:
+                out.append(state)
+                count += 1
+                if goal is None and self.board.is_goal(state):
+                    goal = state
+                if len(out) >= READ_CHUNK:
+                    out.tofile(fo)
+                    out = array('Q')
+            out.tofile(fo)
+            fo.flush()
+            os.fsync(fo.fileno())
+        os.replace(temp_path, layer_path(self.work_dir, depth + 1))
+        for run in runs:
+            os.remove(run)
+        return count, goal
+
+    def run(self, start: int, stop_at_goal: bool = True)->ExternalResult:
+        """
+        Runs (or resumes) the search
+
+        Args:
+            start (int): packed initial state
+            stop_at_goal (bool, optional): stop at the first layer holding a goal state. Defaults to True.
+
+        Returns:
+            ExternalResult: path and goal state (None if not found), size of every layer
+        """
+        progress = self.__load_progress(start)
+        self.__clean_partial()
+        if progress is None:
+            with open(layer_path(self.work_dir, 0), 'wb') as fo:
+                array('Q', [start]).tofile(fo)
+            #goal is stored as [state, depth] of the first goal state found
+            goal = [start, 0] if self.board.is_goal(start) else None
+            progress = {'board': self.signature(), 'start': start, 'layer_sizes': [1], 'goal': goal, 'done': False}
+            self.__save_progress(progress)
+
+        while not progress['done']:
+            if stop_at_goal and progress['goal'] is not None:
+                break
+            depth = len(progress['layer_sizes']) - 1
+            count, goal = self.__next_layer(depth)
+            if count == 0:
+                os.remove(layer_path(self.work_dir, depth + 1))
+                progress['done'] = True
+            else:
+                progress['layer_sizes'].append(count)
+                if progress['goal'] is None and goal is not None:
+                    progress['goal'] = [goal, depth + 1]
+            self.__save_progress(progress)
+
+        if progress['goal'] is None:
+            return ExternalResult(None, None, progress['layer_sizes'])
+        goal, depth = progress['goal']
+        return ExternalResult(self.rebuild_path(goal, depth), goal, progress['layer_sizes'])
+
+    def rebuild_path(self, goal: int, depth: int)->list:
+        """
+        Walks back from a goal state through the layer files
+
+        Args:
+            goal (int): packed goal state
+            depth (int): layer holding goal
+
+        Returns:
+            list: tuple moves from the initial state to goal
+        """
+        path = []
+        state = goal
+        for layer in range(depth - 1, -1, -1):
+            for parent, (car_id, delta) in self.board.expand(state):
+                if layer_contains(layer_path(self.work_dir, layer), parent):
+                    path.append((car_id, -delta))
+                    state = parent
+                    break
+        path.reverse()
+        return path
+
+
+def external_solve(csv_contents: list, work_dir: str, memory_limit: int = 256 << 20)->list:
+    """
+    Solves a board with disk backed BFS
+
+    Args:
+        csv_contents (list): lines of a '.board' file
+        work_dir (str): directory for layer, run and progress files
+        memory_limit (int, optional): bytes of children buffered before spilling a run. Defaults to 256MB.
+
+    Returns:
+        list: tuple moves to traverse shortest path to goal state, None if there is none
+    """
+    board, start = PackedBoard.from_csv(csv_contents)
+    return ExternalBFS(board, work_dir, memory_limit).run(start).path
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Disk backed BFS for rush hour boards")
+    parser.add_argument('board', help="'.board' file to solve")
+    parser.add_argument('--work-dir', required=True, help="directory for layer files, reused to resume")
+    parser.add_argument('--memory-limit', type=int, default=256, help="MB of children buffered per run")
+    parser.add_argument('--exhaustive', action='store_true', help="visit every reachable state")
+    args = parser.parse_args(argv)
+    file_contents, _ = solver.csv_reader(args.board)
+    board, start = PackedBoard.from_csv(file_contents)
+    result = ExternalBFS(board, args.work_dir, args.memory_limit << 20).run(start, not args.exhaustive)
+    json.dump({'path': result.path, 'layer_sizes': result.layer_sizes}, sys.stdout)
+    print()
+
+
+if __name__ == '__main__':
+    main()
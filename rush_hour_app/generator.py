@@ -0,0 +1,195 @@
+"""
+File: generator.py
+Author: John Pignato
+
+TLDR:
+Generates random puzzles whose optimal solution length falls in a target band
+
+Explaination:
+A candidate is a random set of cars on a 6x6 board: a horizontal goal car in the goal row
+plus cars and trucks of random orientation and position, following the rules init_represent
+expects (inside the board, no overlaps, exactly one goal car). No other horizontal car is put in the
+goal row since it could never get out of the goal car's way.
+
+Every position reachable from the candidate belongs to the same cluster. A retrograde search, a
+breadth first search backwards from every goal state of the cluster, labels each position with its
+distance to the goal. The last layer holds the hardest positions of the cluster and one of them is
+kept if its distance is inside the band. Candidates are generated and searched on every core and the
+puzzles found are streamed out as corpus lines: "<optimal length> <board string> <cluster size>".
+Corpus board strings are always 36 cells with the exit on the third row, so other board sizes are
+rejected.
+
+Usage:
+    python3 rush_hour_app/generator.py --count 100 --min-length 30 --max-length 60 --out puzzles.txt
+"""
+import os
+import sys
+import random
+import argparse
+from multiprocessing import Pool
+from collections import namedtuple
+from packed_board import PackedBoard
+from level_bfs import level_bfs
+from corpus import canonical, SIZE
+import rush_hour_solver as solver
+
+#candidates handed to a worker at once
+CHUNK_SIZE = 4
+#placement attempts per car before giving up on it
+PLACEMENT_TRIES = 20
+
+GeneratorSettings = namedtuple('GeneratorSettings', ['rows', 'cols', 'min_cars', 'max_cars', 'truck_ratio',
+                                                     'min_length', 'max_length'])
+Puzzle = namedtuple('Puzzle', ['length', 'board', 'cluster_size'])
+
+GOAL_CAR_ID = 0
+
+
+def random_cars(settings: GeneratorSettings, rng: random.Random)->dict:
+    """
+    Places a goal car and a random number of other cars
+
+    Args:
+        settings (GeneratorSettings): board size and car counts
+        rng (random.Random): random source
+
+    Returns:
+        dict: car id -> car namedtuple, like init_represent fills in
+    """
+    goal_row = solver.GOAL_POS[0]
+    occupied = set()
+    cars = {}
+    goal_x = rng.randrange(0, settings.cols - 2)
+    cars[GOAL_CAR_ID] = solver.car(goal_x, goal_row, 'H', 2, True)
+    occupied.update((goal_row, goal_x + i) for i in range(2))
+    wanted = rng.randint(settings.min_cars, settings.max_cars)
+    for car_id in range(1, wanted + 1):
+        for _ in range(PLACEMENT_TRIES):
+            length = 3 if rng.random() < settings.truck_ratio else 2
+            if rng.random() < 0.5:
+                row, col = rng.randrange(settings.rows), rng.randrange(settings.cols - length + 1)
+                if row == goal_row:
+                    continue
+                cells = [(row, col + i) for i in range(length)]
+                direction = 'H'
+            else:
+                row, col = rng.randrange(settings.rows - length + 1), rng.randrange(settings.cols)
+                cells = [(row + i, col) for i in range(length)]
+                direction = 'V'
+            if not occupied.intersection(cells):
+                occupied.update(cells)
+                cars[car_id] = solver.car(col, row, direction, length, False)
+                break
+    return cars
+
+
+def hardest_position(board: PackedBoard, start: int)->tuple:
+    """
+    Retrograde search of the cluster holding start
+
+    Args:
+        board (PackedBoard): board of the cars
+        start (int): packed state in the cluster
+
+    Returns:
+        tuple: hardest packed state, its optimal solution length, cluster size (None, None, size if no goal is reachable)
+    """
+    cluster = level_bfs(board, start, stop_at_goal=False).layers
+    goals = [state for layer in cluster for state in layer if board.is_goal(state)]
+    size = sum(len(layer) for layer in cluster)
+    if not goals:
+        return None, None, size
+    layers = level_bfs(board, goals, stop_at_goal=False).layers
+    return layers[-1][0], len(layers) - 1, size
+
+
+def candidate(job: tuple)->Puzzle:
+    """
+    Generates and searches one candidate
+
+    Args:
+        job (tuple): GeneratorSettings, random seed
+
+    Returns:
+        Puzzle: hardest position of the candidate's cluster, None if it is outside the band
+    """
+    settings, seed = job
+    rng = random.Random(seed)
+    cars = random_cars(settings, rng)
+    board = PackedBoard(cars, settings.rows, settings.cols, GOAL_CAR_ID)
+    grid = [[-1] * settings.cols for _ in range(settings.rows)]
+    for car_id, info in cars.items():
+        for i in range(info.len):
+            if info.direction == 'H':
+                grid[info.y_pos][info.x_pos + i] = car_id
+            else:
+                grid[info.y_pos + i][info.x_pos] = car_id
+    state, length, size = hardest_position(board, board.encode(grid))
+    if length is None or not settings.min_length <= length <= settings.max_length:
+        return None
+    return Puzzle(length, canonical(board.decode(state), GOAL_CAR_ID)[0], size)
+
+
+def generate(settings: GeneratorSettings, count: int, seed: int = 0, processes: int = None, max_candidates: int = None):
+    """
+    Streams puzzles inside the band
+
+    Args:
+        settings (GeneratorSettings): board size, car counts and length band
+        count (int): puzzles wanted
+        seed (int, optional): seed of the first candidate, candidate i uses seed + i. Defaults to 0.
+        processes (int, optional): worker processes. Defaults to None (every core).
+        max_candidates (int, optional): stop after this many candidates. Defaults to None (no limit).
+
+    Yields:
+        Puzzle: distinct puzzles, at most count of them
+    """
+    if (settings.rows, settings.cols) != (SIZE, SIZE):
+        raise ValueError("corpus lines hold {0}x{0} boards, not {1}x{2}".format(SIZE, settings.rows, settings.cols))
+    found = set()
+    limit = max_candidates if max_candidates is not None else sys.maxsize
+    jobs = ((settings, seed + index) for index in range(limit))
+    processes = processes or os.cpu_count()
+    pool = Pool(processes) if processes > 1 else None
+    try:
+        results = pool.imap_unordered(candidate, jobs, CHUNK_SIZE) if pool is not None else map(candidate, jobs)
+        for puzzle in results:
+            if puzzle is None or puzzle.board in found:
+                continue
+            found.add(puzzle.board)
+            yield puzzle
+            if len(found) >= count:
+                return
+    finally:
+        if pool is not None:
+            pool.terminate()
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Generates rush hour puzzles in a difficulty band")
+    parser.add_argument('--count', type=int, default=10)
+    parser.add_argument('--min-cars', type=int, default=8)
+    parser.add_argument('--max-cars', type=int, default=13)
+    parser.add_argument('--truck-ratio', type=float, default=0.25)
+    parser.add_argument('--min-length', type=int, default=20)
+    parser.add_argument('--max-length', type=int, default=60)
+    parser.add_argument('--seed', type=int, default=0)
+    parser.add_argument('--processes', type=int, default=None)
+    parser.add_argument('--max-candidates', type=int, default=None)
+    parser.add_argument('--out', help="corpus file, defaults to stdout")
+    args = parser.parse_args(argv)
+    #corpus lines only hold SIZE x SIZE boards
+    settings = GeneratorSettings(SIZE, SIZE, args.min_cars, args.max_cars, args.truck_ratio,
+                                 args.min_length, args.max_length)
+    out = open(args.out, 'w') if args.out else sys.stdout
+    try:
+        for puzzle in generate(settings, args.count, args.seed, args.processes, args.max_candidates):
+            out.write("{} {} {}\n".format(*puzzle))
+            out.flush()
+    finally:
+        if out is not sys.stdout:
+            out.close()
+
+
+if __name__ == '__main__':
+    main()
@@ -28,6 +28,9 @@ class Graph:
     def __len__(self):
         return len(self.__graph.keys())
     
+    def __iter__(self):
+        return iter(self.__graph)
+
     def __repr__(self): #debug
         repr_str = ""
         for k in self.__graph.keys():
@@ -0,0 +1,251 @@
+"""
+Graph Store
+
+Author: John Pignato
+
+TLDR:
+    Compact binary dump/load of a recorded state space
+
+Explaination:
+    A recorded state space is written as one binary file so it can be analyzed offline.
+    Node labels are interned to integer IDs in the order they are first seen and every node
+    is stored as a fixed width packed state. The file layout is (all little endian):
+
+        header  -> magic, version, state width, node count, edge count, edge offset, state offset
+        edges   -> edge count records of (src id u32, dest id u32, car id u8, delta i8)
+        states  -> node count records of state width bytes
+
+    GraphWriter can be handed to a_star in place of a Graph so arcs are streamed to disk while the
+    search runs. MappedGraph memory-maps a dumped file back without parsing it.
+"""
+import os
+import mmap
+import json
+import shutil
+import struct
+
+MAGIC = b'RHGS'
+VERSION = 1
+HEADER = struct.Struct('<4sHHQQQQ')
+EDGE = struct.Struct('<IIBb')
+#car id stored for arcs that have no move label
+NO_CAR = 255
+#bytes buffered in memory before they are flushed to disk
+FLUSH_SIZE = 1 << 20
+
+
+def pack_grid_string(label: str)->bytes:
+    """
+    Packs a board "fingerprint" into one byte per cell. Empty cells (-1) become 0 and car IDs are stored +1.
+
+    Args:
+        label (str): str repr of board state
+
+    Returns:
+        bytes: packed state
+    """
+    return bytes(cell + 1 for row in json.loads(label) for cell in row)
+
+
+def unpack_grid(state: bytes, cols: int)->list:
+    """
+    Turns a packed state back into a board state matrix
+
+    Args:
+        state (bytes): packed state
+        cols (int): number of columns on the board
+
+    Returns:
+        list: a board state matrix
+    """
+    cells = [cell - 1 for cell in state]
+    return [cells[i:i+cols] for i in range(0, len(cells), cols)]
+
+
+class GraphWriter:
+    """
+    Streams nodes and arcs to a compact binary graph file. Has the same add_node/add_arc
+    interface as Graph so it can be used as a state space recorder.
+    """
+
+    def __init__(self, path: str, pack_state=pack_grid_string):
+        self.path = path
+        self.node_count = 0
+        self.edge_count = 0
+        self.state_width = None
+        self.__pack_state = pack_state
+        self.__ids = {}
+        self.__edge_buffer = bytearray()
+        self.__state_buffer = bytearray()
+        self.__file = open(path, 'wb')
+        self.__file.write(HEADER.pack(MAGIC, VERSION, 0, 0, 0, 0, 0))
+        #states go to a side file until the edge count is known
+        self.__state_path = path + '.states'
+        self.__state_file = open(self.__state_path, 'wb')
+
+    def __len__(self):
+        return self.node_count
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
+
+    def node_id(self, label)->int:
+        """
+        Interns a node label, writing its packed state the first time it is seen
+
+        Args:
+            label (str): name of node
+
+        Returns:
+            int: interned ID of node
+        """
+        try:
+            return self.__ids[label]
+        except KeyError:
+            pass
+        state = self.__pack_state(label)
+        if self.state_width is None:
+            self.state_width = len(state)
+        elif len(state) != self.state_width:
+            raise ValueError("Packed states must all be {} bytes wide".format(self.state_width))
+        node = self.__ids[label] = self.node_count
+        self.node_count += 1
+        self.__state_buffer += state
+        if len(self.__state_buffer) >= FLUSH_SIZE:
+            self.__state_file.write(self.__state_buffer)
+            self.__state_buffer.clear()
+        return node
+
+    def add_node(self, label: str):
+        """
+        Adds node to graph file
+
+        Args:
+            label (str): name of node
+        """
+        self.node_id(label)
+
+    def add_arc(self, src: str, dest: str, label: tuple = None):
+        """
+        Adds directed arc to graph file
+
+        Args:
+            src (str): source node
+            dest (str): destination node
+            label (tuple, optional): (car id, delta) move of arc. Defaults to None.
+        """
+        car_id, delta = label if label is not None else (NO_CAR, 0)
+        self.__edge_buffer += EDGE.pack(self.node_id(src), self.node_id(dest), car_id, delta)
+        self.edge_count += 1
+        if len(self.__edge_buffer) >= FLUSH_SIZE:
+            self.__file.write(self.__edge_buffer)
+            self.__edge_buffer.clear()
+
+    def close(self):
+        """
+        Writes remaining buffers, appends the states section and fills in the header
+        """
+        if self.__file.closed:
+            return
+        self.__file.write(self.__edge_buffer)
+        self.__state_file.write(self.__state_buffer)
+        self.__edge_buffer.clear()
+        self.__state_buffer.clear()
+        self.__state_file.close()
+        states_offset = self.__file.tell()
+        with open(self.__state_path, 'rb') as fi:
+            shutil.copyfileobj(fi, self.__file, FLUSH_SIZE)
+        os.remove(self.__state_path)
+        self.__file.seek(0)
+        self.__file.write(HEADER.pack(MAGIC, VERSION, self.state_width or 0, self.node_count,
+                                      self.edge_count, HEADER.size, states_offset))
+        self.__file.close()
+
+
+def dump_graph(graph, path: str, pack_state=pack_grid_string)->int:
+    """
+    Writes a Graph to a compact binary graph file
+
+    Args:
+        graph (Graph): graph to export
+        path (str): output file path
+        pack_state (callable, optional): packs a node label into fixed width bytes. Defaults to pack_grid_string.
+
+    Returns:
+        int: number of arcs written
+    """
+    with GraphWriter(path, pack_state) as writer:
+        for node in graph:
+            writer.add_node(node)
+            for arc in graph._get_node_arcs(node):
+                writer.add_arc(node, arc.dest, arc.arc_name)
+    return writer.edge_count
+
+
+class MappedGraph:
+    """
+    Read only view of a binary graph file backed by mmap
+    """
+
+    def __init__(self, path: str):
+        with open(path, 'rb') as fi:
+            self.__map = mmap.mmap(fi.fileno(), 0, access=mmap.ACCESS_READ)
+        magic, version, self.state_width, self.node_count, self.edge_count, \
+            self.__edges_offset, self.__states_offset = HEADER.unpack_from(self.__map, 0)
+        if magic != MAGIC or version != VERSION:
+            self.__map.close()
+            raise ValueError("{} is not a graph file".format(path))
+        self.__view = memoryview(self.__map)
+
+    def __len__(self):
+        return self.node_count
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
+
+    def state(self, node: int)->bytes:
+        """
+        Packed state of a node
+
+        Args:
+            node (int): interned node ID
+
+        Returns:
+            bytes: packed state
+        """
+        if not 0 <= node < self.node_count:
+            raise IndexError(node)
+        start = self.__states_offset + node * self.state_width
+        return self.__map[start:start + self.state_width]
+
+    def edges(self):
+        """
+        Iterates every arc in the order it was written
+
+        Yields:
+            tuple: src id, dest id, car id, delta
+        """
+        end = self.__edges_offset + self.edge_count * EDGE.size
+        return EDGE.iter_unpack(self.__view[self.__edges_offset:end])
+
+    def out_degrees(self)->list:
+        """
+        Number of arcs leaving every node
+
+        Returns:
+            list: out degree indexed by node ID
+        """
+        degrees = [0] * self.node_count
+        for src, _, _, _ in self.edges():
+            degrees[src] += 1
+        return degrees
+
+    def close(self):
+        self.__view.release()
+        self.__map.close()
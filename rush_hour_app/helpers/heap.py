@@ -17,8 +17,9 @@ import math
 
 class Heap:
 
-    def __init__(self, is_max=True, lst=[]):
-        self.__heap_array = lst
+    def __init__(self, is_max=True, lst=None):
+        #a shared default list would leak leftover entries from one heap into the next
+        self.__heap_array = lst if lst is not None else []
         self.__is_max = is_max
         for i in range(len(self.__heap_array), -1, -1):
             self.__heapify(i)
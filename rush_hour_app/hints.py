@@ -0,0 +1,174 @@
+"""
+File: hints.py
+Author: John Pignato
+
+TLDR:
+Answers "what's the best next move?" for any position of a board
+
+Explaination:
+A HintService solves its board once. The warm-up visits every state reachable from the initial
+board and then runs a breadth first search backwards from all goal states, which labels every
+state with its exact number of moves to the goal. A hint is then just a look at the children of
+the queried state for one whose label is one lower. States that were never seen (or boards too big
+to warm up) are looked up in a puzzle database when one is given, and otherwise fall back to a
+bounded breadth first search whose optimal path is cached as well. States found to have no solution
+are remembered too, so they are never searched twice.
+"""
+from collections import deque
+from packed_board import PackedBoard
+import rush_hour_solver as solver
+
+#hint services already warmed up, keyed by board file path and options
+_services = {}
+
+
+class HintService:
+    """
+    Caches distance-to-goal labels of a board's state space
+    """
+
+    def __init__(self, csv_contents: list, max_states: int = None, fallback_states: int = 100000, database=None):
+        """
+        Args:
+            csv_contents (list): lines of a '.board' file
+            max_states (int, optional): give up on the warm-up past this many states. Defaults to None (no limit).
+            fallback_states (int, optional): states a fallback search may visit. Defaults to 100000.
+            database (PuzzleDatabase, optional): solved puzzles checked before a fallback search. Defaults to None.
+        """
+        self.board, self.start = PackedBoard.from_csv(csv_contents)
+        self.fallback_states = fallback_states
+        self.database = database
+        #packed state -> moves left to reach the goal
+        self.distances = {}
+        #states with no solution, or none found within fallback_states
+        self.unsolvable = set()
+        self.complete = self.__warm_up(max_states)
+
+    def __warm_up(self, max_states: int)->bool:
+        reachable = {self.start}
+        frontier = deque([self.start])
+        while frontier:
+            for child in self.board.neighbors(frontier.popleft()):
+                if child not in reachable:
+                    reachable.add(child)
+                    frontier.append(child)
+            if max_states is not None and len(reachable) > max_states:
+                return False
+        #every move can be undone so searching backwards uses the same move generator
+        frontier = deque(state for state in reachable if self.board.is_goal(state))
+        if not frontier:
+            self.unsolvable = reachable
+            return True
+        distances = dict.fromkeys(frontier, 0)
+        while frontier:
+            state = frontier.popleft()
+            for child in self.board.neighbors(state):
+                if child not in distances:
+                    distances[child] = distances[state] + 1
+                    frontier.append(child)
+        self.distances = distances
+        return True
+
+    def distance(self, grid: list)->int:
+        """
+        Moves left to reach the goal from a board state
+
+        Args:
+            grid (list): a board state matrix
+
+        Returns:
+            int: number of moves, None if the goal can't be reached
+        """
+        state = self.board.encode(grid)
+        self.__label(state)
+        return self.distances.get(state)
+
+    def next_move(self, grid: list)->tuple:
+        """
+        Finds the next move of an optimal solution from a board state
+
+        Args:
+            grid (list): a board state matrix
+
+        Returns:
+            tuple: (car id, delta) move, None if grid is a goal state or has no solution
+        """
+        state = self.board.encode(grid)
+        self.__label(state)
+        distance = self.distances.get(state)
+        if not distance:
+            return None
+        for child, move in self.board.expand(state):
+            if self.distances.get(child) == distance - 1:
+                return move
+        return None
+
+    def __label(self, state: int):
+        if state not in self.distances and state not in self.unsolvable:
+            self.__lookup(state)
+
+    def __lookup(self, state: int):
+        """
+        Labels an unseen state, and the states along its solution, from the database or a fallback search
+        """
+        puzzle = None
+        if self.database is not None:
+            puzzle = self.database.lookup_grid(self.board.decode(state), self.board.goal_car_id)
+        if puzzle is None:
+            self.__search(state)
+        elif puzzle.solution is None:
+            self.unsolvable.add(state)
+        else:
+            steps = {car_id: 1 << shift for car_id, shift in zip(self.board.car_ids, self.board.shifts)}
+            for distance in range(puzzle.length, -1, -1):
+                self.distances[state] = distance
+                if distance:
+                    car_id, delta = puzzle.solution[puzzle.length - distance]
+                    state += delta * steps[car_id]
+
+    def __search(self, state: int):
+        """
+        Bounded breadth first search from an unseen state. Labels every state on the path found, or marks
+        the state unsolvable when there is none.
+        """
+        parents = {state: None}
+        frontier = deque([state])
+        while frontier and len(parents) <= self.fallback_states:
+            current = frontier.popleft()
+            if self.board.is_goal(current):
+                distance = 0
+                while current is not None:
+                    self.distances[current] = distance
+                    current = parents[current]
+                    distance += 1
+                return
+            for child in self.board.neighbors(current):
+                if child not in parents:
+                    parents[child] = current
+                    frontier.append(child)
+        if frontier:
+            #gave up, the state may still have a solution past the bound
+            self.unsolvable.add(state)
+        else:
+            #the whole state space of the state was searched
+            self.unsolvable.update(parents)
+
+
+def hint_service(file_path: str, **kwargs)->HintService:
+    """
+    Returns the warmed up hint service of a board file, building it the first time it is asked for
+    with these options
+
+    Args:
+        file_path (str): path to '.board' file
+        **kwargs: HintService options
+
+    Returns:
+        HintService: hint service of the board
+    """
+    options = tuple(sorted(kwargs.items()))
+    service = _services.get((file_path, options))
+    if service is None:
+        file_contents, file_path = solver.csv_reader(file_path)
+        service = _services[file_path, options] = HintService(file_contents, **kwargs)
+    return service
@@ -0,0 +1,267 @@
+"""
+File: level_bfs.py
+Author: John Pignato
+
+TLDR:
+Level synchronous breadth first search over packed states, optionally on several processes
+
+Explaination:
+The search works one depth layer at a time. Every layer is kept as a sorted array of packed
+64 bit states. When a pool is used the current layer is copied into shared memory once and each
+worker expands its own slice of it with the PackedBoard move generator, handing back its children
+already sorted and deduplicated. Because every move can be undone, a child of layer d can only
+be in layer d-1, d or d+1, so merging the next layer only has to check the two layers before it.
+Paths are rebuilt by walking back from the goal through the stored layers, which means no parent
+pointers are kept at all. Time spent expanding and merging is reported for every layer.
+Layers of at least vectorized.MIN_VECTOR_LAYER states are expanded with the NumPy backend when
+NumPy is installed.
+"""
+import sys
+import time
+from array import array
+from bisect import bisect_left
+from collections import namedtuple
+from multiprocessing import Pool, resource_tracker
+from multiprocessing.shared_memory import SharedMemory
+from packed_board import PackedBoard
+import vectorized
+
+#slices handed out per worker process for every layer
+SLICES_PER_PROCESS = 4
+#layers smaller than this are expanded in process
+MIN_PARALLEL_LAYER = 2048
+
+LayerTiming = namedtuple('LayerTiming', ['depth', 'states', 'expand_seconds', 'merge_seconds'])
+BfsResult = namedtuple('BfsResult', ['path', 'goal', 'layers', 'timings'])
+
+#board of the current worker process
+_worker_board = None
+
+
+def _init_worker(board: PackedBoard):
+    global _worker_board
+    _worker_board = board
+
+
+def worker_pool(board: PackedBoard, processes: int)->Pool:
+    """
+    Pool of workers for expand_layer
+    """
+    #started before the workers so they share it, see _attach
+    resource_tracker.ensure_running()
+    return Pool(processes, _init_worker, (board,))
+
+
+def _attach(name: str)->SharedMemory:
+    """
+    Attaches to a frontier segment the coordinator owns and unlinks
+    """
+    if sys.version_info >= (3, 13):
+        return SharedMemory(name=name, track=False)
+    #older versions register every segment they attach to. The workers share the coordinator's resource
+    #tracker, which already holds the segment, so nothing is reported as leaked when they exit
+    return SharedMemory(name=name)
+
+
+def _expand_slice(job: tuple)->bytes:
+    name, start, end = job
+    shm = _attach(name)
+    try:
+        frontier = shm.buf.cast('Q')
+        states = frontier[start:end].tolist()
+        frontier.release()
+        children = set()
+        for state in states:
+            children.update(_worker_board.neighbors(state))
+    finally:
+        shm.close()
+    return array('Q', sorted(children)).tobytes()
+
+
+def contains(layer: array, state: int)->bool:
+    """
+    Binary search of a sorted layer
+
+    Args:
+        layer (array): sorted packed states
+        state (int): packed state
+
+    Returns:
+        bool: state is in layer
+    """
+    index = bisect_left(layer, state)
+    return index < len(layer) and layer[index] == state
+
+
+def expand_layer(board: PackedBoard, layer: array, pool=None, processes: int = 1)->list:
+    """
+    Expands every state of a layer
+
+    Args:
+        board (PackedBoard): board being searched
+        layer (array): packed states of the layer
+        pool (Pool, optional): worker pool built with worker_pool. Defaults to None (expand in process).
+        processes (int, optional): worker processes in pool. Defaults to 1.
+
+    Returns:
+        list: iterables of child states
+    """
+    if pool is None or len(layer) < MIN_PARALLEL_LAYER:
+        children = set()
+        for state in layer:
+            children.update(board.neighbors(state))
+        return [children]
+    shm = SharedMemory(create=True, size=len(layer) * layer.itemsize)
+    try:
+        shm.buf[:len(layer) * layer.itemsize] = layer.tobytes()
+        slices = processes * SLICES_PER_PROCESS
+        step = -(-len(layer) // slices)
+        jobs = [(shm.name, start, min(start + step, len(layer))) for start in range(0, len(layer), step)]
+        return [array('Q', chunk) for chunk in pool.map(_expand_slice, jobs)]
+    finally:
+        shm.close()
+        shm.unlink()
+
+
+def merge_layer(parts: list, previous: array, current: array)->array:
+    """
+    Merges expanded children into the next layer, dropping states seen in the two layers before it
+
+    Args:
+        parts (list): iterables of child states
+        previous (array): sorted layer d-1
+        current (array): sorted layer d
+
+    Returns:
+        array: sorted layer d+1
+    """
+    seen = set(previous)
+    seen.update(current)
+    children = set()
+    for part in parts:
+        children.update(part)
+    return array('Q', sorted(children - seen))
+
+
+def rebuild_path(board: PackedBoard, layers: list, goal: int)->list:
+    """
+    Walks back from a goal state through the stored layers
+
+    Args:
+        board (PackedBoard): board being searched
+        layers (list): sorted layers, goal is in the last one
+        goal (int): packed goal state
+
+    Returns:
+        list: tuple moves from the first layer to goal
+    """
+    path = []
+    state = goal
+    for layer in reversed(layers[:-1]):
+        for parent, (car_id, delta) in board.expand(state):
+            if contains(layer, parent):
+                #move that undoes parent -> state
+                path.append((car_id, -delta))
+                state = parent
+                break
+    path.reverse()
+    return path
+
+
+def _add_stats(stats, layers: list, timings: list, generated: int):
+    stored = sum(len(layer) for layer in layers)
+    expanded = sum(timing.states for timing in timings)
+    #every stored state but the ones from before a resume came from a generated child
+    stats.add(expanded, generated, generated - (stored - len(layers[0])) if generated else 0,
+              max(len(layer) for layer in layers), stored)
+
+
+def level_bfs(board: PackedBoard, sources, processes: int = 1, stop_at_goal: bool = True,
+              use_numpy: bool = None, checkpoint=None, stats=None)->BfsResult:
+    """
+    Runs a level synchronous BFS
+
+    Args:
+        board (PackedBoard): board being searched
+        sources (int|list): packed initial state, or several for a multi source (retrograde) search
+        processes (int, optional): worker processes. Defaults to 1.
+        stop_at_goal (bool, optional): stop at the first layer holding a goal state. Defaults to True.
+        use_numpy (bool, optional): expand with NumPy, None picks it for large layers when installed. Defaults to None.
+        checkpoint (LayerCheckpoint, optional): logs completed layers, resuming from the ones it already holds. Defaults to None.
+        stats (SolverStats, optional): filled in with the search counters. Children are counted after each
+            worker removed its own duplicates. Defaults to None.
+
+    Returns:
+        BfsResult: path and goal state (None if not searched for or not found), layers and per layer timings
+    """
+    if board.state_bits > 64:
+        raise ValueError("Board needs {} bits per state, level BFS supports 64".format(board.state_bits))
+    if isinstance(sources, int):
+        sources = [sources]
+    vector_board = None
+    if use_numpy or (use_numpy is None and vectorized.supports(board)):
+        vector_board = vectorized.VectorBoard(board)
+    min_vector_layer = 0 if use_numpy else vectorized.MIN_VECTOR_LAYER
+    pool = worker_pool(board, processes) if processes > 1 else None
+    try:
+        layers = checkpoint.resume() if checkpoint is not None else []
+        if not layers:
+            layers = [array('Q', sorted(set(sources)))]
+            if checkpoint is not None:
+                checkpoint.completed(layers[0])
+        previous = layers[-2] if len(layers) > 1 else array('Q')
+        timings = []
+        generated = 0
+        while True:
+            current = layers[-1]
+            if stop_at_goal:
+                if vector_board is not None and len(current) >= min_vector_layer:
+                    goals = vectorized.as_array(current)[vector_board.is_goal(vectorized.as_array(current))]
+                    goals = [int(state) for state in goals[:1]]
+                else:
+                    goals = [state for state in current if board.is_goal(state)][:1]
+                if goals:
+                    if stats is None:
+                        return BfsResult(rebuild_path(board, layers, goals[0]), goals[0], layers, timings)
+                    _add_stats(stats, layers, timings, generated)
+                    with stats.timed('rebuild'):
+                        return BfsResult(rebuild_path(board, layers, goals[0]), goals[0], layers, timings)
+            started = time.perf_counter()
+            if vector_board is not None and len(current) >= min_vector_layer:
+                children = vectorized.expand_layer(vector_board, current)
+                generated += len(children)
+                expanded = time.perf_counter()
+                next_layer = vectorized.merge_layer(children, previous, current)
+            else:
+                parts = expand_layer(board, current, pool, processes)
+                generated += sum(len(part) for part in parts)
+                expanded = time.perf_counter()
+                next_layer = merge_layer(parts, previous, current)
+            timings.append(LayerTiming(len(layers) - 1, len(current), expanded - started,
+                                       time.perf_counter() - expanded))
+            if not next_layer:
+                if stats is not None:
+                    _add_stats(stats, layers, timings, generated)
+                return BfsResult(None, None, layers, timings)
+            previous = current
+            layers.append(next_layer)
+            if checkpoint is not None:
+                checkpoint.completed(next_layer)
+    finally:
+        if pool is not None:
+            pool.terminate()
+
+
+def bfs_solve(csv_contents: list, processes: int = 1)->list:
+    """
+    Solves a board with level synchronous BFS
+
+    Args:
+        csv_contents (list): lines of a '.board' file
+        processes (int, optional): worker processes. Defaults to 1.
+
+    Returns:
+        list: tuple moves to traverse shortest path to goal state, None if there is none
+    """
+    board, start = PackedBoard.from_csv(csv_contents)
+    return level_bfs(board, start, processes).path
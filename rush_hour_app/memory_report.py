@@ -0,0 +1,276 @@
+"""
+File: memory_report.py
+Author: John Pignato
+
+TLDR:
+Reports where the memory of a solve goes, as JSON
+
+Explaination:
+The board is solved with one engine while:
+    - tracemalloc traces Python allocations. A snapshot is taken right before the search and one as
+      the search function returns, when its structures are at their largest, and the biggest
+      allocation sites of the difference are reported.
+    - a profile hook catches that return and measures the engine's search structures (visited sets,
+      parent tables, priority queues, BFS layers, the IDA* transposition table, the state space
+      graph when one is recorded): their deep size, the states they hold and the bytes per state.
+      The move histories the grid a_star keeps in its heap entries get their own line.
+    - a background thread samples the process's resident set size, giving an RSS timeline and the
+      peak RSS.
+Tracing slows the search down several times, so the timeline is longer than a normal solve.
+
+Usage:
+    python3 rush_hour_app/memory_report.py game_data/board39.board --engine packed_astar --out board39.json
+"""
+import os
+import sys
+import json
+import time
+import argparse
+import threading
+import tracemalloc
+from array import array
+from packed_board import PackedBoard, SlideBoard
+from engines import ENGINES, parse_engine
+import engines
+from solver_stats import SolverStats
+from level_bfs import level_bfs
+import rush_hour_solver as solver
+
+#seconds between RSS samples
+RSS_INTERVAL = 0.01
+#allocation sites reported
+TOP_ALLOCATIONS = 15
+PAGE_SIZE = os.sysconf('SC_PAGE_SIZE') if hasattr(os, 'sysconf') else 4096
+
+
+def rss_bytes()->int:
+    """
+    Resident set size of this process, None where /proc is missing
+    """
+    try:
+        with open('/proc/self/statm') as fi:
+            return int(fi.read().split()[1]) * PAGE_SIZE
+    except OSError:
+        return None
+
+
+def peak_rss_bytes()->int:
+    """
+    Peak resident set size of this process
+    """
+    try:
+        import resource
+    except ImportError:
+        return None
+    peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    #kilobytes on Linux, bytes on macOS
+    return peak if sys.platform == 'darwin' else peak * 1024
+
+
+def deep_size(obj, seen: set = None)->int:
+    """
+    Estimates the bytes an object holds, counting every object it refers to once
+
+    Args:
+        obj (object): object to measure
+        seen (set, optional): ids of objects already counted. Defaults to None.
+
+    Returns:
+        int: bytes
+    """
+    seen = seen if seen is not None else set()
+    size = 0
+    stack = [obj]
+    while stack:
+        current = stack.pop()
+        if id(current) in seen:
+            continue
+        seen.add(id(current))
+        size += sys.getsizeof(current)
+        if isinstance(current, dict):
+            stack.extend(current.keys())
+            stack.extend(current.values())
+        elif isinstance(current, (list, tuple, set, frozenset)):
+            stack.extend(current)
+        elif hasattr(current, '__dict__') and not isinstance(current, type):
+            stack.append(vars(current))
+    return size
+
+
+def states_held(obj)->int:
+    """
+    States in a search structure: its length, or the total length of its parts for a list of
+    containers (BFS layers, the two sides of a bidirectional search)
+    """
+    if isinstance(obj, (list, tuple)) and all(isinstance(part, (array, list, set, dict)) for part in obj):
+        return sum(len(part) for part in obj)
+    return len(obj)
+
+
+class RssTimeline(threading.Thread):
+    """
+    Samples the resident set size until stopped
+    """
+
+    def __init__(self, interval: float = RSS_INTERVAL):
+        super().__init__(daemon=True)
+        self.interval = interval
+        #(seconds since start, rss bytes)
+        self.samples = []
+        self.__stop = threading.Event()
+        self.__started = time.perf_counter()
+
+    def run(self):
+        while not self.__stop.is_set():
+            self.samples.append((round(time.perf_counter() - self.__started, 4), rss_bytes()))
+            self.__stop.wait(self.interval)
+
+    def stop(self):
+        self.__stop.set()
+        self.join()
+        self.samples.append((round(time.perf_counter() - self.__started, 4), rss_bytes()))
+
+
+def nested_code(function, name: str):
+    """
+    Code object of a function defined inside another one
+    """
+    return next(const for const in function.__code__.co_consts if getattr(const, 'co_name', None) == name)
+
+
+def probed_structures(engine: str)->dict:
+    """
+    Search structures measured for every engine
+
+    Args:
+        engine (str): engine name
+
+    Returns:
+        dict: code object of the function holding them -> names of its locals that are search structures
+    """
+    return {
+        'astar': {solver.a_star.__code__: ('visited', 'heuristic_map', 'priority_queue', 'state_space')},
+        'packed_astar': {engines.packed_a_star.__code__: ('g_values', 'parents', 'priority_queue')},
+        'greedy': {engines.greedy.__code__: ('parents', 'priority_queue')},
+        'bfs': {level_bfs.__code__: ('layers',)},
+        'bidirectional': {engines.bidirectional.__code__: ('forward', 'backward', 'depths', 'frontiers')},
+        #the transposition table lives in the recursive search, it is measured as the root call returns
+        'ida': {engines.ida_star.__code__: ('path_states', 'moves'),
+                nested_code(engines.ida_star, 'search'): ('table',)},
+    }[engine]
+
+
+class StructureProbe:
+    """
+    Measures the named search structures of a search function as it returns
+    """
+
+    def __init__(self, structures: dict):
+        """
+        Args:
+            structures (dict): code object -> names of the locals to measure, see probed_structures
+        """
+        self.structures = structures
+        self.sizes = {}
+        self.snapshot = None
+
+    def __call__(self, frame, event, arg):
+        if event != 'return' or frame.f_code not in self.structures:
+            return
+        f_locals = frame.f_locals
+        #only the root call of the recursive IDA* search holds the whole search
+        if frame.f_code.co_name == 'search' and f_locals['g_value'] != 0:
+            return
+        self.snapshot = tracemalloc.take_snapshot()
+        seen = set()
+        measured = [(name, f_locals[name]) for name in self.structures[frame.f_code]
+                    if hasattr(f_locals.get(name), '__len__')]
+        queue = f_locals.get('priority_queue')
+        entries = queue._Heap__heap_array if queue is not None else []
+        if entries and hasattr(entries[0][-1], 'history'):
+            #the grid a_star copies the whole move history into every heap entry
+            self.__record('histories', [entry[-1].history for entry in entries], len(entries), seen)
+        #largest first, so an object shared by two structures (a BFS layer and the list of layers)
+        #is counted in the one that holds the most
+        measured.sort(key=lambda item: -deep_size(item[1]))
+        for name, value in measured:
+            self.__record(name, value, states_held(value), seen)
+
+    def __record(self, name: str, value, states: int, seen: set):
+        size = deep_size(value, seen)
+        self.sizes[name] = {'bytes': size, 'states': states,
+                            'bytes_per_state': round(size / states, 2) if states else None}
+
+    def __enter__(self):
+        sys.setprofile(self)
+        return self
+
+    def __exit__(self, *exc):
+        sys.setprofile(None)
+
+
+def memory_report(board: PackedBoard, start: int, engine: str = 'packed_astar', **options)->dict:
+    """
+    Solves a board while tracing its memory
+
+    Args:
+        board (PackedBoard): board being solved
+        start (int): packed initial state
+        engine (str, optional): engine name. Defaults to 'packed_astar'.
+
+    Returns:
+        dict: JSON ready report
+    """
+    search = ENGINES[engine].solve
+    stats = SolverStats()
+    timeline = RssTimeline()
+    tracemalloc.start()
+    before = tracemalloc.take_snapshot()
+    timeline.start()
+    try:
+        with StructureProbe(probed_structures(engine)) as probe, stats.timed('search'):
+            path = search(board, start, stats=stats, **options)
+    finally:
+        timeline.stop()
+        current, peak = tracemalloc.get_traced_memory()
+        tracemalloc.stop()
+    top = []
+    if probe.snapshot is not None:
+        for difference in probe.snapshot.compare_to(before, 'lineno')[:TOP_ALLOCATIONS]:
+            frame = difference.traceback[0]
+            top.append({'location': "{}:{}".format(os.path.basename(frame.filename), frame.lineno),
+                        'bytes': difference.size_diff, 'blocks': difference.count_diff})
+    return {
+        'engine': engine,
+        'moves': len(path) if path is not None else None,
+        'stats': stats.as_dict(),
+        'traced': {'current': current, 'peak': peak},
+        'top_allocations': top,
+        'structures': probe.sizes,
+        'peak_rss': peak_rss_bytes(),
+        'rss_timeline': timeline.samples,
+    }
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Reports the memory use of a rush hour solve")
+    parser.add_argument('board', help="'.board' file")
+    parser.add_argument('--engine', default='packed_astar', help="engine spec name[:key=value,...]")
+    parser.add_argument('--slide', action='store_true', help="count a slide of any length as one move")
+    parser.add_argument('--out', help="JSON report file, defaults to stdout")
+    args = parser.parse_args(argv)
+    file_contents, file_path = solver.csv_reader(args.board)
+    board, start = (SlideBoard if args.slide else PackedBoard).from_csv(file_contents)
+    name, options = parse_engine(args.engine)
+    report = memory_report(board, start, name, **options)
+    report['board'] = file_path
+    if args.out:
+        with open(args.out, 'w') as fo:
+            json.dump(report, fo, indent=2)
+    else:
+        json.dump(report, sys.stdout, indent=2)
+        print()
+
+
+if __name__ == '__main__':
+    main()
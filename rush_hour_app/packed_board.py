@@ -0,0 +1,345 @@
+"""
+File: packed_board.py
+Author: John Pignato
+
+TLDR:
+Packs rush hour board states into a single int and generates moves on them
+
+Explaination:
+Every car can only slide along its own row (horizontal) or column (vertical), so a board state is
+fully described by one offset per car. PackedBoard gives every car a fixed bit field inside an int
+and stores that offset there. Move generation works on an occupancy bitmask built from precomputed
+per-car cell masks, which avoids the matrix copies and json "fingerprints" used by the grid solver.
+The move rules are the same ones calculate_potential_moves applies to a grid.
+
+SlideBoard is the same encoding under the slide metric: sliding a car any number of free cells is
+one move, so every slide distance is generated in one expansion and solutions hold (car, delta)
+moves with |delta| >= 1.
+"""
+import rush_hour_solver as solver
+
+
+class PackedBoard:
+    """
+    Compact state encoding and move generator for one set of cars
+    """
+    #moves of more than one cell count as one move
+    slide = False
+
+    def __init__(self, cars: dict, rows: int, cols: int, goal_car_id: int):
+        self.rows = rows
+        self.cols = cols
+        self.goal_car_id = goal_car_id
+        self.car_ids = list(cars.keys())
+        #car id -> index into the per car lists below
+        self.car_index = {car_id: index for index, car_id in enumerate(self.car_ids)}
+        self.cars = dict(cars)
+        self.horizontal = []
+        self.lengths = []
+        #row of a horizontal car or column of a vertical car
+        self.lanes = []
+        self.shifts = []
+        self.masks = []
+        #per car per offset: bitmask of every cell the car covers
+        self.cell_masks = []
+        #per car per offset: bitmask of the cell behind/in front of the car (0 at the edge)
+        self.back_cells = []
+        self.front_cells = []
+        shift = 0
+        for car_id in self.car_ids:
+            info = cars[car_id]
+            is_horizontal = info.direction == 'H'
+            span = cols if is_horizontal else rows
+            lane = info.y_pos if is_horizontal else info.x_pos
+            step = 1 if is_horizontal else cols
+            first = lambda offset: lane * cols + offset if is_horizontal else offset * cols + lane
+            max_offset = span - info.len
+            bits = max(1, max_offset.bit_length())
+            self.horizontal.append(is_horizontal)
+            self.lengths.append(info.len)
+            self.lanes.append(lane)
+            self.shifts.append(shift)
+            self.masks.append((1 << bits) - 1)
+            self.cell_masks.append([sum(1 << (first(offset) + i * step) for i in range(info.len))
+                                    for offset in range(max_offset + 1)])
+            self.back_cells.append([(1 << (first(offset) - step)) if offset > 0 else 0
+                                    for offset in range(max_offset + 1)])
+            self.front_cells.append([(1 << (first(offset) + info.len * step)) if offset < max_offset else 0
+                                     for offset in range(max_offset + 1)])
+            shift += bits
+        self.state_bits = shift
+        self.goal_index = self.car_ids.index(goal_car_id) if goal_car_id in cars else None
+        #goal car has to touch the right edge of its row (GOAL_POS on a standard 6x6 board)
+        self.goal_offset = cols - cars[goal_car_id].len if self.goal_index is not None else None
+        #per goal car offset: bitmask of the goal row cells between the goal car and the exit
+        self.exit_masks = []
+        if self.goal_index is not None:
+            goal_row = self.lanes[self.goal_index] * cols
+            goal_len = self.lengths[self.goal_index]
+            self.exit_masks = [sum(1 << (goal_row + col) for col in range(offset + goal_len, cols))
+                               for offset in range(self.goal_offset + 1)]
+
+    @classmethod
+    def from_csv(cls, csv_contents: list)->tuple:
+        """
+        Builds a packed board from the contents of a '.board' file using the solver's parser
+
+        Args:
+            csv_contents (list): lines of a '.board' file
+
+        Returns:
+            tuple: PackedBoard, packed initial state
+        """
+        grid = solver.init_represent(csv_contents)
+        board = cls(solver.cars, len(grid), len(grid[0]), solver.GOAL_CAR_ID)
+        return board, board.encode(grid)
+
+    def placements(self, fixed: dict = None):
+        """
+        Enumerates every legal state (no two cars overlapping) of this set of cars
+
+        Args:
+            fixed (dict, optional): car id -> offset for cars that must stay put. Defaults to None.
+
+        Yields:
+            int: packed state
+        """
+        fixed = fixed or {}
+        choices = [[fixed[car_id]] if car_id in fixed else range(len(self.cell_masks[index]))
+                   for index, car_id in enumerate(self.car_ids)]
+
+        def place(index: int, state: int, occupied: int):
+            if index == len(self.car_ids):
+                yield state
+                return
+            for offset in choices[index]:
+                cells = self.cell_masks[index][offset]
+                if not occupied & cells:
+                    yield from place(index + 1, state | (offset << self.shifts[index]), occupied | cells)
+
+        yield from place(0, 0, 0)
+
+    def goal_states(self):
+        """
+        Enumerates every legal state with the goal car at the exit
+
+        Yields:
+            int: packed goal state
+        """
+        if self.goal_index is not None:
+            yield from self.placements({self.goal_car_id: self.goal_offset})
+
+    def offsets(self, state: int)->list:
+        """
+        Unpacks the offset of every car
+
+        Args:
+            state (int): packed state
+
+        Returns:
+            list: offset of each car in car_ids order
+        """
+        return [(state >> shift) & mask for shift, mask in zip(self.shifts, self.masks)]
+
+    def pack(self, offsets: list)->int:
+        """
+        Packs car offsets into a state
+
+        Args:
+            offsets (list): offset of each car in car_ids order
+
+        Returns:
+            int: packed state
+        """
+        state = 0
+        for offset, shift in zip(offsets, self.shifts):
+            state |= offset << shift
+        return state
+
+    def occupancy(self, state: int)->int:
+        """
+        Bitmask of every occupied cell (bit index = row * cols + col)
+
+        Args:
+            state (int): packed state
+
+        Returns:
+            int: occupancy bitmask
+        """
+        occupied = 0
+        for index, shift in enumerate(self.shifts):
+            occupied |= self.cell_masks[index][(state >> shift) & self.masks[index]]
+        return occupied
+
+    def encode(self, grid: list)->int:
+        """
+        Packs a board state matrix
+
+        Args:
+            grid (list): a board state matrix
+
+        Returns:
+            int: packed state
+        """
+        starts = {}
+        for row_index, row in enumerate(grid):
+            for col_index, cell in enumerate(row):
+                if cell != -1 and cell not in starts:
+                    starts[cell] = (row_index, col_index)
+        return self.pack([starts[car_id][1] if horizontal else starts[car_id][0]
+                          for car_id, horizontal in zip(self.car_ids, self.horizontal)])
+
+    def decode(self, state: int)->list:
+        """
+        Unpacks a state into a board state matrix
+
+        Args:
+            state (int): packed state
+
+        Returns:
+            list: a board state matrix
+        """
+        grid = [[-1 for i in range(self.cols)] for i in range(self.rows)]
+        for index, offset in enumerate(self.offsets(state)):
+            for i in range(self.lengths[index]):
+                if self.horizontal[index]:
+                    grid[self.lanes[index]][offset + i] = self.car_ids[index]
+                else:
+                    grid[offset + i][self.lanes[index]] = self.car_ids[index]
+        return grid
+
+    def is_goal(self, state: int)->bool:
+        """
+        Checks is state is the goal state
+
+        Args:
+            state (int): packed state
+
+        Returns:
+            bool: if state is goal state true
+        """
+        index = self.goal_index
+        return index is not None and (state >> self.shifts[index]) & self.masks[index] == self.goal_offset
+
+    def heuristic(self, state: int)->int:
+        """
+        Admissible and consistent estimate of the moves left: cells the goal car still has to
+        travel plus the number of cars blocking its way (each has to move at least once)
+
+        Args:
+            state (int): packed state
+
+        Returns:
+            int: lower bound on moves to the goal
+        """
+        index = self.goal_index
+        if index is None:
+            return 0
+        goal_offset = (state >> self.shifts[index]) & self.masks[index]
+        exit_mask = self.exit_masks[goal_offset]
+        blockers = 0
+        for car_index, shift in enumerate(self.shifts):
+            if self.cell_masks[car_index][(state >> shift) & self.masks[car_index]] & exit_mask:
+                blockers += 1
+        return self.goal_offset - goal_offset + blockers
+
+    def expand(self, state: int)->list:
+        """
+        Finds every state one move away
+
+        Args:
+            state (int): packed state
+
+        Returns:
+            list: (child state, (car id, delta)) pairs
+        """
+        occupied = self.occupancy(state)
+        children = []
+        for index, shift in enumerate(self.shifts):
+            offset = (state >> shift) & self.masks[index]
+            back = self.back_cells[index][offset]
+            if back and not occupied & back:
+                children.append((state - (1 << shift), (self.car_ids[index], -1)))
+            front = self.front_cells[index][offset]
+            if front and not occupied & front:
+                children.append((state + (1 << shift), (self.car_ids[index], 1)))
+        return children
+
+    def neighbors(self, state: int)->list:
+        """
+        Same as expand without move labels
+
+        Args:
+            state (int): packed state
+
+        Returns:
+            list: child states
+        """
+        occupied = self.occupancy(state)
+        children = []
+        for index, shift in enumerate(self.shifts):
+            offset = (state >> shift) & self.masks[index]
+            back = self.back_cells[index][offset]
+            if back and not occupied & back:
+                children.append(state - (1 << shift))
+            front = self.front_cells[index][offset]
+            if front and not occupied & front:
+                children.append(state + (1 << shift))
+        return children
+
+
+class SlideBoard(PackedBoard):
+    """
+    PackedBoard under the slide metric
+    """
+    slide = True
+
+    def heuristic(self, state: int)->int:
+        """
+        Admissible and consistent estimate of the slides left: one for the goal car unless it is at
+        the exit plus one for every car blocking its way
+
+        Args:
+            state (int): packed state
+
+        Returns:
+            int: lower bound on slides to the goal
+        """
+        index = self.goal_index
+        if index is None:
+            return 0
+        distance = self.goal_offset - ((state >> self.shifts[index]) & self.masks[index])
+        return super().heuristic(state) - distance + (1 if distance else 0)
+
+    def expand(self, state: int)->list:
+        """
+        Finds every state one slide away
+
+        Args:
+            state (int): packed state
+
+        Returns:
+            list: (child state, (car id, delta)) pairs
+        """
+        occupied = self.occupancy(state)
+        children = []
+        for index, shift in enumerate(self.shifts):
+            offset = (state >> shift) & self.masks[index]
+            for direction, cells in ((-1, self.back_cells[index]), (1, self.front_cells[index])):
+                current = offset
+                while cells[current] and not occupied & cells[current]:
+                    current += direction
+                    children.append((state + ((current - offset) << shift), (self.car_ids[index], current - offset)))
+        return children
+
+    def neighbors(self, state: int)->list:
+        """
+        Same as expand without move labels
+
+        Args:
+            state (int): packed state
+
+        Returns:
+            list: child states
+        """
+        return [child for child, _ in self.expand(state)]
@@ -0,0 +1,234 @@
+"""
+File: parallel_astar.py
+Author: John Pignato
+
+TLDR:
+Hash distributed A* (HDA*) for solving one hard board on several cores
+
+Explaination:
+Every packed state has exactly one owner worker picked from a hash of the state. A worker owns the
+open list, g-values and parent pointers of its states only. The search runs in rounds:
+    1. the coordinator hands each worker the batch of children other workers sent it
+    2. each worker expands up to batch_size of its lowest f-value states and sorts the
+       children into one outgoing batch per owner
+    3. the coordinator collects the batches, the smallest f-value left in every open list and any
+       goal state a worker popped
+The search stops once the cheapest goal found costs no more than the smallest f-value left
+anywhere (open lists and batches still in flight). The heuristic is admissible and states are
+reopened when a cheaper path arrives, so the answer stays optimal. The path is rebuilt by asking
+the owner of each state for its parent pointer.
+"""
+import os
+from multiprocessing import Pipe, Process
+from helpers.heap import Heap
+from packed_board import PackedBoard
+
+#Fibonacci hashing constant, spreads consecutive packed states over the workers
+HASH_MULTIPLIER = 11400714819323198485
+HASH_MASK = (1 << 64) - 1
+
+
+def owner(state: int, workers: int)->int:
+    """
+    Picks the worker that owns a state
+
+    Args:
+        state (int): packed state
+        workers (int): number of workers
+
+    Returns:
+        int: index of owning worker
+    """
+    return (((state * HASH_MULTIPLIER) & HASH_MASK) >> 32) % workers
+
+
+class _Worker:
+    """
+    One slice of the search: open list, g-values and parent pointers of the states it owns
+    """
+
+    def __init__(self, board: PackedBoard, index: int, workers: int):
+        self.board = board
+        self.index = index
+        self.workers = workers
+        self.g_values = {}
+        self.parents = {}
+        self.open = Heap(is_max=False)
+        self.expanded = 0
+
+    def receive(self, batch: list):
+        """
+        Adds states sent by other workers
+
+        Args:
+            batch (list): (f, g, state, parent, move) entries
+        """
+        for f_value, g_value, state, parent, move in batch:
+            if g_value < self.g_values.get(state, g_value + 1):
+                self.g_values[state] = g_value
+                self.parents[state] = (parent, move)
+                self.open.add((f_value, -g_value, state))
+
+    def expand(self, limit: int, incumbent: int)->tuple:
+        """
+        Expands up to limit of the lowest f-value states
+
+        Args:
+            limit (int): states to expand
+            incumbent (int): cost of the cheapest goal found so far (None if none)
+
+        Returns:
+            tuple: outgoing batches per worker, smallest f-value left (None if empty), cheapest goal found as (g, state)
+        """
+        outgoing = [[] for i in range(self.workers)]
+        goal = None
+        expanded = 0
+        while expanded < limit and len(self.open) > 0:
+            f_value, neg_g, state = self.open.pop()
+            if -neg_g > self.g_values[state]:
+                continue #stale entry
+            if incumbent is not None and f_value >= incumbent:
+                self.open.add((f_value, neg_g, state))
+                break
+            if self.board.is_goal(state):
+                if goal is None or -neg_g < goal[0]:
+                    goal = (-neg_g, state)
+                incumbent = -neg_g if incumbent is None else min(incumbent, -neg_g)
+                continue
+            expanded += 1
+            g_value = -neg_g + 1
+            for child, move in self.board.expand(state):
+                entry = (g_value + self.board.heuristic(child), g_value, child, state, move)
+                outgoing[owner(child, self.workers)].append(entry)
+        self.expanded += expanded
+        #children owned by this worker skip the round trip
+        self.receive(outgoing[self.index])
+        outgoing[self.index] = []
+        min_f = self.open.peek()[0] if len(self.open) > 0 else None
+        return outgoing, min_f, goal
+
+    def parent(self, state: int)->tuple:
+        return self.parents[state]
+
+
+def _worker_main(conn, board: PackedBoard, index: int, workers: int):
+    worker = _Worker(board, index, workers)
+    while True:
+        command, *args = conn.recv()
+        if command == 'round':
+            batch, limit, incumbent = args
+            worker.receive(batch)
+            conn.send(worker.expand(limit, incumbent))
+        elif command == 'parent':
+            conn.send(worker.parent(args[0]))
+        else:
+            break
+    conn.close()
+
+
+class _LocalWorker:
+    """
+    Runs a _Worker in the coordinator's process behind the same call interface as a pipe
+    """
+
+    def __init__(self, board: PackedBoard):
+        self.worker = _Worker(board, 0, 1)
+        self.reply = None
+
+    def send(self, message: tuple):
+        command, *args = message
+        if command == 'round':
+            batch, limit, incumbent = args
+            self.worker.receive(batch)
+            self.reply = self.worker.expand(limit, incumbent)
+        elif command == 'parent':
+            self.reply = self.worker.parent(args[0])
+
+    def recv(self):
+        return self.reply
+
+
+def parallel_search(board: PackedBoard, start: int, processes: int = None, batch_size: int = 256)->list:
+    """
+    Finds an optimal solution with hash distributed A*
+
+    Args:
+        board (PackedBoard): board being searched
+        start (int): packed initial state
+        processes (int, optional): worker processes. Defaults to None (one per core).
+        batch_size (int, optional): states each worker expands per round. Defaults to 256.
+
+    Returns:
+        list: tuple moves to traverse shortest path to goal state, None if there is none
+    """
+    workers = processes or os.cpu_count() or 1
+    connections = []
+    procs = []
+    if workers == 1:
+        connections.append(_LocalWorker(board))
+    else:
+        for index in range(workers):
+            parent_conn, child_conn = Pipe()
+            proc = Process(target=_worker_main, args=(child_conn, board, index, workers), daemon=True)
+            proc.start()
+            child_conn.close()
+            connections.append(parent_conn)
+            procs.append(proc)
+
+    try:
+        inboxes = [[] for i in range(workers)]
+        inboxes[owner(start, workers)].append((board.heuristic(start), 0, start, None, None))
+        incumbent = None
+        goal_state = None
+        while True:
+            for index, conn in enumerate(connections):
+                conn.send(('round', inboxes[index], batch_size, incumbent))
+            inboxes = [[] for i in range(workers)]
+            lower_bound = None
+            for conn in connections:
+                outgoing, min_f, goal = conn.recv()
+                if goal is not None and (incumbent is None or goal[0] < incumbent):
+                    incumbent, goal_state = goal
+                for index, batch in enumerate(outgoing):
+                    inboxes[index].extend(batch)
+                    for entry in batch:
+                        lower_bound = entry[0] if lower_bound is None else min(lower_bound, entry[0])
+                if min_f is not None:
+                    lower_bound = min_f if lower_bound is None else min(lower_bound, min_f)
+            if lower_bound is None or (incumbent is not None and incumbent <= lower_bound):
+                break
+
+        if goal_state is None:
+            return None
+        path = []
+        state = goal_state
+        while state != start:
+            conn = connections[owner(state, workers)]
+            conn.send(('parent', state))
+            state, move = conn.recv()
+            path.append(move)
+        path.reverse()
+        return path
+    finally:
+        for conn in connections:
+            if procs:
+                conn.send(('stop',))
+                conn.close()
+        for proc in procs:
+            proc.join()
+
+
+def parallel_a_star(csv_contents: list, processes: int = None, batch_size: int = 256)->list:
+    """
+    Solves a board with hash distributed A*
+
+    Args:
+        csv_contents (list): lines of a '.board' file
+        processes (int, optional): worker processes. Defaults to None (one per core).
+        batch_size (int, optional): states each worker expands per round. Defaults to 256.
+
+    Returns:
+        list: tuple moves to traverse shortest path to goal state, None if there is none
+    """
+    board, start = PackedBoard.from_csv(csv_contents)
+    return parallel_search(board, start, processes, batch_size)
@@ -0,0 +1,154 @@
+"""
+File: portfolio.py
+Author: John Pignato
+
+TLDR:
+Races several search engines on the same board and keeps the first good answer
+
+Explaination:
+No single engine is fastest on every board: greedy search is quick but gives long solutions,
+bidirectional BFS wins on boards with a small state space and IDA* wins when memory is tight.
+The portfolio starts every configured engine in its own process, waits for the first answer it
+can accept and terminates the rest.
+
+Engines are configured as "name" or "name:key=value,key=value" (for example "packed_astar:weight=2").
+With accept='optimal' only an answer from an optimal engine configuration ends the race. Answers
+from the others are kept and returned if every optimal engine fails or the timeout is hit first.
+With accept='any' the first answer wins. The result records which engine won, when, and what
+every engine that finished before it returned. An engine process that dies without answering (killed
+by a signal or for running out of memory) counts as finished with an error.
+
+Usage:
+    python3 rush_hour_app/portfolio.py game_data/test.board --engine greedy --engine bidirectional --engine ida
+"""
+import sys
+import json
+import time
+import queue
+import argparse
+import multiprocessing
+from collections import namedtuple
+from packed_board import PackedBoard
+from engines import ENGINES, is_optimal, parse_engine
+import rush_hour_solver as solver
+
+DEFAULT_PORTFOLIO = ('greedy', 'packed_astar', 'bidirectional', 'ida')
+#seconds between checks for engines that died without answering
+POLL_INTERVAL = 0.1
+
+#one finished engine: spec it ran with, seconds since the race started, moves (None if unsolvable), error text
+EngineRun = namedtuple('EngineRun', ['engine', 'seconds', 'moves', 'error'])
+PortfolioResult = namedtuple('PortfolioResult', ['path', 'winner', 'seconds', 'optimal', 'finished'])
+
+
+def _run_engine(index: int, name: str, options: dict, board: PackedBoard, start: int, results):
+    try:
+        path = ENGINES[name].solve(board, start, **options)
+        results.put((index, path, None))
+    except Exception as error:
+        results.put((index, None, repr(error)))
+
+
+def portfolio_search(board: PackedBoard, start: int, engines=DEFAULT_PORTFOLIO, accept: str = 'optimal',
+                     timeout: float = None)->PortfolioResult:
+    """
+    Runs every engine in its own process and returns the first acceptable answer
+
+    Args:
+        board (PackedBoard): board being solved
+        start (int): packed initial state
+        engines (iterable, optional): engine specs. Defaults to DEFAULT_PORTFOLIO.
+        accept (str, optional): 'optimal' or 'any'. Defaults to 'optimal'.
+        timeout (float, optional): seconds to wait for an optimal answer. Defaults to None (no limit).
+
+    Returns:
+        PortfolioResult: path (None if unsolvable or nothing finished), winning spec, seconds until it
+        answered, whether the answer is optimal and the EngineRun of every engine that finished
+    """
+    if accept not in ('optimal', 'any'):
+        raise ValueError("accept must be 'optimal' or 'any'")
+    specs = list(engines)
+    configs = [parse_engine(spec) for spec in specs]
+    results = multiprocessing.Queue()
+    workers = [multiprocessing.Process(target=_run_engine, args=(index, name, options, board, start, results),
+                                       daemon=True)
+               for index, (name, options) in enumerate(configs)]
+    started = time.perf_counter()
+    finished = []
+    done = set()
+    fallback = None
+    try:
+        for worker in workers:
+            worker.start()
+        while len(finished) < len(workers):
+            remaining = None if timeout is None else timeout - (time.perf_counter() - started)
+            if remaining is not None and remaining <= 0:
+                break
+            try:
+                index, path, error = results.get(timeout=POLL_INTERVAL if remaining is None else min(POLL_INTERVAL, remaining))
+            except queue.Empty:
+                #an engine killed by a signal or the out of memory killer never puts its answer. One that
+                #exits normally has flushed its answer to the queue before exiting, so it is read next
+                for index, worker in enumerate(workers):
+                    if index not in done and worker.exitcode not in (None, 0):
+                        done.add(index)
+                        finished.append(EngineRun(specs[index], time.perf_counter() - started, None,
+                                                  "exited with code {}".format(worker.exitcode)))
+                continue
+            done.add(index)
+            seconds = time.perf_counter() - started
+            finished.append(EngineRun(specs[index], seconds, None if path is None else len(path), error))
+            if error is not None:
+                continue
+            optimal = is_optimal(*configs[index])
+            #every engine is complete, so None from any of them means no solution exists
+            if optimal or accept == 'any' or path is None:
+                return PortfolioResult(path, specs[index], seconds, optimal or path is None, finished)
+            if fallback is None:
+                fallback = PortfolioResult(path, specs[index], seconds, False, None)
+        if fallback is not None:
+            return fallback._replace(finished=finished)
+        return PortfolioResult(None, None, None, False, finished)
+    finally:
+        for worker in workers:
+            if worker.is_alive():
+                worker.terminate()
+            worker.join()
+        results.close()
+
+
+def portfolio_solve(csv_contents: list, engines=DEFAULT_PORTFOLIO, accept: str = 'optimal',
+                    timeout: float = None)->PortfolioResult:
+    """
+    Solves a board by racing several engines
+
+    Args:
+        csv_contents (list): lines of a '.board' file
+        engines (iterable, optional): engine specs. Defaults to DEFAULT_PORTFOLIO.
+        accept (str, optional): 'optimal' or 'any'. Defaults to 'optimal'.
+        timeout (float, optional): seconds to wait for an optimal answer. Defaults to None (no limit).
+
+    Returns:
+        PortfolioResult: winning path and race statistics
+    """
+    board, start = PackedBoard.from_csv(csv_contents)
+    return portfolio_search(board, start, engines, accept, timeout)
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Race several rush hour engines on one board")
+    parser.add_argument('board', help="'.board' file to solve")
+    parser.add_argument('--engine', action='append', dest='engines',
+                        help="engine spec, name[:key=value,...]. Repeat to add engines")
+    parser.add_argument('--accept', choices=('optimal', 'any'), default='optimal')
+    parser.add_argument('--timeout', type=float, default=None, help="seconds to wait for an optimal answer")
+    args = parser.parse_args(argv)
+    file_contents, _ = solver.csv_reader(args.board)
+    result = portfolio_solve(file_contents, args.engines or DEFAULT_PORTFOLIO, args.accept, args.timeout)
+    json.dump({'path': result.path, 'winner': result.winner, 'seconds': result.seconds, 'optimal': result.optimal,
+               'finished': [run._asdict() for run in result.finished]}, sys.stdout)
+    print()
+
+
+if __name__ == '__main__':
+    main()
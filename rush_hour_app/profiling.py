@@ -0,0 +1,180 @@
+"""
+File: profiling.py
+Author: John Pignato
+
+TLDR:
+Profiles a solve: cProfile stats, sampled call stacks and timings of the search's hot functions
+
+Explaination:
+profiled(prefix) runs its with block under three profilers and writes:
+    <prefix>.pstats     cProfile stats, open with pstats or snakeviz
+    <prefix>.collapsed  sampled call stacks, one "outer;...;inner count" line per stack, the input
+                        flamegraph.pl and speedscope take
+    <prefix>.hooks.json calls and inclusive seconds of every timing hook
+
+The sampler is a SIGPROF interval timer whose handler records the interrupted stack, so it only runs
+on Unix and only sees the main process (level_bfs and portfolio workers are not sampled).
+
+TimingHooks swaps the hot functions for timing wrappers while it is active and puts the originals back
+when it exits, so the search pays nothing for the hooks when profiling is off:
+    expand_node      rush_hour_solver.expand_node
+    move_generation  rush_hour_solver.calculate_potential_moves, PackedBoard.expand / SlideBoard.expand
+    heuristic        rush_hour_solver.calculate_node_hueristic, PackedBoard.heuristic / SlideBoard.heuristic
+    queue_push       Heap.add
+    queue_pop        Heap.pop
+
+Usage:
+    python3 rush_hour_app/rush_hour_solver.py game_data/board39.board --profile board39
+"""
+import sys
+import json
+import time
+import signal
+import cProfile
+from contextlib import contextmanager
+from helpers.heap import Heap
+from packed_board import PackedBoard, SlideBoard
+import rush_hour_solver as solver
+
+#seconds of cpu time between stack samples
+SAMPLE_INTERVAL = 0.001
+
+
+def hook_targets(solver_module=solver)->list:
+    """
+    (owner, attribute, hook name) of every hooked function
+
+    Args:
+        solver_module (module, optional): the solver module whose functions are hooked, __main__ when
+            rush_hour_solver.py runs as a script. Defaults to rush_hour_solver.
+
+    Returns:
+        list: hook targets
+    """
+    return [
+        (solver_module, 'expand_node', 'expand_node'),
+        (solver_module, 'calculate_potential_moves', 'move_generation'),
+        (PackedBoard, 'expand', 'move_generation'),
+        (SlideBoard, 'expand', 'move_generation'),
+        (solver_module, 'calculate_node_hueristic', 'heuristic'),
+        (PackedBoard, 'heuristic', 'heuristic'),
+        (SlideBoard, 'heuristic', 'heuristic'),
+        (Heap, 'add', 'queue_push'),
+        (Heap, 'pop', 'queue_pop'),
+    ]
+
+
+class TimingHooks:
+    """
+    Counts calls and inclusive time of the search's hot functions while active
+    """
+
+    def __init__(self, targets: list = None):
+        self.targets = targets if targets is not None else hook_targets()
+        #hook name -> [calls, seconds]
+        self.totals = {}
+        self.__originals = []
+
+    def __wrap(self, function, totals: list):
+        clock = time.perf_counter
+
+        def timed(*args, **kwargs):
+            started = clock()
+            try:
+                return function(*args, **kwargs)
+            finally:
+                totals[0] += 1
+                totals[1] += clock() - started
+        return timed
+
+    def __enter__(self):
+        for owner, attribute, name in self.targets:
+            #only hook what the owner defines itself, a subclass shares its parent's hook otherwise
+            original = vars(owner).get(attribute)
+            if original is None:
+                continue
+            self.__originals.append((owner, attribute, original))
+            setattr(owner, attribute, self.__wrap(original, self.totals.setdefault(name, [0, 0.0])))
+        return self
+
+    def __exit__(self, *exc):
+        for owner, attribute, original in reversed(self.__originals):
+            setattr(owner, attribute, original)
+        self.__originals = []
+
+    def as_dict(self)->dict:
+        return {name: {'calls': calls, 'seconds': round(seconds, 6)} for name, (calls, seconds) in self.totals.items()}
+
+
+#code object of the hook wrappers
+_TIMED_CODE = TimingHooks._TimingHooks__wrap(None, None, None).__code__
+
+
+class StackSampler:
+    """
+    Samples the main thread's call stack on a cpu time interval timer
+    """
+
+    def __init__(self, interval: float = SAMPLE_INTERVAL):
+        self.interval = interval
+        #collapsed stack -> samples
+        self.stacks = {}
+        self.supported = hasattr(signal, 'setitimer') and hasattr(signal, 'SIGPROF')
+        self.__previous = None
+
+    def __sample(self, signum, frame):
+        names = []
+        while frame is not None:
+            code = frame.f_code
+            #timing hook wrappers would show up between every hooked call and its caller
+            if code is not _TIMED_CODE:
+                names.append("{}:{}".format(code.co_filename.rsplit('/', 1)[-1], code.co_name))
+            frame = frame.f_back
+        stack = ';'.join(reversed(names))
+        self.stacks[stack] = self.stacks.get(stack, 0) + 1
+
+    def start(self):
+        if self.supported:
+            self.__previous = signal.signal(signal.SIGPROF, self.__sample)
+            signal.setitimer(signal.ITIMER_PROF, self.interval, self.interval)
+
+    def stop(self):
+        if self.supported:
+            signal.setitimer(signal.ITIMER_PROF, 0, 0)
+            signal.signal(signal.SIGPROF, self.__previous or signal.SIG_DFL)
+
+    def write(self, file_name: str):
+        with open(file_name, 'w') as fo:
+            for stack, count in sorted(self.stacks.items()):
+                fo.write("{} {}\n".format(stack, count))
+
+
+@contextmanager
+def profiled(prefix: str, interval: float = SAMPLE_INTERVAL, solver_module=solver):
+    """
+    Profiles the with block, writing <prefix>.pstats, <prefix>.collapsed and <prefix>.hooks.json
+
+    Args:
+        prefix (str): path prefix of the output files
+        interval (float, optional): seconds of cpu time between stack samples. Defaults to SAMPLE_INTERVAL.
+        solver_module (module, optional): solver module to hook (see hook_targets). Defaults to rush_hour_solver.
+
+    Yields:
+        TimingHooks: the active hooks, totals are filled in as the block runs
+    """
+    profiler = cProfile.Profile()
+    sampler = StackSampler(interval)
+    with TimingHooks(hook_targets(solver_module)) as hooks:
+        sampler.start()
+        profiler.enable()
+        try:
+            yield hooks
+        finally:
+            profiler.disable()
+            sampler.stop()
+    profiler.dump_stats(prefix + '.pstats')
+    sampler.write(prefix + '.collapsed')
+    with open(prefix + '.hooks.json', 'w') as fo:
+        json.dump(hooks.as_dict(), fo, indent=2)
+    if not sampler.supported:
+        print("Stack sampling needs SIGPROF, {}.collapsed is empty".format(prefix), file=sys.stderr)
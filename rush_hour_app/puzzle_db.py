@@ -0,0 +1,260 @@
+"""
+File: puzzle_db.py
+Author: John Pignato
+
+TLDR:
+Memory mapped database of solved puzzles, looked up by board without loading or parsing the file
+
+Explaination:
+Every puzzle is keyed by its canonical board string (see corpus.py): cells read row by row, the goal
+car labelled 'A' and the other cars labelled B, C, ... in order of first appearance, so the same
+position always gets the same key no matter how its cars were numbered. Car ids inside the database
+are the cars' order of first appearance, the same ids corpus.board_to_csv hands out.
+
+Layout (little endian):
+    header      magic 'RHDB', version, record size, record count, offset of the solutions
+    records     fixed width (key, optimal length, reachable states, solution offset) sorted by key
+    solutions   two bytes per move: car id, signed delta
+
+A lookup is a binary search over the mapped records followed by one slice of the solutions. The
+builder writes solutions to disk as they arrive and only keeps the small fixed records in memory
+until it sorts them on close.
+
+Usage:
+    python3 rush_hour_app/puzzle_db.py build puzzles.txt --out puzzles.rhdb
+    python3 rush_hour_app/puzzle_db.py lookup puzzles.rhdb game_data/board1.board
+"""
+import os
+import sys
+import json
+import mmap
+import struct
+import shutil
+import argparse
+from collections import namedtuple
+from packed_board import PackedBoard
+from level_bfs import level_bfs, rebuild_path
+from corpus import iter_boards, csv_to_board, canonical
+
+MAGIC = b'RHDB'
+VERSION = 1
+HEADER = struct.Struct('<4sHHQQ')
+#canonical board string, optimal length, reachable states, solution offset
+RECORD = struct.Struct('<36sHIQ')
+MOVE = struct.Struct('<Bb')
+#optimal length of a board with no solution
+UNSOLVABLE = 0xFFFF
+
+Puzzle = namedtuple('Puzzle', ['board', 'length', 'reachable_states', 'solution'])
+
+
+class DatabaseBuilder:
+    """
+    Streams solved puzzles into a database file
+    """
+
+    def __init__(self, path: str):
+        self.path = path
+        self.records = []
+        self.__solutions = open(path + '.solutions', 'wb')
+        self.__offset = 0
+
+    def add(self, board: str, path: list, reachable_states: int = 0):
+        """
+        Adds a solved puzzle
+
+        Args:
+            board (str): canonical board string
+            path (list): optimal (car id, delta) moves with database car ids, None if unsolvable
+            reachable_states (int, optional): size of the board's state space. Defaults to 0 (unknown).
+        """
+        if len(board) != 36:
+            raise ValueError("only 6x6 boards fit the database")
+        if path is None:
+            self.records.append(RECORD.pack(board.encode(), UNSOLVABLE, reachable_states, 0))
+            return
+        self.records.append(RECORD.pack(board.encode(), len(path), reachable_states, self.__offset))
+        encoded = b''.join(MOVE.pack(car_id, delta) for car_id, delta in path)
+        self.__solutions.write(encoded)
+        self.__offset += len(encoded)
+
+    def close(self):
+        if self.__solutions.closed:
+            return
+        self.__solutions.close()
+        self.records.sort()
+        unique = [record for index, record in enumerate(self.records)
+                  if index == 0 or record[:36] != self.records[index - 1][:36]]
+        with open(self.path, 'wb') as fo:
+            fo.write(HEADER.pack(MAGIC, VERSION, RECORD.size, len(unique), HEADER.size + len(unique) * RECORD.size))
+            fo.write(b''.join(unique))
+            with open(self.path + '.solutions', 'rb') as fi:
+                shutil.copyfileobj(fi, fo)
+        os.remove(self.path + '.solutions')
+        self.records = []
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
+
+
+class PuzzleDatabase:
+    """
+    Read only memory mapped view of a database file
+    """
+
+    def __init__(self, path: str):
+        self.__file = open(path, 'rb')
+        try:
+            self.__map = mmap.mmap(self.__file.fileno(), 0, access=mmap.ACCESS_READ)
+        except (ValueError, OSError):
+            #an empty file can not be mapped
+            self.__file.close()
+            raise ValueError("{} is not a puzzle database".format(path))
+        try:
+            magic, version, record_size, self.count, self.solutions = HEADER.unpack_from(self.__map, 0)
+        except struct.error:
+            magic = None
+        if magic != MAGIC or version != VERSION or record_size != RECORD.size:
+            self.close()
+            raise ValueError("{} is not a puzzle database".format(path))
+
+    def __len__(self)->int:
+        return self.count
+
+    def __record(self, index: int)->tuple:
+        return RECORD.unpack_from(self.__map, HEADER.size + index * RECORD.size)
+
+    def __puzzle(self, record: tuple)->Puzzle:
+        key, length, reachable, offset = record
+        if length == UNSOLVABLE:
+            return Puzzle(key.decode(), None, reachable, None)
+        start = self.solutions + offset
+        solution = list(MOVE.iter_unpack(self.__map[start:start + length * MOVE.size]))
+        return Puzzle(key.decode(), length, reachable, solution)
+
+    def __iter__(self):
+        for index in range(self.count):
+            yield self.__puzzle(self.__record(index))
+
+    def lookup(self, board: str)->Puzzle:
+        """
+        Finds a puzzle by canonical board string
+
+        Args:
+            board (str): canonical board string
+
+        Returns:
+            Puzzle: stored puzzle with database car ids, None if it is not in the database
+        """
+        key = board.encode()
+        low, high = 0, self.count
+        while low < high:
+            middle = (low + high) // 2
+            offset = HEADER.size + middle * RECORD.size
+            if self.__map[offset:offset + 36] < key:
+                low = middle + 1
+            else:
+                high = middle
+        if low < self.count:
+            record = self.__record(low)
+            if record[0] == key:
+                return self.__puzzle(record)
+        return None
+
+    def lookup_grid(self, grid: list, goal_car_id: int)->Puzzle:
+        """
+        Finds a board state, translating the stored solution to the grid's car ids
+
+        Args:
+            grid (list): a board state matrix
+            goal_car_id (int): id of the goal car
+
+        Returns:
+            Puzzle: stored puzzle, None if it is not in the database
+        """
+        board, order = canonical(grid, goal_car_id)
+        puzzle = self.lookup(board)
+        if puzzle is None or puzzle.solution is None:
+            return puzzle
+        return puzzle._replace(solution=[(order[car_id], delta) for car_id, delta in puzzle.solution])
+
+    def close(self):
+        self.__map.close()
+        self.__file.close()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
+
+
+def solve_for_database(csv_contents: list)->tuple:
+    """
+    Solves a board the way the builder stores it, with one exhaustive BFS
+
+    Args:
+        csv_contents (list): lines of a '.board' file
+
+    Returns:
+        tuple: canonical board string, optimal moves with database car ids (None if unsolvable), reachable states
+    """
+    board, start = PackedBoard.from_csv(csv_contents)
+    key, order = canonical(board.decode(start), board.goal_car_id)
+    layers = level_bfs(board, start, stop_at_goal=False).layers
+    reachable = sum(len(layer) for layer in layers)
+    for depth, layer in enumerate(layers):
+        goals = [state for state in layer if board.is_goal(state)]
+        if goals:
+            path = rebuild_path(board, layers[:depth + 1], goals[0])
+            return key, [(order.index(car_id), delta) for car_id, delta in path], reachable
+    return key, None, reachable
+
+
+def build(paths: list, out: str)->int:
+    """
+    Solves every board of some '.board' or corpus files into a database
+
+    Args:
+        paths (list): '.board' or corpus file paths
+        out (str): database file
+
+    Returns:
+        int: puzzles added
+    """
+    added = 0
+    with DatabaseBuilder(out) as builder:
+        for _, file_contents in iter_boards(paths):
+            builder.add(*solve_for_database(file_contents))
+            added += 1
+    return added
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Builds and queries memory mapped puzzle databases")
+    commands = parser.add_subparsers(dest='command', required=True)
+    build_command = commands.add_parser('build', help="solve boards into a database")
+    build_command.add_argument('boards', nargs='+', help="'.board' or corpus files")
+    build_command.add_argument('--out', required=True)
+    lookup_command = commands.add_parser('lookup', help="look boards up in a database")
+    lookup_command.add_argument('database')
+    lookup_command.add_argument('boards', nargs='+', help="'.board' or corpus files")
+    args = parser.parse_args(argv)
+
+    if args.command == 'build':
+        print("{} puzzles added to {}".format(build(args.boards, args.out), args.out))
+        return
+    with PuzzleDatabase(args.database) as database:
+        for name, file_contents in iter_boards(args.boards):
+            puzzle = database.lookup(csv_to_board(file_contents))
+            json.dump({'board': name, 'found': puzzle is not None,
+                       'length': puzzle.length if puzzle else None,
+                       'reachable_states': puzzle.reachable_states if puzzle else None}, sys.stdout)
+            print()
+
+
+if __name__ == '__main__':
+    main()
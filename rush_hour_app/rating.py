@@ -0,0 +1,232 @@
+"""
+File: rating.py
+Author: John Pignato
+
+TLDR:
+Rates how hard boards are from several search measures
+
+Explaination:
+Every board gets:
+    length              optimal number of moves (None if unsolvable)
+    expanded            states expanded by packed A* with the default heuristic
+    branching_factor    effective branching factor b* of that search, the b with
+                        1 + b + b^2 + ... + b^length = expanded + 1
+    reachable_states    size of the board's state space
+    cars_moved          distinct cars moved by the optimal solution
+
+The length, the state space size and the optimal solution come from one exhaustive BFS. Those
+results are looked up by canonical board string, first in a PuzzleDatabase when one is given, then in
+a cache file and then in memory for the rest of the run. Every BFS result a run computes is appended
+to the cache file as a JSON line, so later runs never solve those boards again either:
+    {"board": canonical board string, "solution": [[car id, delta], ...] or null, "reachable_states": n}
+
+Boards are rated in a process pool and the ratings stream out as JSON lines in board order.
+
+Usage:
+    python3 rush_hour_app/rating.py game_data/*.board puzzles.txt --database puzzles.rhdb --cache ratings.cache
+"""
+import os
+import sys
+import json
+import argparse
+from multiprocessing import Pool
+from multiprocessing.util import Finalize
+from collections import namedtuple
+from packed_board import PackedBoard
+from engines import packed_a_star
+from solver_stats import SolverStats
+from corpus import iter_boards, canonical
+from puzzle_db import PuzzleDatabase, solve_for_database
+
+#boards handed to a worker at once
+CHUNK_SIZE = 8
+
+Rating = namedtuple('Rating', ['name', 'length', 'expanded', 'branching_factor', 'reachable_states', 'cars_moved'])
+
+#database and BFS result cache of the current worker process
+_database = None
+_bfs_cache = {}
+
+
+def _init_worker(database_path: str, known: dict):
+    global _database
+    _database = PuzzleDatabase(database_path) if database_path else None
+    _bfs_cache.clear()
+    _bfs_cache.update(known)
+
+
+def _init_pool_worker(database_path: str, known: dict):
+    _init_worker(database_path, known)
+    #runs as the worker exits
+    Finalize(None, _close_worker, exitpriority=10)
+
+
+def _close_worker():
+    global _database
+    if _database is not None:
+        _database.close()
+        _database = None
+
+
+def load_cache(path: str)->dict:
+    """
+    Reads the BFS results of a cache file, stopping at a line an earlier run was stopped in the middle of
+
+    Args:
+        path (str): cache file, may not exist yet
+
+    Returns:
+        dict: canonical board string -> (optimal moves or None, reachable states)
+    """
+    known = {}
+    if path is None or not os.path.exists(path):
+        return known
+    with open(path) as fi:
+        for line in fi:
+            try:
+                entry = json.loads(line)
+                solution = entry['solution']
+                known[entry['board']] = ([tuple(move) for move in solution] if solution is not None else None,
+                                         entry['reachable_states'])
+            except (ValueError, KeyError, TypeError):
+                break
+    return known
+
+
+def append_cache(fo, key: str, path: list, reachable: int):
+    fo.write(json.dumps({'board': key, 'solution': path, 'reachable_states': reachable}) + '\n')
+    fo.flush()
+
+
+def effective_branching_factor(expanded: int, depth: int)->float:
+    """
+    Solves 1 + b + b^2 + ... + b^depth = expanded + 1 for b by bisection
+
+    Args:
+        expanded (int): states expanded by the search
+        depth (int): depth of the solution found
+
+    Returns:
+        float: effective branching factor, None when depth is 0
+    """
+    if depth == 0:
+        return None
+    total = lambda b: sum(b ** level for level in range(depth + 1))
+    #b^depth alone is at most expanded + 1, which also keeps the powers from overflowing on deep puzzles
+    low, high = 0.0, max(1.0, (expanded + 1) ** (1 / depth))
+    for _ in range(64):
+        middle = (low + high) / 2
+        if total(middle) < expanded + 1:
+            low = middle
+        else:
+            high = middle
+    return round((low + high) / 2, 4)
+
+
+def count_expanded(board: PackedBoard, start: int)->int:
+    """
+    Counts the states packed A* expands to solve a board
+    """
+    stats = SolverStats()
+    packed_a_star(board, start, stats=stats)
+    return stats.expanded
+
+
+def bfs_result(csv_contents: list, key: str)->tuple:
+    """
+    Optimal solution and state space size of a board, from the cache when it is known
+
+    Args:
+        csv_contents (list): lines of a '.board' file
+        key (str): canonical board string
+
+    Returns:
+        tuple: optimal moves (None if unsolvable), reachable states, whether the BFS ran
+    """
+    if key in _bfs_cache:
+        return _bfs_cache[key] + (False,)
+    puzzle = _database.lookup(key) if _database is not None else None
+    if puzzle is not None and puzzle.reachable_states:
+        result, solved = (puzzle.solution, puzzle.reachable_states), False
+    else:
+        _, path, reachable = solve_for_database(csv_contents)
+        result, solved = (path, reachable), True
+    _bfs_cache[key] = result
+    return result + (solved,)
+
+
+def rate_job(job: tuple)->tuple:
+    """
+    Rates one (name, board file lines) job
+
+    Returns:
+        tuple: Rating, (canonical board string, optimal moves, reachable states) when the BFS ran or None
+    """
+    name, csv_contents = job
+    board, start = PackedBoard.from_csv(csv_contents)
+    key, _ = canonical(board.decode(start), board.goal_car_id)
+    path, reachable, solved = bfs_result(csv_contents, key)
+    fresh = (key, path, reachable) if solved else None
+    if path is None:
+        return Rating(name, None, None, None, reachable, None), fresh
+    expanded = count_expanded(board, start)
+    return Rating(name, len(path), expanded, effective_branching_factor(expanded, len(path)), reachable,
+                  len({car_id for car_id, _ in path})), fresh
+
+
+def rate(board_paths: list, database: str = None, processes: int = 1, cache: str = None):
+    """
+    Rates every board of some '.board' or corpus files
+
+    Args:
+        board_paths (list): '.board' or corpus files
+        database (str, optional): PuzzleDatabase holding known BFS results. Defaults to None.
+        processes (int, optional): worker processes. Defaults to 1.
+        cache (str, optional): cache file of BFS results, read first and appended to. Defaults to None.
+
+    Yields:
+        Rating: rating of every board, in board order
+    """
+    known = load_cache(cache)
+    fo = open(cache, 'a') if cache else None
+    try:
+        for rating, fresh in _rate_jobs(board_paths, database, processes, known):
+            #two workers can solve the same new board, it is written once
+            if fresh is not None and fo is not None and fresh[0] not in known:
+                known[fresh[0]] = fresh[1:]
+                append_cache(fo, *fresh)
+            yield rating
+    finally:
+        if fo is not None:
+            fo.close()
+
+
+def _rate_jobs(board_paths: list, database: str, processes: int, known: dict):
+    if processes <= 1:
+        _init_worker(database, known)
+        try:
+            yield from map(rate_job, iter_boards(board_paths))
+        finally:
+            _close_worker()
+        return
+    with Pool(processes, _init_pool_worker, (database, known)) as pool:
+        yield from pool.imap(rate_job, iter_boards(board_paths), CHUNK_SIZE)
+        #let the workers exit on their own so they close their databases
+        pool.close()
+        pool.join()
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Rates the difficulty of rush hour boards")
+    parser.add_argument('boards', nargs='+', help="'.board' or corpus files")
+    parser.add_argument('--database', help="puzzle database with known optimal solutions")
+    parser.add_argument('--cache', help="JSON lines file of BFS results, reused and appended to")
+    parser.add_argument('--processes', type=int, default=os.cpu_count())
+    args = parser.parse_args(argv)
+    for rating in rate(args.boards, args.database, args.processes, args.cache):
+        json.dump(rating._asdict(), sys.stdout)
+        print()
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,149 @@
+"""
+File: resolve.py
+Author: John Pignato
+
+TLDR:
+Re-solves a board after the player slides a car, reusing the previous search
+
+Explaination:
+WarmStartSolver runs one breadth first search from the initial board and keeps its closed set
+with every state's g-value (moves from the root). When the player moves, the search is re-rooted
+at the new state:
+    - States on a cached optimal path know their exact distance to the goal, so if the new state
+      is one of them the rest of the cached path is returned straight away.
+    - Otherwise A* runs from the new state. The old g-values give an admissible heuristic,
+      h(s) = L - g(s) where L is the optimal solution length from the root, because
+      every move can be undone. Reaching a goal state or any state with an exact distance ends the
+      search.
+Every path found is added to the cache so later re-solves get cheaper.
+"""
+from collections import deque
+from helpers.heap import Heap
+from packed_board import PackedBoard
+
+
+class WarmStartSolver:
+    """
+    Keeps the search data of one board between re-solves
+    """
+
+    def __init__(self, csv_contents: list):
+        self.board, self.root = PackedBoard.from_csv(csv_contents)
+        #closed set of the root search: packed state -> moves from the root
+        self.g_values = {}
+        #optimal solution length from the root, None if the board has no solution
+        self.solution_length = None
+        #states on cached optimal paths: packed state -> moves left to the goal
+        self.exact = {}
+        #states on cached optimal paths: packed state -> (move, next state)
+        self.successors = {}
+        self.current = self.root
+        self.path = self.__solve_root()
+
+    def __solve_root(self)->list:
+        parents = {self.root: None}
+        self.g_values[self.root] = 0
+        frontier = deque([self.root])
+        while frontier:
+            state = frontier.popleft()
+            if self.board.is_goal(state):
+                self.solution_length = self.g_values[state]
+                path = []
+                while parents[state] is not None:
+                    parent, move = parents[state]
+                    path.append((move, state))
+                    state = parent
+                path.reverse()
+                self.__cache_path(self.root, path)
+                return [move for move, _ in path]
+            for child, move in self.board.expand(state):
+                if child not in parents:
+                    parents[child] = (state, move)
+                    self.g_values[child] = self.g_values[state] + 1
+                    frontier.append(child)
+        return None
+
+    def __cache_path(self, state: int, path: list):
+        """
+        Records exact distances for every state of an optimal path
+
+        Args:
+            state (int): first state of the path
+            path (list): (move, resulting state) pairs
+        """
+        self.exact[state] = len(path)
+        for index, (move, child) in enumerate(path):
+            self.successors[state] = (move, child)
+            self.exact[child] = len(path) - index - 1
+            state = child
+
+    def __heuristic(self, state: int)->int:
+        try:
+            return self.exact[state]
+        except KeyError:
+            pass
+        #states the root search never reached are at least solution_length moves away from the root
+        return max(0, self.solution_length - self.g_values.get(state, self.solution_length))
+
+    def resolve(self, grid: list)->list:
+        """
+        Finds an optimal solution from a new board state and makes it the current one
+
+        Args:
+            grid (list): board state after the player's move
+
+        Returns:
+            list: tuple moves to traverse shortest path to goal state, None if there is none
+        """
+        state = self.board.encode(grid)
+        self.current = state
+        if self.solution_length is None:
+            #moves never leave the root's reachable set so nothing here can be solved
+            self.path = None
+            return None
+        if state not in self.exact:
+            self.__search(state)
+        self.path = [move for move, _ in self.__cached_steps(state)] if state in self.exact else None
+        return self.path
+
+    def __search(self, start: int):
+        """
+        A* from start that stops at the first goal state or state with an exact distance to the goal.
+        Exact distances and g-value bounds mixed together are admissible but not always consistent,
+        so states are reopened when a shorter way to them turns up.
+        """
+        g_values = {start: 0}
+        parents = {start: None}
+        priority_queue = Heap(is_max=False)
+        priority_queue.add((self.__heuristic(start), 0, start))
+        while len(priority_queue) > 0:
+            f_value, neg_g, state = priority_queue.pop()
+            if -neg_g > g_values[state]:
+                continue
+            if state not in self.exact and self.board.is_goal(state):
+                #a goal state off the cached paths
+                self.exact[state] = 0
+            if state in self.exact:
+                path = []
+                while parents[state] is not None:
+                    parent, move = parents[state]
+                    path.append((move, state))
+                    state = parent
+                path.reverse()
+                end = path[-1][1] if path else start
+                path.extend(self.__cached_steps(end))
+                self.__cache_path(start, path)
+                return
+            for child, move in self.board.expand(state):
+                g_value = g_values[state] + 1
+                if g_value < g_values.get(child, g_value + 1):
+                    g_values[child] = g_value
+                    parents[child] = (state, move)
+                    priority_queue.add((g_value + self.__heuristic(child), -g_value, child))
+
+    def __cached_steps(self, state: int)->list:
+        steps = []
+        while self.exact[state] > 0:
+            move, state = self.successors[state]
+            steps.append((move, state))
+        return steps
@@ -15,7 +15,7 @@ try:
     import os
     import json
     import copy
-    import random
+    import argparse
     from datetime import datetime
     from helpers.graph import Graph
     from helpers.heap import Heap
@@ -56,6 +56,9 @@ def init_represent(csv_contents: str)->list:
         list: matrix representation of board
     """
     global GOAL_CAR_ID, cars
+    #start from a clean car table and goal car so boards can be loaded one after another
+    cars.clear()
+    GOAL_CAR_ID = None
     demensions = csv_contents[0].split(',')
     #create -1 matrix
     grid = [[-1 for i in range(int(demensions[0]))] for i in range(int(demensions[1]))]
@@ -171,13 +174,14 @@ def shift_car_up(car_id: str, pos: tuple, grid: list)->str:
     return stringify_grid(grid)
 
 
-def calculate_potential_moves(car_id: str, grid: list)->list:
+def calculate_potential_moves(car_id: str, grid: list, slide: bool = False)->list:
     """
     Calculates all possible moves for specified car
 
     Args:
         car_id (str): ID of the car
         grid (list): current board state
+        slide (bool, optional): also generate slides of more than one cell, each counting as one move. Defaults to False.
 
     Returns:
         list: all possibles moves as "moves" namedtuples
@@ -185,7 +189,7 @@ def calculate_potential_moves(car_id: str, grid: list)->list:
     moves = []
     car_init_state = cars[car_id]
 
-    move_allowed = lambda y, x: (y >= 0 and y < len(grid)) and (x >= 0 and x < len(grid[y])) and grid[y][x] == -1
+    move_allowed = lambda board, y, x: (y >= 0 and y < len(board)) and (x >= 0 and x < len(board[y])) and board[y][x] == -1
 
     #finds where car starts in matrix
     start_pos = (-1,-1) #x,y
@@ -196,17 +200,25 @@ def calculate_potential_moves(car_id: str, grid: list)->list:
             if col == car_id:
                 start_pos = (row_index, col_index)
                 break
-    
+
+    #direction, shift function, step of the car's upper left cell, cell that has to be free to shift
     if car_init_state.direction == 'H': #horizontal
-        if move_allowed(start_pos[0], start_pos[1]-1): #check left
-            moves.append(move_tuple(shift_car_left(car_id, start_pos, copy.deepcopy(grid)), (car_id, -1)))
-        if move_allowed(start_pos[0], start_pos[1] + car_init_state.len):#check right
-            moves.append(move_tuple(shift_car_right(car_id, start_pos, copy.deepcopy(grid)), (car_id, 1)))
+        shifts = ((-1, shift_car_left, (0, -1), lambda pos: (pos[0], pos[1]-1)), #check left
+                  (1, shift_car_right, (0, 1), lambda pos: (pos[0], pos[1] + car_init_state.len))) #check right
     else: #vertical
-        if move_allowed(start_pos[0]-1, start_pos[1]): #check up 
-            moves.append(move_tuple(shift_car_up(car_id, start_pos, copy.deepcopy(grid)), (car_id, -1)))
-        if move_allowed(start_pos[0] + car_init_state.len, start_pos[1]): #check down
-            moves.append(move_tuple(shift_car_down(car_id, start_pos, copy.deepcopy(grid)), (car_id, 1)))
+        shifts = ((-1, shift_car_up, (-1, 0), lambda pos: (pos[0]-1, pos[1])), #check up
+                  (1, shift_car_down, (1, 0), lambda pos: (pos[0] + car_init_state.len, pos[1]))) #check down
+
+    for direction, shift, step, next_cell in shifts:
+        new_grid, pos, delta = grid, start_pos, 0
+        #keep sliding the same way while the next cell is free
+        while move_allowed(new_grid, *next_cell(pos)):
+            new_grid = copy.deepcopy(new_grid)
+            grid_string = shift(car_id, pos, new_grid)
+            pos, delta = (pos[0] + step[0], pos[1] + step[1]), delta + direction
+            moves.append(move_tuple(grid_string, (car_id, delta)))
+            if not slide:
+                break
 
     return moves
 
@@ -228,47 +240,51 @@ def calculate_node_hueristic(move: tuple)->float:
     car_info = cars[move.move_val[0]]
     #if goal car can move right this is highest priority else set low prioirity
     if car_info.goal_car:
-        if move.move_val[1] == 1:
+        if move.move_val[1] > 0:
             return 1.0
         else:
             return 3.5
     #medium priority to horizontal cars that can move left
     elif car_info.direction == 'H':
-        if move.move_val[1] == -1:
+        if move.move_val[1] < 0:
             return 3.0
         else:
             return 3.5
     else: #vertical (medium priority)
         #priority to move trucks(size 3) down
-        if car_info.len == 3 and move.move_val[1] == 1:
+        if car_info.len == 3 and move.move_val[1] > 0:
             return 2.0
-        elif car_info.len == 2 and move.move_val[1] == -1:
+        elif car_info.len == 2 and move.move_val[1] < 0:
             return 2.0
         else:
             return 3.5
 
 
-def expand_node(grid:list, state_space:Graph)->tuple:
+def expand_node(grid:list, state_space:Graph=None, slide: bool = False)->tuple:
     """
-    "Expands" node by finding all possible board states from current state and updates the state space
+    "Expands" node by finding all possible board states from current state. If a state space is given
+    every new arc is recorded in it as well.
 
     Args:
         grid (list): current board state
-        state_space (Graph): all discovered states thus far
+        state_space (Graph, optional): all discovered states thus far. Defaults to None (no recording).
+        slide (bool, optional): generate multi cell slides as single moves. Defaults to False.
 
     Returns:
-        tuple: new state space, all newly found states from current board state, new/updated hueristics for current state
+        tuple: state space (None if not recording), all newly found states as "moves" namedtuples, hueristics for new states
     """
     hueristic_map = {}
-    new_nodes = []
+    new_moves = []
+    grid_id = stringify_grid(grid) if state_space is not None else None
     for automobile in cars.keys():
-        potential_moves = calculate_potential_moves(automobile, copy.deepcopy(grid))
+        potential_moves = calculate_potential_moves(automobile, grid, slide)
         for move in potential_moves:
-            #arc name is the movement code. If node does not exist function will create it.
-            state_space.add_arc(stringify_grid(grid), move.grid_string, label=move.move_val)#arc label is move to achieve state
+            if state_space is not None:
+                #arc name is the movement code. If node does not exist function will create it.
+                state_space.add_arc(grid_id, move.grid_string, label=move.move_val)#arc label is move to achieve state
             hueristic_map[move.grid_string] = calculate_node_hueristic(move)
-            new_nodes.append(move.grid_string)
-    return state_space, new_nodes, hueristic_map
+            new_moves.append(move)
+    return state_space, new_moves, hueristic_map
 
 
 def reached_goal(grid: list):
@@ -284,21 +300,41 @@ def reached_goal(grid: list):
     return grid[GOAL_POS[0]][GOAL_POS[1]] == GOAL_CAR_ID and grid[GOAL_POS[0]][GOAL_POS[1]+1] == GOAL_CAR_ID
 
 
-def a_star(grid: list)->list:
+def a_star(grid: list, record_state_space=False, checkpoint=None, slide: bool = False, stats=None):
     """
     Expands and traverses through the state space until the shortest path is found using A* algorithm.
 
     Args:
         grid (list): initial state of board
+        record_state_space (bool|GraphWriter, optional): record every generated arc in a Graph. A GraphWriter
+            (or any object with add_node/add_arc) can be passed to stream the arcs instead. Defaults to False.
+        checkpoint (SearchCheckpoint, optional): logs the search so it can be resumed. If the checkpoint holds
+            an earlier run of this search it is resumed from there. Defaults to None.
+        slide (bool, optional): search under the slide metric, sliding a car any number of free cells is
+            one move. Defaults to False.
+        stats (SolverStats, optional): filled in with the search counters (see solver_stats.py). The heap
+            entries carry their move history, so there is no rebuild phase and it stays at 0.0. Defaults to None.
 
     Returns:
-        list: tuple moves to travese shortest path to goal state
+        list: tuple moves to travese shortest path to goal state. If record_state_space is set a
+        tuple of (path, state space) is returned instead.
     """
-    visited = []
+    visited = set()
     heuristic_map = {}
-    state_space = Graph()
+    if record_state_space is True:
+        state_space = Graph()
+    elif record_state_space is False:
+        state_space = None
+    else:
+        state_space = record_state_space
     priority_queue = Heap(is_max=False)
 
+    def result(path):
+        if stats is not None:
+            #every generated move had its heuristic calculated
+            stats.add(expanded, generated, duplicates, peak_open, len(visited), generated)
+        return (path, state_space) if state_space is not None else path
+
     #f(x) = g(x) + h(x)
     #adds length of history to the precalculated heuristic for that state
     f_value = lambda q_element: heuristic_map[q_element.unique_id] + len(q_element.history)
@@ -307,36 +343,50 @@ def a_star(grid: list)->list:
     init_id = stringify_grid(grid)
     heuristic_map[init_id] = 4 #random high init value
     init_q_entry = queue_entry(init_id, [])
-    priority_queue.add((f_value(init_q_entry), init_q_entry))
-    state_space.add_node(init_id)
+    resumed = checkpoint.resume() if checkpoint is not None else None
+    if resumed is not None:
+        visited, entries = resumed
+        visited = set(visited)
+        for f, unique_id, history in entries:
+            priority_queue.add((f, queue_entry(unique_id, history)))
+    else:
+        priority_queue.add((f_value(init_q_entry), init_q_entry))
+        if checkpoint is not None:
+            checkpoint.pushed(None, f_value(init_q_entry))
+    if state_space is not None:
+        state_space.add_node(init_id)
+    expanded = generated = duplicates = peak_open = 0
 
     while len(priority_queue) > 0:
+        peak_open = max(peak_open, len(priority_queue))
         node = priority_queue.pop()
+        #a stale entry of a state closed through a shorter path, its push was counted as a duplicate
         if node[1].unique_id not in visited:
-            visited.append(node[1].unique_id)
+            visited.add(node[1].unique_id)
             #turns str "fingerprint" of state into a matrix
             grid = listify_grid(node[1].unique_id)
+            if checkpoint is not None:
+                checkpoint.closed(grid, node[1].history)
             if reached_goal(grid): #goal state found -> exit with history
-                return node[1].history
-            state_space, new_nodes, new_heuristic_mappings = expand_node(copy.deepcopy(grid), state_space)
-            #combine maps. This will overwrite old values in map with updated ones
-            heuristic_map = {**heuristic_map, **new_heuristic_mappings}
-            #get all arcs associated with current board state
-            nodes_arcs = state_space._get_node_arcs(stringify_grid(grid))
-
-            for new_node in new_nodes:
-                #get movement code from arc name
-                movement_code = ""
-                for arc in nodes_arcs:
-                    if arc.dest == new_node:
-                        movement_code = arc.arc_name
-                #update history
-                new_history = copy.deepcopy(node[1].history) 
-                new_history.append(movement_code)
-                new_q_entry = queue_entry(new_node, new_history)
+                return result(node[1].history)
+            state_space, new_moves, new_heuristic_mappings = expand_node(grid, state_space, slide)
+            expanded += 1
+            generated += len(new_moves)
+            #children already closed or queued, like the packed engines count them
+            duplicates += sum(1 for move in new_moves
+                              if move.grid_string in heuristic_map or move.grid_string in visited)
+            #overwrite old values in map with updated ones
+            heuristic_map.update(new_heuristic_mappings)
+
+            for move in new_moves:
+                #movement code comes straight from the move that produced the state
+                new_history = node[1].history + [move.move_val]
+                new_q_entry = queue_entry(move.grid_string, new_history)
                 priority_queue.add((f_value(new_q_entry), new_q_entry))
+                if checkpoint is not None:
+                    checkpoint.pushed(move.move_val, f_value(new_q_entry))
         
-    return None
+    return result(None)
 
 #FOR DEBUG
 # def pprint(grid: list):
@@ -370,46 +420,142 @@ def csv_reader(file_path="")->tuple:
 
     return file_contents, file_path
 
-def write_sol_to_file(path: list, board_file_path: str)->str:
+def write_sol_to_file(path: list, board_file_path: str, out_dir: str = "game_data", binary: bool = True)->str:
     """
     Writes a paths history to a '.sol' file.
 
     Args:
         path (list): history of shortest path...tuples
+        board_file_path (str): path to the '.board' file that was solved
+        out_dir (str, optional): directory of solution files. Defaults to "game_data".
+        binary (bool, optional): packed binary '.sol' (see solution_io.py) instead of text, like the
+            --sol-format default. Defaults to True.
 
     Returns:
         str: file name
     """
-    board_file_name = board_file_path.split('/')[-1].split('.')[0]
-    #create file name following format solution_<BOARD FILE NAME>_<RANDOM 10 NUMS>.sol
-    file_name = "game_data/solution_{0}_{1}.sol".format(board_file_name, "".join([str(random.randint(0,9)) for i in range(10)])) 
-    with open(file_name, 'w') as fi:
-        for tups in path:
-            #tups -> car_id, move
-            fi.write("{0},{1}\n".format(tups[0], tups[1]))
-    
-    return file_name
-
-
-def driver()->tuple:
+    from solution_io import write_solution
+    #file name follows format solution_<BOARD FILE NAME>.sol so solving a board again replaces its solution
+    return write_solution(path, board_file_path, out_dir, binary)
+
+
+def driver(board_file: str = "", checkpoint_path: str = None, resume: bool = False, engine: str = 'astar',
+           slide: bool = False, database: str = None, sol_format: str = 'binary', stats_format: str = None,
+           allow_suboptimal: bool = False)->tuple:
     """
     Runs the program and provides snazzy & insightful output
 
+    Args:
+        board_file (str, optional): path to '.board' file, prompts if empty. Defaults to "".
+        checkpoint_path (str, optional): file the search is checkpointed to. Defaults to None.
+        resume (bool, optional): resume the search saved in checkpoint_path. Defaults to False.
+        engine (str, optional): engine spec (see engines.py), 'auto' picks one from board features. 'astar' is
+            answered by the level BFS unless the search is checkpointed or the board needs more than 64 bits
+            per state. Defaults to 'astar'.
+        slide (bool, optional): count a slide of any length as one move. Defaults to False.
+        database (str, optional): puzzle database (see puzzle_db.py) checked before searching. Defaults to None.
+        sol_format (str, optional): 'binary' or 'text' solution file. Defaults to 'binary'.
+        stats_format (str, optional): 'json' prints the solver stats (see solver_stats.py) as a JSON line. Defaults to None.
+        allow_suboptimal (bool, optional): let 'auto' pick engines that may not find the shortest solution. Defaults to False.
+
     Returns:
         tuple: board_file, solution_file
     """
-    file_contents, file_path = csv_reader()
-    print('Setting up the board...🏗️ ')
-    init_state = init_represent(file_contents)
-    print('Navigating traffic...🚗 ')
-    start = datetime.now()
-    path = a_star(init_state)
-    end = datetime.now()
-    if path is not None:
-        print('✅ Successfully found a way out in {0} using {1} move(s)'.format(end - start, len(path)))
-        print("Solution written to file: {}".format(write_sol_to_file(path, file_path)))
-    else:
-        print("❌ Board has no solutions. Took {}".format(end-start))
+    from solver_stats import SolverStats
+    stats = SolverStats()
+    try:
+        with stats.timed('parse'):
+            file_contents, file_path = csv_reader(board_file)
+            print('Setting up the board...🏗️ ')
+            init_state = init_represent(file_contents)
+        from packed_board import PackedBoard, SlideBoard
+        from unsolvable import prove_unsolvable
+        with stats.timed('precompute'):
+            board = (SlideBoard if slide else PackedBoard)(cars, len(init_state), len(init_state[0]), GOAL_CAR_ID)
+            #structural checks take microseconds, boards they can not decide are left to the search
+            reason = prove_unsolvable(board, board.encode(init_state))
+        if reason is not None:
+            print("❌ Board has no solutions: {}".format(reason))
+            return
+        if database and not slide:
+            from puzzle_db import PuzzleDatabase
+            with PuzzleDatabase(database) as puzzles:
+                try:
+                    puzzle = puzzles.lookup_grid(init_state, GOAL_CAR_ID)
+                except ValueError:
+                    #boards the canonical form can not label (too many cars) are never in a database
+                    puzzle = None
+            if puzzle is not None and puzzle.solution is None:
+                print("❌ Board has no solutions (found in {})".format(database))
+                return
+            if puzzle is not None:
+                print('✅ Found in {0}, {1} move(s)'.format(database, puzzle.length))
+                print("Solution written to file: {}".format(write_sol_to_file(puzzle.solution, file_path, binary=sol_format == 'binary')))
+                return
+        checkpoint = None
+        if checkpoint_path:
+            from checkpoint import SearchCheckpoint
+            checkpoint = SearchCheckpoint(checkpoint_path, board, init_state, resume)
+        if engine == 'auto':
+            from selection import extract_features, select_engine
+            engine = select_engine(extract_features(cars, len(init_state), len(init_state[0]), GOAL_CAR_ID),
+                                   allow_suboptimal=allow_suboptimal)
+            print('Picked the {} engine'.format(engine))
+        if checkpoint is not None and engine != 'astar':
+            #only the grid a_star knows how to log and resume its search
+            print('⚠️  Checkpoints only work with the astar engine, running astar instead of {}'.format(engine))
+            engine = 'astar'
+        print('Navigating traffic...🚗 ')
+        start = datetime.now()
+        from engines import run_engine, parse_engine, is_optimal
+        #the level BFS finds the same optimal paths as a_star far faster, and on a board with no solution it
+        #visits every reachable state once instead of a_star's whole queue of them
+        exhaustive = engine == 'astar' and checkpoint is None and board.state_bits <= 64
+        try:
+            if exhaustive:
+                path = run_engine('bfs', board, board.encode(init_state), stats)
+            elif engine == 'astar':
+                with stats.timed('search'):
+                    path = a_star(init_state, checkpoint=checkpoint, slide=slide, stats=stats)
+            else:
+                name, options = parse_engine(engine)
+                path = run_engine(name, board, board.encode(init_state), stats, **options)
+        finally:
+            if checkpoint is not None:
+                checkpoint.close()
+        end = datetime.now()
+        if path is not None:
+            print('✅ Successfully found a way out in {0} using {1} move(s)'.format(end - start, len(path)))
+            if engine != 'astar' and not is_optimal(*parse_engine(engine)):
+                print('⚠️  {} does not always find the shortest solution, there may be a shorter one'.format(engine))
+            print("Solution written to file: {}".format(write_sol_to_file(path, file_path, binary=sol_format == 'binary')))
+        elif exhaustive:
+            #every state the BFS stored is reachable
+            print("❌ Board has no solutions: no goal state is reachable ({0} reachable states). Took {1}".format(stats.peak_closed, end - start))
+        else:
+            print("❌ Board has no solutions. Took {}".format(end-start))
+    finally:
+        if stats_format == 'json':
+            print(json.dumps(stats.as_dict()))
 
 if __name__ == '__main__':
-    driver()
+    parser = argparse.ArgumentParser(description="Finds the shortest path to victory for a rush hour board")
+    parser.add_argument('board', nargs='?', default="", help="'.board' file to solve, prompts if left out")
+    parser.add_argument('--checkpoint', help="checkpoint the search to this file")
+    parser.add_argument('--resume', action='store_true', help="resume the search saved in --checkpoint")
+    parser.add_argument('--engine', default='astar', help="engine spec name[:key=value,...] or 'auto'")
+    parser.add_argument('--slide', action='store_true', help="count a slide of any length as one move")
+    parser.add_argument('--database', help="puzzle database to look the board up in first")
+    parser.add_argument('--sol-format', choices=('binary', 'text'), default='binary', help="solution file format")
+    parser.add_argument('--stats', choices=('json',), help="print search counters and phase times")
+    parser.add_argument('--allow-suboptimal', action='store_true', help="let --engine auto trade the shortest solution for speed")
+    parser.add_argument('--profile', metavar='PREFIX', help="write PREFIX.pstats, PREFIX.collapsed and PREFIX.hooks.json")
+    args = parser.parse_args()
+    if args.profile:
+        import sys
+        from profiling import profiled
+        #this file runs as __main__, a plain import would hook a second copy of the solver
+        with profiled(args.profile, solver_module=sys.modules[__name__]):
+            driver(args.board, args.checkpoint, args.resume, args.engine, args.slide, args.database, args.sol_format, args.stats, args.allow_suboptimal)
+    else:
+        driver(args.board, args.checkpoint, args.resume, args.engine, args.slide, args.database, args.sol_format, args.stats, args.allow_suboptimal)
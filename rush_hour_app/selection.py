@@ -0,0 +1,233 @@
+"""
+File: selection.py
+Author: John Pignato
+
+TLDR:
+Picks a search engine (and heuristic weight) for a board from a few cheap features
+
+Explaination:
+Features come straight from the parsed cars table, so they cost next to nothing:
+    cars           number of cars and trucks
+    free_cells     cells not covered by any car
+    free_percent   free cells as a percentage of the board, for rules that hold on every board size
+    goal_blockers  cars covering a goal row cell between the goal car and the exit
+    trucks         cars of length 3 or more
+A selection table is a list of rules checked in order. A rule is {"when": {feature: [min, max]},
+"engine": spec} and the first rule whose ranges all hold picks the engine spec (see engines.py
+for the spec format, "packed_astar:weight=1.5" sets a weight). A rule with no "when" always matches.
+Rules picking an engine that may return a longer than optimal solution (greedy, a weight above 1)
+are skipped unless suboptimal answers are allowed.
+
+Tables are plain JSON so they can be rebuilt from benchmark results instead of picked by hand:
+    python3 rush_hour_app/selection.py benchmark game_data/*.board --out bench.json
+    python3 rush_hour_app/selection.py tune bench.json --out table.json
+    python3 rush_hour_app/selection.py pick game_data/test.board --table table.json --allow-suboptimal
+"""
+import sys
+import json
+import time
+import argparse
+from collections import namedtuple, defaultdict
+from packed_board import PackedBoard
+from engines import ENGINES, is_optimal, parse_engine
+from corpus import iter_boards
+
+Features = namedtuple('Features', ['cars', 'free_cells', 'free_percent', 'goal_blockers', 'trucks'])
+
+#starting point until a table is tuned for the corpus at hand. Boards with few free cells have
+#small state spaces that BFS sweeps fastest, open boards need the heuristic to cut the search down.
+#Very open boards have huge state spaces where a weighted heuristic finds a solution far sooner,
+#at the price of it not always being the shortest one, so those rules only apply when that is allowed.
+#The ranges are percentages of the board, 40% is 14 free cells of a 6x6 board
+DEFAULT_TABLE = [
+    {'when': {'goal_blockers': [0, 0]}, 'engine': 'packed_astar'},
+    {'when': {'free_percent': [0, 40]}, 'engine': 'bfs'},
+    {'when': {'free_percent': [41, 57], 'goal_blockers': [3, 6]}, 'engine': 'bidirectional'},
+    {'when': {'free_percent': [67, 100]}, 'engine': 'packed_astar:weight=2'},
+    {'when': {'free_percent': [58, 66], 'goal_blockers': [2, 6]}, 'engine': 'packed_astar:weight=1.5'},
+    {'engine': 'packed_astar'},
+]
+
+
+def extract_features(cars: dict, rows: int, cols: int, goal_car_id: int)->Features:
+    """
+    Computes the selection features of a board
+
+    Args:
+        cars (dict): car id -> car namedtuple, as filled in by init_represent
+        rows (int): board rows
+        cols (int): board columns
+        goal_car_id (int): id of the goal car
+
+    Returns:
+        Features: cheap board features
+
+    Raises:
+        ValueError: the board has no goal car
+    """
+    if goal_car_id not in cars:
+        raise ValueError("board has no goal car, features need one")
+    goal = cars[goal_car_id]
+    blockers = 0
+    for car_id, info in cars.items():
+        if car_id == goal_car_id:
+            continue
+        if info.direction == 'V':
+            if info.x_pos >= goal.x_pos + goal.len and info.y_pos <= goal.y_pos < info.y_pos + info.len:
+                blockers += 1
+        elif info.y_pos == goal.y_pos and info.x_pos >= goal.x_pos + goal.len:
+            blockers += 1
+    free_cells = rows * cols - sum(info.len for info in cars.values())
+    return Features(len(cars), free_cells, round(100 * free_cells / (rows * cols)), blockers,
+                    sum(1 for info in cars.values() if info.len >= 3))
+
+
+def board_features(board: PackedBoard)->Features:
+    return extract_features(board.cars, board.rows, board.cols, board.goal_car_id)
+
+
+def matches(rule: dict, features: Features)->bool:
+    return all(low <= getattr(features, name) <= high for name, (low, high) in rule.get('when', {}).items())
+
+
+def select_engine(features: Features, table: list = None, allow_suboptimal: bool = False)->str:
+    """
+    Picks an engine spec from a selection table
+
+    Args:
+        features (Features): board features
+        table (list, optional): selection rules. Defaults to DEFAULT_TABLE.
+        allow_suboptimal (bool, optional): also use rules picking engines that may not return a shortest
+            solution. Defaults to False.
+
+    Returns:
+        str: engine spec of the first matching rule, 'packed_astar' if none match
+    """
+    for rule in table or DEFAULT_TABLE:
+        if matches(rule, features) and (allow_suboptimal or is_optimal(*parse_engine(rule['engine']))):
+            return rule['engine']
+    return 'packed_astar'
+
+
+def auto_solve(csv_contents: list, table: list = None, allow_suboptimal: bool = False)->tuple:
+    """
+    Solves a board with the engine the selection table picks for it
+
+    Args:
+        csv_contents (list): lines of a '.board' file
+        table (list, optional): selection rules. Defaults to DEFAULT_TABLE.
+        allow_suboptimal (bool, optional): see select_engine. Defaults to False.
+
+    Returns:
+        tuple: tuple moves to goal state (None if there is none), engine spec used
+    """
+    board, start = PackedBoard.from_csv(csv_contents)
+    spec = select_engine(board_features(board), table, allow_suboptimal)
+    name, options = parse_engine(spec)
+    return ENGINES[name].solve(board, start, **options), spec
+
+
+def load_table(path: str)->list:
+    with open(path) as fi:
+        return json.load(fi)
+
+
+def benchmark(board_files: list, specs: list)->list:
+    """
+    Times every engine spec on every board
+
+    Args:
+        board_files (list): '.board' or corpus file paths
+        specs (list): engine specs
+
+    Returns:
+        list: records {'board', 'features', 'engine', 'seconds', 'moves', 'optimal'}
+    """
+    records = []
+    for board_file, file_contents in iter_boards(board_files):
+        board, start = PackedBoard.from_csv(file_contents)
+        features = board_features(board)._asdict()
+        for spec in specs:
+            name, options = parse_engine(spec)
+            started = time.perf_counter()
+            path = ENGINES[name].solve(board, start, **options)
+            records.append({'board': board_file, 'features': features, 'engine': spec,
+                            'seconds': time.perf_counter() - started,
+                            'moves': None if path is None else len(path),
+                            'optimal': is_optimal(name, options)})
+    return records
+
+
+def tune_table(records: list, keys: tuple = ('free_cells', 'goal_blockers'), optimal_only: bool = True)->list:
+    """
+    Builds a selection table from benchmark records. Boards are grouped by the value of every
+    feature in keys and each group gets the engine with the lowest total time on it. A catch all
+    rule with the fastest engine over every board goes last.
+
+    Args:
+        records (list): records from benchmark
+        keys (tuple, optional): features rules test. Defaults to ('free_cells', 'goal_blockers').
+        optimal_only (bool, optional): only consider optimal engine configurations. Tables with rules for
+            the others are only followed with allow_suboptimal (see select_engine). Defaults to True.
+
+    Returns:
+        list: selection rules
+    """
+    groups = defaultdict(lambda: defaultdict(float))
+    overall = defaultdict(float)
+    for record in records:
+        if optimal_only and not record['optimal']:
+            continue
+        group = tuple(record['features'][key] for key in keys)
+        groups[group][record['engine']] += record['seconds']
+        overall[record['engine']] += record['seconds']
+    if not overall:
+        return list(DEFAULT_TABLE)
+    fallback = min(overall, key=overall.get)
+    table = []
+    for group, totals in sorted(groups.items()):
+        engine = min(totals, key=totals.get)
+        if engine != fallback:
+            table.append({'when': {key: [value, value] for key, value in zip(keys, group)}, 'engine': engine})
+    table.append({'engine': fallback})
+    return table
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Engine selection from board features")
+    commands = parser.add_subparsers(dest='command', required=True)
+    bench = commands.add_parser('benchmark', help="time engines on boards")
+    bench.add_argument('boards', nargs='+')
+    bench.add_argument('--engine', action='append', dest='engines', help="engine spec, repeat to add engines")
+    bench.add_argument('--out', required=True, help="benchmark records JSON file")
+    tune = commands.add_parser('tune', help="build a selection table from benchmark records")
+    tune.add_argument('records')
+    tune.add_argument('--keys', default='free_cells,goal_blockers', help="comma separated features rules test")
+    tune.add_argument('--out', required=True, help="selection table JSON file")
+    tune.add_argument('--allow-suboptimal', action='store_true', help="let rules pick engines that are not optimal")
+    pick = commands.add_parser('pick', help="show the features and engine picked for boards")
+    pick.add_argument('boards', nargs='+')
+    pick.add_argument('--table', help="selection table JSON file")
+    pick.add_argument('--allow-suboptimal', action='store_true', help="follow rules picking engines that are not optimal")
+    args = parser.parse_args(argv)
+
+    if args.command == 'benchmark':
+        specs = args.engines or [name for name in ENGINES if name != 'astar']
+        with open(args.out, 'w') as fo:
+            json.dump(benchmark(args.boards, specs), fo, indent=1)
+    elif args.command == 'tune':
+        with open(args.out, 'w') as fo:
+            json.dump(tune_table(load_table(args.records), tuple(args.keys.split(',')), not args.allow_suboptimal),
+                      fo, indent=1)
+    else:
+        table = load_table(args.table) if args.table else None
+        for board_file, file_contents in iter_boards(args.boards):
+            board, _ = PackedBoard.from_csv(file_contents)
+            features = board_features(board)
+            json.dump({'board': board_file, 'features': features._asdict(),
+                       'engine': select_engine(features, table, args.allow_suboptimal)}, sys.stdout)
+            print()
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,278 @@
+"""
+File: solution_io.py
+Author: John Pignato
+
+TLDR:
+Compact binary '.sol' files and an append only archive holding many solutions
+
+Explaination:
+A binary '.sol' file is the magic 'RHSB' followed by two bytes per move: the car id and the signed
+delta. read_solution tells it apart from the text format ("car,delta" per line) by the magic, so
+either kind can be read back.
+
+Batch runs write to a SolutionArchive instead of one file per board. The archive is a data file of
+records (key length, move count, key, moves) and an index file of (record offset, key length, key)
+entries. Both are only ever appended to through large buffers. If the process dies before the index
+is flushed, opening the archive scans the data past the last indexed record and restores the index.
+
+Usage:
+    python3 rush_hour_app/solution_io.py solve puzzles.txt --archive solutions.rhsa
+    python3 rush_hour_app/solution_io.py export solutions.rhsa puzzles.txt:3 --out solution.sol
+"""
+import os
+import struct
+import argparse
+from packed_board import PackedBoard
+from engines import ENGINES
+from corpus import iter_boards
+
+BINARY_MAGIC = b'RHSB'
+MOVE = struct.Struct('<Bb')
+RECORD = struct.Struct('<HH')
+INDEX = struct.Struct('<QH')
+#bytes buffered before the archive writes to disk
+BUFFER_SIZE = 1 << 20
+
+
+def pack_solution(path: list)->bytes:
+    return BINARY_MAGIC + b''.join(MOVE.pack(car_id, delta) for car_id, delta in path)
+
+
+def unpack_solution(data: bytes)->list:
+    return list(MOVE.iter_unpack(data[len(BINARY_MAGIC):]))
+
+
+def solution_file_name(board_file_path: str, out_dir: str = "game_data")->str:
+    """
+    Deterministic '.sol' file name of a board: solution_<BOARD FILE NAME>.sol
+    """
+    board_file_name = os.path.splitext(os.path.basename(board_file_path))[0]
+    return os.path.join(out_dir, "solution_{}.sol".format(board_file_name))
+
+
+def save_solution(path: list, file_name: str, binary: bool = True):
+    """
+    Writes a solution file, replacing it atomically so a reader never sees half of it
+
+    Args:
+        path (list): tuple moves
+        file_name (str): solution file
+        binary (bool, optional): binary format, text "car,delta" lines otherwise. Defaults to True.
+    """
+    if binary:
+        contents = pack_solution(path)
+    else:
+        contents = "".join("{0},{1}\n".format(car_id, delta) for car_id, delta in path).encode()
+    with open(file_name + '.tmp', 'wb') as fo:
+        fo.write(contents)
+    os.replace(file_name + '.tmp', file_name)
+
+
+def write_solution(path: list, board_file_path: str, out_dir: str = "game_data", binary: bool = True)->str:
+    """
+    Writes the solution of a board under its deterministic name
+
+    Args:
+        path (list): tuple moves
+        board_file_path (str): board the solution is for
+        out_dir (str, optional): directory of solution files. Defaults to "game_data".
+        binary (bool, optional): binary format, text "car,delta" lines otherwise. Defaults to True.
+
+    Returns:
+        str: file name
+    """
+    file_name = solution_file_name(board_file_path, out_dir)
+    save_solution(path, file_name, binary)
+    return file_name
+
+
+def read_solution(file_name: str)->list:
+    """
+    Reads a binary or text '.sol' file
+
+    Args:
+        file_name (str): solution file
+
+    Returns:
+        list: tuple moves
+    """
+    with open(file_name, 'rb') as fi:
+        contents = fi.read()
+    if contents.startswith(BINARY_MAGIC):
+        return unpack_solution(contents)
+    moves = []
+    for line in contents.decode().split('\n'):
+        if line.strip():
+            car_id, delta = line.split(',')
+            moves.append((int(car_id), int(delta)))
+    return moves
+
+
+class SolutionArchive:
+    """
+    Append only file of many solutions with a key index
+    """
+
+    def __init__(self, path: str, read_only: bool = False):
+        """
+        Args:
+            path (str): data file, the index is kept in path + '.idx'
+            read_only (bool, optional): open an existing archive without ever writing to it, a missing
+                archive raises FileNotFoundError. Defaults to False.
+        """
+        self.path = path
+        self.index_path = path + '.idx'
+        self.read_only = read_only
+        self.offsets = {}
+        if read_only:
+            self.__data = open(path, 'rb')
+            self.__index = open(self.index_path, 'rb') if os.path.exists(self.index_path) else None
+        else:
+            self.__data = open(path, 'ab+', buffering=BUFFER_SIZE)
+            self.__index = open(self.index_path, 'ab+', buffering=BUFFER_SIZE)
+        self.__load()
+        self.__data.seek(0, os.SEEK_END)
+        self.__end = self.__data.tell()
+
+    def __load(self):
+        contents = b''
+        if self.__index is not None:
+            self.__index.seek(0)
+            contents = self.__index.read()
+        offset, valid, last = 0, 0, 0
+        while offset + INDEX.size <= len(contents):
+            record_offset, key_length = INDEX.unpack_from(contents, offset)
+            if offset + INDEX.size + key_length > len(contents):
+                break
+            key = contents[offset + INDEX.size:offset + INDEX.size + key_length].decode()
+            self.offsets[key] = record_offset
+            offset += INDEX.size + key_length
+            valid = offset
+            last = max(last, record_offset)
+        if valid < len(contents) and not self.read_only:
+            self.__index.truncate(valid)
+        #restore index entries of records written after the last index flush
+        self.__data.seek(0, os.SEEK_END)
+        size = self.__data.tell()
+        position = last
+        if self.offsets:
+            self.__data.seek(last)
+            key_length, moves = RECORD.unpack(self.__data.read(RECORD.size))
+            position = last + RECORD.size + key_length + moves * MOVE.size
+        while position + RECORD.size <= size:
+            self.__data.seek(position)
+            key_length, moves = RECORD.unpack(self.__data.read(RECORD.size))
+            end = position + RECORD.size + key_length + moves * MOVE.size
+            if end > size:
+                break
+            key = self.__data.read(key_length).decode()
+            self.__index_entry(key, position)
+            position = end
+        if position < size and not self.read_only:
+            #record cut off by a crash
+            self.__data.truncate(position)
+
+    def __index_entry(self, key: str, offset: int):
+        if not self.read_only:
+            encoded = key.encode()
+            self.__index.write(INDEX.pack(offset, len(encoded)) + encoded)
+        self.offsets[key] = offset
+
+    def __len__(self)->int:
+        return len(self.offsets)
+
+    def __contains__(self, key: str)->bool:
+        return key in self.offsets
+
+    def append(self, key: str, path: list):
+        """
+        Adds a solution. A key added again points to the newest solution.
+
+        Args:
+            key (str): name of the solution, for example the board file or corpus line
+            path (list): tuple moves
+        """
+        if self.read_only:
+            raise ValueError("{} is open read only".format(self.path))
+        encoded = key.encode()
+        moves = b''.join(MOVE.pack(car_id, delta) for car_id, delta in path)
+        self.__data.write(RECORD.pack(len(encoded), len(path)) + encoded + moves)
+        self.__index_entry(key, self.__end)
+        self.__end += RECORD.size + len(encoded) + len(moves)
+
+    def get(self, key: str)->list:
+        """
+        Reads a solution back
+
+        Args:
+            key (str): name of the solution
+
+        Returns:
+            list: tuple moves, None if key is not in the archive
+        """
+        if key not in self.offsets:
+            return None
+        if not self.read_only:
+            self.__data.flush()
+        self.__data.seek(self.offsets[key])
+        key_length, moves = RECORD.unpack(self.__data.read(RECORD.size))
+        self.__data.seek(key_length, os.SEEK_CUR)
+        solution = list(MOVE.iter_unpack(self.__data.read(moves * MOVE.size)))
+        self.__data.seek(0, os.SEEK_END)
+        return solution
+
+    def keys(self)->list:
+        return list(self.offsets)
+
+    def flush(self):
+        if self.read_only:
+            return
+        #data goes first so the index never points past the end of the data file
+        self.__data.flush()
+        self.__index.flush()
+
+    def close(self):
+        if not self.__data.closed:
+            self.flush()
+            self.__data.close()
+            if self.__index is not None:
+                self.__index.close()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Binary solution files and solution archives")
+    commands = parser.add_subparsers(dest='command', required=True)
+    solve = commands.add_parser('solve', help="solve boards into an archive")
+    solve.add_argument('boards', nargs='+', help="'.board' or corpus files")
+    solve.add_argument('--archive', required=True)
+    solve.add_argument('--engine', default='packed_astar', choices=list(ENGINES))
+    export = commands.add_parser('export', help="write one archived solution as a '.sol' file")
+    export.add_argument('archive')
+    export.add_argument('key')
+    export.add_argument('--out', required=True)
+    export.add_argument('--binary', action='store_true', help="binary instead of text '.sol'")
+    args = parser.parse_args(argv)
+
+    with SolutionArchive(args.archive) as archive:
+        if args.command == 'solve':
+            for name, file_contents in iter_boards(args.boards):
+                board, start = PackedBoard.from_csv(file_contents)
+                path = ENGINES[args.engine].solve(board, start)
+                if path is not None:
+                    archive.append(name, path)
+            print("{} solutions in {}".format(len(archive), args.archive))
+            return
+        path = archive.get(args.key)
+        if path is None:
+            raise SystemExit("{} is not in {}".format(args.key, args.archive))
+        save_solution(path, args.out, args.binary)
+
+
+if __name__ == '__main__':
+    main()
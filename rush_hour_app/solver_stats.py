@@ -0,0 +1,73 @@
+"""
+File: solver_stats.py
+Author: John Pignato
+
+TLDR:
+Counters and phase timings of one solve
+
+Explaination:
+Every engine takes an optional stats=SolverStats() keyword and fills it in. The engines count in
+local variables and add them to the stats object once when the search ends, so the hot loops only
+pay for a few integer additions. The counters are:
+    expanded                states whose moves were generated
+    generated               children produced by those expansions
+    duplicates              children dropped because they were already known (or not improved)
+    peak_open               largest open list (priority queue, frontier or IDA* path)
+    peak_closed             largest set of stored states (parents, visited or transposition table)
+    heuristic_evaluations   calls of the heuristic
+
+Phase times (seconds) are kept for parse, precompute, search and rebuild. The engines time rebuild,
+which happens inside the search, and the caller times the rest with timed(). The grid a_star keeps the
+move history in its heap entries and never rebuilds a path, so its rebuild time is always 0.0.
+"""
+import time
+from contextlib import contextmanager
+
+COUNTERS = ('expanded', 'generated', 'duplicates', 'peak_open', 'peak_closed', 'heuristic_evaluations')
+PHASES = ('parse', 'precompute', 'search', 'rebuild')
+
+
+class SolverStats:
+    """
+    Search counters and phase timings
+    """
+
+    def __init__(self):
+        self.expanded = 0
+        self.generated = 0
+        self.duplicates = 0
+        self.peak_open = 0
+        self.peak_closed = 0
+        self.heuristic_evaluations = 0
+        self.phases = dict.fromkeys(PHASES, 0.0)
+
+    def add(self, expanded: int = 0, generated: int = 0, duplicates: int = 0, peak_open: int = 0,
+            peak_closed: int = 0, heuristic_evaluations: int = 0):
+        """
+        Adds the counts of a search, peaks keep the largest value seen
+        """
+        self.expanded += expanded
+        self.generated += generated
+        self.duplicates += duplicates
+        self.peak_open = max(self.peak_open, peak_open)
+        self.peak_closed = max(self.peak_closed, peak_closed)
+        self.heuristic_evaluations += heuristic_evaluations
+
+    @contextmanager
+    def timed(self, phase: str):
+        """
+        Adds the time spent in the with block to a phase
+        """
+        started = time.perf_counter()
+        try:
+            yield self
+        finally:
+            self.phases[phase] = self.phases.get(phase, 0.0) + time.perf_counter() - started
+
+    def as_dict(self)->dict:
+        stats = {counter: getattr(self, counter) for counter in COUNTERS}
+        stats['phases'] = {phase: round(seconds, 6) for phase, seconds in self.phases.items()}
+        return stats
+
+    def __repr__(self)->str:
+        return "SolverStats({})".format(", ".join("{}={}".format(counter, getattr(self, counter)) for counter in COUNTERS))
@@ -0,0 +1,180 @@
+"""
+File: unsolvable.py
+Author: John Pignato
+
+TLDR:
+Proves common unsolvable boards without searching, falls back to an exhaustive BFS otherwise
+
+Explaination:
+A board with no solution makes every engine visit its whole reachable state space, which is the
+slowest case there is. Most unsolvable boards in practice fail for a structural reason that can
+be read off the starting position:
+    - there is no goal car, or it is vertical and can never slide out of the goal row's exit
+    - a horizontal car sits in the goal row between the goal car and the exit (it can never leave the row)
+    - a frozen car covers a cell between the goal car and the exit. Frozen cars are found as a fixed
+      point: start with every car frozen and thaw any car with a free cell or a thawed car in front
+      of or behind it. The cars left can never make a first move since they only block each other
+    - a vertical blocker cannot clear the goal row because the cars stacked above (below) it in its
+      column and the walls or frozen cars bounding that column leave no room for it above (below)
+prove_unsolvable runs these checks, check_board adds the exhaustive fallback: level_bfs (the fastest
+engine that visits every state, NumPy backed when installed) which also reports the reachable count.
+
+Usage:
+    python3 rush_hour_app/unsolvable.py game_data/*.board
+"""
+import sys
+import json
+import argparse
+from collections import namedtuple
+from packed_board import PackedBoard
+from level_bfs import level_bfs
+from corpus import iter_boards
+
+#solvable is None when the structural checks were not enough and no search was run
+Solvability = namedtuple('Solvability', ['solvable', 'reason', 'path', 'reachable_states'])
+
+
+def cells_of(board: PackedBoard, index: int, offset: int)->list:
+    """
+    (row, col) cells covered by a car
+    """
+    if board.horizontal[index]:
+        return [(board.lanes[index], offset + i) for i in range(board.lengths[index])]
+    return [(offset + i, board.lanes[index]) for i in range(board.lengths[index])]
+
+
+def frozen_cars(board: PackedBoard, state: int)->set:
+    """
+    Finds the cars that can never move
+
+    Args:
+        board (PackedBoard): board being checked
+        state (int): packed state
+
+    Returns:
+        set: indexes (car_ids order) of frozen cars
+    """
+    offsets = board.offsets(state)
+    owner = {}
+    for index, offset in enumerate(offsets):
+        for cell in cells_of(board, index, offset):
+            owner[cell] = index
+    ends = []
+    for index, offset in enumerate(offsets):
+        cells = cells_of(board, index, offset)
+        step = (0, 1) if board.horizontal[index] else (1, 0)
+        ends.append([(cells[0][0] - step[0], cells[0][1] - step[1]), (cells[-1][0] + step[0], cells[-1][1] + step[1])])
+    frozen = set(range(len(offsets)))
+    changed = True
+    while changed:
+        changed = False
+        for index in list(frozen):
+            for row, col in ends[index]:
+                inside = 0 <= row < board.rows and 0 <= col < board.cols
+                if inside and owner.get((row, col)) not in frozen:
+                    frozen.discard(index)
+                    changed = True
+                    break
+    return frozen
+
+
+def prove_unsolvable(board: PackedBoard, state: int)->str:
+    """
+    Runs the structural checks
+
+    Args:
+        board (PackedBoard): board being checked
+        state (int): packed state
+
+    Returns:
+        str: why the board can not be solved, None if no check proves it
+    """
+    index = board.goal_index
+    if index is None:
+        return "board has no goal car"
+    if not board.horizontal[index]:
+        return "goal car {} is vertical".format(board.goal_car_id)
+    if board.is_goal(state):
+        return None
+    offsets = board.offsets(state)
+    frozen = frozen_cars(board, state)
+    if index in frozen:
+        return "goal car {} can never move".format(board.goal_car_id)
+    goal_row = board.lanes[index]
+    exit_cols = range(offsets[index] + board.lengths[index], board.cols)
+    blocked = {}
+    for car_index, offset in enumerate(offsets):
+        for row, col in cells_of(board, car_index, offset):
+            if row == goal_row and col in exit_cols:
+                blocked[car_index] = col
+    for car_index, col in blocked.items():
+        car_id = board.car_ids[car_index]
+        if board.horizontal[car_index]:
+            return "car {} shares the goal row and sits between the goal car and the exit".format(car_id)
+        if car_index in frozen:
+            return "car {} blocks the goal row and can never move".format(car_id)
+        #walls or frozen cars bounding the column, then the movable vertical cars stacked between them
+        top, bottom, stacked = 0, board.rows - 1, []
+        for other, offset in enumerate(offsets):
+            rows = [row for row, other_col in cells_of(board, other, offset) if other_col == col]
+            if other == car_index or not rows:
+                continue
+            if other in frozen:
+                if rows[0] < goal_row:
+                    top = max(top, rows[-1] + 1)
+                else:
+                    bottom = min(bottom, rows[0] - 1)
+            elif not board.horizontal[other]:
+                stacked.append(rows)
+        above = sum(len(rows) for rows in stacked if top <= rows[0] and rows[-1] < offsets[car_index])
+        below = sum(len(rows) for rows in stacked if rows[0] > offsets[car_index] and rows[-1] <= bottom)
+        length = board.lengths[car_index]
+        fits_above = goal_row - top >= above + length
+        fits_below = bottom - goal_row >= below + length
+        if not fits_above and not fits_below:
+            return "car {} can never clear the goal row in column {}".format(car_id, col)
+    return None
+
+
+def check_board(board: PackedBoard, start: int, exhaustive: bool = True, processes: int = 1)->Solvability:
+    """
+    Decides if a board can be solved, searching only when the structural checks can not tell
+
+    Args:
+        board (PackedBoard): board being checked
+        start (int): packed initial state
+        exhaustive (bool, optional): run the BFS fallback. Defaults to True.
+        processes (int, optional): worker processes for the fallback. Defaults to 1.
+
+    Returns:
+        Solvability: verdict, reason it is unsolvable, a shortest solution when solvable and the
+        reachable state count when the whole state space was searched
+    """
+    reason = prove_unsolvable(board, start)
+    if reason is not None:
+        return Solvability(False, reason, None, None)
+    if not exhaustive:
+        return Solvability(None, None, None, None)
+    result = level_bfs(board, start, processes)
+    if result.path is not None:
+        return Solvability(True, None, result.path, None)
+    return Solvability(False, "no goal state is reachable", None, sum(len(layer) for layer in result.layers))
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Checks if rush hour boards can be solved")
+    parser.add_argument('boards', nargs='+', help="'.board' or corpus files to check")
+    parser.add_argument('--structural', action='store_true', help="skip the exhaustive fallback")
+    parser.add_argument('--processes', type=int, default=1)
+    args = parser.parse_args(argv)
+    for name, file_contents in iter_boards(args.boards):
+        board, start = PackedBoard.from_csv(file_contents)
+        result = check_board(board, start, not args.structural, args.processes)
+        json.dump({'board': name, 'solvable': result.solvable, 'reason': result.reason,
+                   'moves': None if result.path is None else len(result.path),
+                   'reachable_states': result.reachable_states}, sys.stdout)
+        print()
+
+
+if __name__ == '__main__':
+    main()
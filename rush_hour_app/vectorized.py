@@ -0,0 +1,165 @@
+"""
+File: vectorized.py
+Author: John Pignato
+
+TLDR:
+NumPy backend that expands a whole layer of packed states with array operations
+
+Explaination:
+VectorBoard holds the same per car tables as PackedBoard (cell, back and front masks for every
+offset) as uint64 arrays. Expanding a layer then takes one pass per car instead of one Python loop
+per state: unpack every car's offset with a shift and a mask, build the occupancy of the whole
+layer by indexing the cell tables, and keep the states whose back/front cell is free. Duplicates
+are removed with np.unique and states seen in the two layers before are dropped with a binary
+search (np.searchsorted) into those sorted layers.
+
+NumPy is optional. AVAILABLE is False when it is not installed and level_bfs keeps using the
+pure Python expansion.
+"""
+from array import array
+from packed_board import PackedBoard
+try:
+    import numpy as np
+except ImportError:
+    np = None
+
+AVAILABLE = np is not None
+#layers at least this big are expanded with NumPy when it is available
+MIN_VECTOR_LAYER = 4096
+
+
+class VectorBoard:
+    """
+    uint64 lookup tables of a PackedBoard
+    """
+
+    def __init__(self, board: PackedBoard):
+        if not supports(board):
+            raise ValueError("Board does not fit the 64 bit NumPy backend")
+        self.board = board
+        self.car_ids = np.array(board.car_ids, dtype=np.int64)
+        self.shifts = [np.uint64(shift) for shift in board.shifts]
+        self.masks = [np.uint64(mask) for mask in board.masks]
+        self.steps = [np.uint64(1 << shift) for shift in board.shifts]
+        self.cell_masks = [np.array(masks, dtype=np.uint64) for masks in board.cell_masks]
+        self.back_cells = [np.array(cells, dtype=np.uint64) for cells in board.back_cells]
+        self.front_cells = [np.array(cells, dtype=np.uint64) for cells in board.front_cells]
+
+    def offsets(self, states, index: int):
+        return ((states >> self.shifts[index]) & self.masks[index]).astype(np.intp)
+
+    def occupancy(self, states):
+        """
+        Occupancy bitmask of every state
+
+        Args:
+            states (ndarray): uint64 packed states
+
+        Returns:
+            ndarray: uint64 occupancy bitmasks
+        """
+        occupied = np.zeros(len(states), dtype=np.uint64)
+        for index in range(len(self.shifts)):
+            occupied |= self.cell_masks[index][self.offsets(states, index)]
+        return occupied
+
+    def expand(self, states)->tuple:
+        """
+        Finds every state one move away from any state of the layer
+
+        Args:
+            states (ndarray): uint64 packed states
+
+        Returns:
+            tuple: children (uint64), car id of each move (int64), delta of each move (int8)
+        """
+        occupied = self.occupancy(states)
+        children, cars, deltas = [], [], []
+        zero = np.uint64(0)
+        for index in range(len(self.shifts)):
+            offsets = self.offsets(states, index)
+            for cells, delta in ((self.back_cells[index], -1), (self.front_cells[index], 1)):
+                cell = cells[offsets]
+                movable = (cell != zero) & ((occupied & cell) == zero)
+                moved = states[movable]
+                children.append(moved - self.steps[index] if delta < 0 else moved + self.steps[index])
+                cars.append(np.full(len(moved), self.car_ids[index], dtype=np.int64))
+                deltas.append(np.full(len(moved), delta, dtype=np.int8))
+        return np.concatenate(children), np.concatenate(cars), np.concatenate(deltas)
+
+    def is_goal(self, states):
+        """
+        Goal test of every state
+
+        Args:
+            states (ndarray): uint64 packed states
+
+        Returns:
+            ndarray: bool per state
+        """
+        index = self.board.goal_index
+        if index is None:
+            return np.zeros(len(states), dtype=bool)
+        return self.offsets(states, index) == self.board.goal_offset
+
+
+def supports(board: PackedBoard)->bool:
+    """
+    Checks if the NumPy backend can run a board
+
+    Args:
+        board (PackedBoard): board being searched
+
+    Returns:
+        bool: NumPy is installed, the board uses single cell moves and states and occupancy masks fit in 64 bits
+    """
+    return AVAILABLE and not board.slide and board.state_bits <= 64 and board.rows * board.cols <= 64
+
+
+def as_array(layer: array):
+    """
+    Zero copy uint64 view of a packed layer
+    """
+    return np.frombuffer(layer, dtype=np.uint64) if len(layer) else np.zeros(0, dtype=np.uint64)
+
+
+def _drop_seen(children, layer):
+    if len(layer) == 0 or len(children) == 0:
+        return children
+    index = np.searchsorted(layer, children)
+    found = layer[np.minimum(index, len(layer) - 1)] == children
+    return children[~found]
+
+
+def expand_layer(vector_board: VectorBoard, layer: array):
+    """
+    Expands every state of a layer
+
+    Args:
+        vector_board (VectorBoard): tables of the board being searched
+        layer (array): packed states of the layer
+
+    Returns:
+        ndarray: sorted unique child states
+    """
+    children, _, _ = vector_board.expand(as_array(layer))
+    return np.unique(children)
+
+
+def merge_layer(children, previous: array, current: array)->array:
+    """
+    Drops children seen in the two layers before the next one
+
+    Args:
+        children (ndarray): sorted unique child states
+        previous (array): sorted layer d-1
+        current (array): sorted layer d
+
+    Returns:
+        array: sorted layer d+1
+    """
+    children = _drop_seen(children, as_array(previous))
+    children = _drop_seen(children, as_array(current))
+    layer = array('Q')
+    layer.frombytes(children.tobytes())
+    return layer
@@ -0,0 +1,190 @@
+"""
+File: verify.py
+Author: John Pignato
+
+TLDR:
+Checks solutions against their boards in bulk
+
+Explaination:
+A solution is replayed on the packed state of its board. The occupancy bitmask is kept up to
+date as cars move, so each move is a handful of integer operations: lift the car out of the
+occupancy, check every cell it slides over is free and put it back at its new offset. Moves of
+more than one cell (slide metric solutions) are checked cell by cell. After the last move the goal
+car has to be at the exit, the same test reached_goal does on a grid.
+
+Boards come from '.board' or corpus files and solutions from a directory of '.sol' files (text or
+binary, named as solution_io.solution_file_name names them, corpus lines as <corpus>_<line>) or from
+a SolutionArchive keyed by board name. Both are streamed and the replays run in a process pool.
+The archive is opened read only and has to exist. A board that can not be read (a wall in a corpus
+line, a missing '.board' file) fails on its own with a "bad board" verdict.
+
+Usage:
+    python3 rush_hour_app/verify.py game_data/*.board --solutions game_data
+    python3 rush_hour_app/verify.py puzzles.txt --solutions solutions.rhsa --processes 8
+"""
+import os
+import sys
+import json
+import argparse
+from multiprocessing import Pool
+from collections import namedtuple
+from packed_board import PackedBoard
+from corpus import iter_board_entries
+from solution_io import SolutionArchive, read_solution, solution_file_name
+
+#replays handed to a worker at once
+CHUNK_SIZE = 64
+
+Verdict = namedtuple('Verdict', ['name', 'ok', 'reason'])
+
+
+def replay(board: PackedBoard, state: int, path: list)->str:
+    """
+    Replays a solution
+
+    Args:
+        board (PackedBoard): board the solution is for
+        state (int): packed initial state
+        path (list): (car id, delta) moves
+
+    Returns:
+        str: why the solution is wrong, None if it is legal and reaches the goal
+    """
+    offsets = board.offsets(state)
+    occupied = board.occupancy(state)
+    for number, (car_id, delta) in enumerate(path, 1):
+        index = board.car_index.get(car_id)
+        if index is None:
+            return "move {}: there is no car {}".format(number, car_id)
+        cells = board.cell_masks[index]
+        offset = offsets[index]
+        target = offset + delta
+        if delta == 0 or not 0 <= target < len(cells):
+            return "move {}: car {} can not move {}".format(number, car_id, delta)
+        occupied ^= cells[offset]
+        step = 1 if delta > 0 else -1
+        for passed in range(offset + step, target + step, step):
+            if occupied & cells[passed]:
+                return "move {}: car {} is blocked".format(number, car_id)
+        occupied |= cells[target]
+        offsets[index] = target
+    if board.goal_index is None or offsets[board.goal_index] != board.goal_offset:
+        return "goal car does not reach the exit"
+    return None
+
+
+def verify_job(job: tuple)->Verdict:
+    """
+    Verifies one (name, board file lines, moves) job
+    """
+    name, csv_contents, path = job
+    if csv_contents is None:
+        return Verdict(name, False, "bad board: {}".format(path))
+    if path is None:
+        return Verdict(name, False, "no solution")
+    try:
+        board, start = PackedBoard.from_csv(csv_contents)
+    except (ValueError, IndexError, KeyError) as error:
+        return Verdict(name, False, "bad board: {}".format(error))
+    reason = replay(board, start, path)
+    return Verdict(name, reason is None, reason)
+
+
+def solution_path(name: str, solution_dir: str)->str:
+    """
+    '.sol' file of a board name from iter_boards
+    """
+    path, _, line = name.rpartition(':') if not name.endswith('.board') else (name, None, None)
+    if line:
+        path = "{}_{:06d}".format(os.path.splitext(os.path.basename(path))[0], int(line))
+    return solution_file_name(path, solution_dir)
+
+
+def jobs(board_paths: list, solutions: str):
+    """
+    Pairs every board with its solution
+
+    Args:
+        board_paths (list): '.board' or corpus files
+        solutions (str): directory of '.sol' files or a SolutionArchive file
+
+    Returns:
+        generator: (name, board file lines, moves) tuples, moves None if the solution is missing or
+        unreadable, or (name, None, error message) for a board that can not be read
+
+    Raises:
+        FileNotFoundError: solutions does not exist, checked before any board is read
+    """
+    if not os.path.exists(solutions):
+        raise FileNotFoundError("no solution directory or archive at {}".format(solutions))
+    archive = SolutionArchive(solutions, read_only=True) if not os.path.isdir(solutions) else None
+    return _jobs(board_paths, solutions, archive)
+
+
+def _jobs(board_paths: list, solutions: str, archive: SolutionArchive):
+    try:
+        for name, csv_contents, error in iter_board_entries(board_paths):
+            if error is not None:
+                yield name, None, error
+                continue
+            if archive is not None:
+                path = archive.get(name)
+            else:
+                try:
+                    path = read_solution(solution_path(name, solutions))
+                except (OSError, ValueError):
+                    path = None
+            yield name, csv_contents, path
+    finally:
+        if archive is not None:
+            archive.close()
+
+
+def verify(board_paths: list, solutions: str, processes: int = 1):
+    """
+    Verifies the solution of every board
+
+    Args:
+        board_paths (list): '.board' or corpus files
+        solutions (str): directory of '.sol' files or a SolutionArchive file
+        processes (int, optional): worker processes. Defaults to 1.
+
+    Returns:
+        generator: Verdict for every board, in board order
+
+    Raises:
+        FileNotFoundError: solutions does not exist
+    """
+    pending = jobs(board_paths, solutions)
+    if processes <= 1:
+        return map(verify_job, pending)
+    return _verify_in_pool(pending, processes)
+
+
+def _verify_in_pool(pending, processes: int):
+    with Pool(processes) as pool:
+        yield from pool.imap(verify_job, pending, CHUNK_SIZE)
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Verifies rush hour solutions in bulk")
+    parser.add_argument('boards', nargs='+', help="'.board' or corpus files")
+    parser.add_argument('--solutions', required=True, help="directory of '.sol' files or a solution archive")
+    parser.add_argument('--processes', type=int, default=os.cpu_count())
+    args = parser.parse_args(argv)
+    if not os.path.exists(args.solutions):
+        parser.error("no solution directory or archive at {}".format(args.solutions))
+    checked = failed = 0
+    for verdict in verify(args.boards, args.solutions, args.processes):
+        checked += 1
+        if not verdict.ok:
+            failed += 1
+            json.dump(verdict._asdict(), sys.stdout)
+            print()
+    json.dump({'checked': checked, 'failed': failed}, sys.stdout)
+    print()
+    return 1 if failed else 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -9,6 +9,7 @@ from animation_controller import MoveCarAnimation, AnimationController
 from graphics import *
 from time import time
 from os.path import exists
+import struct
 
 def parse_board(fname, cell_dim):
     dim = None
@@ -35,12 +36,21 @@ def parse_board(fname, cell_dim):
 
 def parse_moves(fname, cars, fpm):
     result = []
-    with open(fname, 'r') as fin:
-        for line in fin:
-            line = line.strip().split(',')
-            ident = int(line[0])
-            move = int(line[1])
+    with open(fname, 'rb') as fin:
+        contents = fin.read()
+    # Binary solutions: 'RHSB' then a car id byte and a signed delta byte per move.
+    if contents.startswith(b'RHSB'):
+        for ident, move in struct.iter_unpack('<Bb', contents[4:]):
             result.append(MoveCarAnimation(cars[ident], move, fpm))
+        return result
+    for line in contents.decode().split('\n'):
+        line = line.strip()
+        if line == '':
+            continue
+        line = line.split(',')
+        ident = int(line[0])
+        move = int(line[1])
+        result.append(MoveCarAnimation(cars[ident], move, fpm))
     return result
 
 def render_board(cars, win):
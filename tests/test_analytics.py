@@ -0,0 +1,15 @@
+from rush_hour_app.packed_board import PackedBoard
+from rush_hour_app.analytics import analyze
+from rush_hour_app.rush_hour_solver import csv_reader
+
+def test_packed_board_round_trip():
+    board, start = PackedBoard.from_csv(csv_reader(file_path="game_data/test.board")[0])
+    assert board.encode(board.decode(start)) == start
+    assert sorted(move for _, move in board.expand(start)) == [(2, 1), (4, -1)]
+    assert not board.is_goal(start)
+
+def test_analyze():
+    report = analyze(csv_reader(file_path="game_data/board1.board")[0])
+    assert report['reachable_states'] == sum(report['layer_sizes'])
+    assert report['shortest_solution'] == 21
+    assert report['goal_states'] > 0
@@ -0,0 +1,38 @@
+import copy
+import pytest
+import rush_hour_app.rush_hour_solver as solver
+from rush_hour_app.packed_board import PackedBoard
+from rush_hour_app.checkpoint import SearchCheckpoint, LayerCheckpoint
+from rush_hour_app.level_bfs import level_bfs
+
+def test_a_star_resumes_from_checkpoint(tmp_path, monkeypatch):
+    grid = solver.init_represent(solver.csv_reader(file_path="game_data/board1.board")[0])
+    board = PackedBoard(solver.cars, len(grid), len(grid[0]), solver.GOAL_CAR_ID)
+    expected = solver.a_star(copy.deepcopy(grid))
+    expand_node = solver.expand_node
+    calls = []
+    def interrupted_expand_node(*args):
+        calls.append(1)
+        if len(calls) > 20:
+            raise KeyboardInterrupt
+        return expand_node(*args)
+    monkeypatch.setattr(solver, "expand_node", interrupted_expand_node)
+    checkpoint = SearchCheckpoint(str(tmp_path / "search.ck"), board, grid)
+    with pytest.raises(KeyboardInterrupt):
+        solver.a_star(copy.deepcopy(grid), checkpoint=checkpoint)
+    checkpoint.close()
+    monkeypatch.setattr(solver, "expand_node", expand_node)
+    checkpoint = SearchCheckpoint(str(tmp_path / "search.ck"), board, grid, resume=True)
+    assert solver.a_star(copy.deepcopy(grid), checkpoint=checkpoint) == expected
+    checkpoint.close()
+
+def test_level_bfs_resumes_from_checkpoint(tmp_path):
+    board, start = PackedBoard.from_csv(solver.csv_reader(file_path="game_data/board1.board")[0])
+    expected = level_bfs(board, start)
+    checkpoint = LayerCheckpoint(str(tmp_path / "layers.ck"), board, [start])
+    level_bfs(board, start, checkpoint=checkpoint)
+    checkpoint.close()
+    checkpoint = LayerCheckpoint(str(tmp_path / "layers.ck"), board, [start], resume=True)
+    resumed = level_bfs(board, start, checkpoint=checkpoint)
+    checkpoint.close()
+    assert resumed.path == expected.path and resumed.timings == []
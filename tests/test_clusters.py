@@ -0,0 +1,45 @@
+import json
+from rush_hour_app.clusters import lane_assignments, assignment_board, enumerate_clusters, enumerate_all
+from rush_hour_app.corpus import board_to_csv
+from rush_hour_app.counting import OptimalSolutions
+from rush_hour_app.packed_board import PackedBoard
+
+def test_clusters_cover_every_placement_once():
+    for assignment in lane_assignments(['V2', 'V3'], 6, 6):
+        board = assignment_board(assignment, 6, 6)
+        clusters = enumerate_clusters(board, assignment)
+        assert sum(cluster.size for cluster in clusters) == len(list(board.placements()))
+        assert sum(cluster.goals for cluster in clusters) == len(list(board.goal_states()))
+
+def test_identical_pieces_in_a_lane_are_counted_once():
+    assignment = [('V', 2, 3), ('V', 2, 3)]
+    board = assignment_board(assignment, 6, 6)
+    clusters = enumerate_clusters(board, assignment)
+    assert sum(cluster.size for cluster in clusters) * 2 == len(list(board.placements()))
+
+def test_hardest_state_has_the_reported_distance():
+    results = list(enumerate_all(['H2', 'V2', 'V3']))
+    best = max((cluster for result in results for cluster in result['clusters'] if cluster['goals']),
+               key=lambda cluster: cluster['max_distance'])
+    board, start = PackedBoard.from_csv(board_to_csv(best['hardest']))
+    assert OptimalSolutions(board, start).length == best['max_distance']
+
+def test_enumeration_resumes_from_its_output(tmp_path):
+    out = tmp_path / 'clusters.jsonl'
+    everything = list(enumerate_all(['V2', 'V3'], out=str(out)))
+    with open(out, 'w') as fo:
+        for result in everything[:3]:
+            fo.write(json.dumps(result) + '\n')
+        fo.write('{"assignment": 9')
+    resumed = list(enumerate_all(['V2', 'V3'], out=str(out)))
+    assert len(resumed) == len(everything) - 3
+    assert out.read_text().count('\n') == 3 and not out.read_text().endswith('9')
+
+def test_horizontal_pieces_can_share_the_goal_row():
+    shared = [assignment for assignment in lane_assignments(['H2', 'H3'], 6, 6) if ('H', 2, 2) in assignment]
+    assert shared and not any(('H', 3, 2) in assignment for assignment in shared)
+    for assignment in shared:
+        board = assignment_board(assignment, 6, 6)
+        clusters = enumerate_clusters(board, assignment)
+        assert sum(cluster.size for cluster in clusters) == len(list(board.placements()))
+        assert sum(cluster.goals for cluster in clusters) == len(list(board.goal_states()))
@@ -0,0 +1,35 @@
+import io
+import pytest
+from rush_hour_app.corpus import read_corpus, board_to_csv, csv_to_board, iter_board_entries, iter_boards
+from rush_hour_app.packed_board import PackedBoard
+from rush_hour_app.rush_hour_solver import csv_reader
+
+def test_corpus_round_trip():
+    for name in ('board1', 'test', 'one_car'):
+        file_contents = csv_reader(file_path="game_data/{}.board".format(name))[0]
+        board_string = csv_to_board(file_contents)
+        assert len(board_string) == 36 and csv_to_board(board_to_csv(board_string)) == board_string
+        #car ids are renumbered, the cars themselves are the same
+        board, _ = PackedBoard.from_csv(file_contents)
+        converted, _ = PackedBoard.from_csv(board_to_csv(board_string))
+        assert sorted(board.cars.values()) == sorted(converted.cars.values())
+
+def test_read_corpus_streams_lines():
+    corpus = io.StringIO("# comment\n\n51 ooBoCCooBoooAABoooDDDooEoooooEoooooE 4780\nooooooooooooAAoooooooooooooooooooooo\n")
+    entries = list(read_corpus(corpus))
+    assert [entry.line for entry in entries] == [3, 4]
+    assert entries[0].fields == ['51', '4780'] and entries[1].fields == []
+    with pytest.raises(ValueError):
+        board_to_csv("ooxoooooooooAAoooooooooooooooooooooo")
+
+def test_bad_corpus_lines_do_not_stop_the_stream(tmp_path, capsys):
+    corpus = tmp_path / 'mixed.txt'
+    corpus.write_text("60 IBBxooIooLDDJAALooJoKEEMFFKooMGGHHHM 2332\nnot a board\n"
+                      "ooBoCCooBoooAABoooDDDooEoooooEoooooE\nooOoooooooooAAoooooooooooooooooooooo\n")
+    entries = list(iter_board_entries([str(corpus), str(tmp_path / 'missing.board')]))
+    assert [(name.rsplit('/', 1)[-1], error is None) for name, _, error in entries] == [
+        ('mixed.txt:1', False), ('mixed.txt:2', False), ('mixed.txt:3', True), ('mixed.txt:4', False),
+        ('missing.board', False)]
+    assert "walls" in entries[0][2]
+    assert [name.rsplit('/', 1)[-1] for name, _ in iter_boards([str(corpus)])] == ['mixed.txt:3']
+    assert "mixed.txt:1: walls are not supported" in capsys.readouterr().err
@@ -0,0 +1,16 @@
+from rush_hour_app.counting import OptimalSolutions
+from rush_hour_app.packed_board import PackedBoard
+from rush_hour_app.rush_hour_solver import csv_reader
+
+def replay(board, state, path):
+    for move in path:
+        state = dict((m, child) for child, m in board.expand(state))[move]
+    return board.is_goal(state)
+
+def test_count_optimal_solutions():
+    board, start = PackedBoard.from_csv(csv_reader(file_path="game_data/board1.board")[0])
+    solutions = OptimalSolutions(board, start)
+    paths = list(solutions.paths())
+    assert solutions.length == 21 and solutions.count == 45
+    assert len(set(map(tuple, paths))) == 45
+    assert all(len(path) == 21 and replay(board, start, path) for path in paths)
@@ -0,0 +1,97 @@
+import pytest
+from rush_hour_app.packed_board import PackedBoard, SlideBoard
+from rush_hour_app.engines import ENGINES, solve_with_stats, parse_engine
+from rush_hour_app.solver_stats import SolverStats
+from rush_hour_app.portfolio import portfolio_search
+from rush_hour_app.selection import Features, board_features, extract_features, select_engine, tune_table, DEFAULT_TABLE
+from rush_hour_app.rush_hour_solver import csv_reader
+
+def replay(board, state, path):
+    for move in path:
+        state = dict((m, child) for child, m in board.expand(state))[move]
+    return board.is_goal(state)
+
+def test_engines_agree():
+    board, start = PackedBoard.from_csv(csv_reader(file_path="game_data/board1.board")[0])
+    for name, engine in ENGINES.items():
+        path = engine.solve(board, start)
+        assert replay(board, start, path)
+        if engine.optimal:
+            assert len(path) == 21
+
+def test_portfolio_returns_optimal_winner():
+    board, start = PackedBoard.from_csv(csv_reader(file_path="game_data/board1.board")[0])
+    result = portfolio_search(board, start, ['greedy', 'packed_astar:weight=3', 'bidirectional'])
+    assert result.winner == 'bidirectional' and result.optimal
+    assert len(result.path) == 21 and replay(board, start, result.path)
+    assert result.finished[-1].engine == 'bidirectional' and result.finished[-1].seconds == result.seconds
+    assert parse_engine('packed_astar:weight=3') == ('packed_astar', {'weight': 3})
+
+def test_portfolio_survives_a_killed_engine(monkeypatch):
+    import os
+    import signal
+    from rush_hour_app import portfolio
+    killed = lambda board, start: os.kill(os.getpid(), signal.SIGKILL)
+    monkeypatch.setitem(portfolio.ENGINES, 'killed', portfolio.ENGINES['bfs']._replace(solve=killed))
+    board, start = PackedBoard.from_csv(csv_reader(file_path="game_data/board1.board")[0])
+    result = portfolio_search(board, start, ['killed'])
+    assert result.path is None and result.winner is None
+    assert result.finished[0].error == "exited with code -{}".format(signal.SIGKILL)
+    result = portfolio_search(board, start, ['killed', 'packed_astar'])
+    assert result.winner == 'packed_astar' and len(result.path) == 21
+
+def test_engine_selection():
+    board, start = PackedBoard.from_csv(csv_reader(file_path="game_data/test.board")[0])
+    features = board_features(board)
+    assert features == Features(cars=14, free_cells=6, free_percent=17, goal_blockers=3, trucks=2)
+    table = [{'when': {'free_cells': [0, 10]}, 'engine': 'ida'}, {'engine': 'bfs'}]
+    assert select_engine(features, table) == 'ida'
+    records = [{'features': features._asdict(), 'engine': 'bfs', 'seconds': 1.0, 'optimal': True},
+               {'features': features._asdict(), 'engine': 'ida', 'seconds': 2.0, 'optimal': True},
+               {'features': features._asdict(), 'engine': 'greedy', 'seconds': 0.1, 'optimal': False}]
+    assert tune_table(records) == [{'engine': 'bfs'}]
+    #open boards only get a weighted heuristic from the default table when it is allowed
+    open_board = features._replace(free_cells=26, free_percent=72, goal_blockers=1)
+    assert select_engine(open_board) == 'packed_astar'
+    assert select_engine(open_board, allow_suboptimal=True) == 'packed_astar:weight=2'
+    #the same share of free cells picks the same engine on a bigger board
+    big = extract_features({board.goal_car_id: board.cars[board.goal_car_id]}, 10, 10, board.goal_car_id)
+    assert big.free_percent == 98 and select_engine(big._replace(goal_blockers=1), allow_suboptimal=True) == 'packed_astar:weight=2'
+    assert any(parse_engine(rule['engine'])[1].get('weight', 1) != 1 for rule in DEFAULT_TABLE)
+    board.cars.pop(board.goal_car_id)
+    with pytest.raises(ValueError):
+        extract_features(board.cars, board.rows, board.cols, board.goal_car_id)
+
+def test_slide_metric():
+    board, start = SlideBoard.from_csv(csv_reader(file_path="game_data/board1.board")[0])
+    for name, engine in ENGINES.items():
+        path = engine.solve(board, start)
+        assert replay(board, start, path)
+        if engine.optimal:
+            assert len(path) == 9 and any(abs(delta) > 1 for _, delta in path)
+    single = PackedBoard.from_csv(csv_reader(file_path="game_data/board1.board")[0])[0]
+    #every slide is a run of single cell moves
+    for child, (car_id, delta) in board.expand(start):
+        state = start
+        for _ in range(abs(delta)):
+            state = dict((m, c) for c, m in single.expand(state))[(car_id, 1 if delta > 0 else -1)]
+        assert state == child
+
+def test_solver_stats():
+    file_contents = csv_reader(file_path="game_data/board1.board")[0]
+    board, start = PackedBoard.from_csv(file_contents)
+    for name, engine in ENGINES.items():
+        stats = SolverStats()
+        engine.solve(board, start, stats=stats)
+        assert stats.expanded > 0 and stats.generated >= stats.duplicates >= 0
+        assert stats.peak_open > 0 and stats.peak_closed > 0
+    path, stats = solve_with_stats(file_contents, 'packed_astar')
+    assert len(path) == 21 and stats.heuristic_evaluations == stats.generated - stats.duplicates + 1
+    assert set(stats.as_dict()['phases']) == {'parse', 'precompute', 'search', 'rebuild'}
+
+def test_grid_astar_counts_duplicate_children():
+    file_contents = csv_reader(file_path="game_data/board1.board")[0]
+    path, stats = solve_with_stats(file_contents, 'astar')
+    #every child that is not a duplicate is a new state, board1 has 111 of them
+    assert len(path) == 21 and 0 < stats.generated - stats.duplicates <= 110
+    assert stats.phases['rebuild'] == 0.0
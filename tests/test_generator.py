@@ -0,0 +1,18 @@
+import pytest
+from rush_hour_app.generator import GeneratorSettings, generate
+from rush_hour_app.corpus import board_to_csv
+from rush_hour_app.counting import OptimalSolutions
+from rush_hour_app.packed_board import PackedBoard
+
+def test_generated_puzzles_are_in_band():
+    settings = GeneratorSettings(6, 6, 6, 10, 0.25, 8, 40)
+    puzzles = list(generate(settings, 3, seed=7, processes=1, max_candidates=500))
+    assert len(puzzles) == 3 and len({puzzle.board for puzzle in puzzles}) == 3
+    for puzzle in puzzles:
+        assert 8 <= puzzle.length <= 40 and puzzle.board.count('A') == 2
+        board, start = PackedBoard.from_csv(board_to_csv(puzzle.board))
+        assert OptimalSolutions(board, start).length == puzzle.length
+
+def test_only_corpus_sized_boards_are_generated():
+    with pytest.raises(ValueError):
+        next(generate(GeneratorSettings(5, 6, 4, 6, 0.25, 1, 40), 1, processes=1, max_candidates=10))
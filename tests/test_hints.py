@@ -0,0 +1,54 @@
+from rush_hour_app.hints import HintService, hint_service
+from rush_hour_app.resolve import WarmStartSolver
+from rush_hour_app.rush_hour_solver import csv_reader
+
+def follow_hints(service, grid):
+    moves = 0
+    state = service.board.encode(grid)
+    while (move := service.next_move(service.board.decode(state))) is not None:
+        state = dict((m, child) for child, m in service.board.expand(state))[move]
+        moves += 1
+    return moves, service.board.is_goal(state)
+
+def test_hints_follow_optimal_path():
+    service = HintService(csv_reader(file_path="game_data/board1.board")[0])
+    assert service.complete
+    assert follow_hints(service, service.board.decode(service.start)) == (21, True)
+
+def test_hints_fall_back_without_warm_up():
+    service = HintService(csv_reader(file_path="game_data/board1.board")[0], max_states=10)
+    assert not service.complete
+    assert service.distance(service.board.decode(service.start)) == 21
+    assert follow_hints(service, service.board.decode(service.start)) == (21, True)
+
+def test_warm_start_resolve():
+    solver = WarmStartSolver(csv_reader(file_path="game_data/board1.board")[0])
+    assert len(solver.path) == 21
+    board = solver.board
+    on_path = dict((move, child) for child, move in board.expand(solver.root))[solver.path[0]]
+    assert len(solver.resolve(board.decode(on_path))) == 20
+    hints = HintService(csv_reader(file_path="game_data/board1.board")[0])
+    for child, move in board.expand(on_path):
+        assert len(solver.resolve(board.decode(child))) == hints.distances[child]
+
+def test_unsolvable_states_are_remembered():
+    #a car right of the goal car in its row never gets out of the way
+    service = HintService(['6,6', '1,4,2,H,2,F', '3,0,2,H,2,T'], max_states=0)
+    start = service.board.decode(service.start)
+    assert service.distance(start) is None and service.next_move(start) is None
+    assert len(service.unsolvable) > 1 and not service.distances
+
+def test_hint_services_are_cached_per_options():
+    service = hint_service("game_data/board1.board")
+    assert hint_service("game_data/board1.board") is service
+    bounded = hint_service("game_data/board1.board", max_states=10)
+    assert bounded is not service and not bounded.complete
+
+def test_warm_start_resolve_stops_at_any_goal_state():
+    solver = WarmStartSolver(csv_reader(file_path="game_data/board1.board")[0])
+    hints = HintService(csv_reader(file_path="game_data/board1.board")[0])
+    goals = [state for state, distance in hints.distances.items() if distance == 0 and state not in solver.exact]
+    assert goals
+    assert solver.resolve(solver.board.decode(goals[0])) == []
+    for state, distance in hints.distances.items():
+        assert len(solver.resolve(solver.board.decode(state))) == distance
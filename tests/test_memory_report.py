@@ -0,0 +1,26 @@
+import json
+from rush_hour_app.memory_report import memory_report, deep_size
+from rush_hour_app.engines import PackedBoard, level_bfs
+from rush_hour_app.rush_hour_solver import csv_reader
+
+def test_deep_size_counts_shared_objects_once():
+    shared = list(range(1000, 1100))
+    assert deep_size([shared, shared]) < 2 * deep_size(shared)
+
+def test_memory_report():
+    board, start = PackedBoard.from_csv(csv_reader(file_path="game_data/board1.board")[0])
+    report = memory_report(board, start, 'packed_astar')
+    assert report['moves'] == 21 and report['stats']['expanded'] > 0
+    parents = report['structures']['parents']
+    assert parents['states'] == report['stats']['peak_closed'] and parents['bytes_per_state'] > 0
+    assert report['traced']['peak'] > 0 and report['top_allocations']
+    assert len(report['rss_timeline']) >= 2
+    layers = memory_report(board, start, 'bfs')['structures']['layers']
+    assert layers['states'] == sum(len(layer) for layer in level_bfs(board, start).layers)
+    json.dumps(report)
+
+def test_only_search_structures_are_reported():
+    board, start = PackedBoard.from_csv(csv_reader(file_path="game_data/board1.board")[0])
+    assert set(memory_report(board, start, 'astar')['structures']) == {'histories', 'visited', 'heuristic_map', 'priority_queue'}
+    assert set(memory_report(board, start, 'ida')['structures']) == {'table', 'path_states', 'moves'}
+    assert set(memory_report(board, start, 'bidirectional')['structures']) == {'forward', 'backward', 'depths', 'frontiers'}
@@ -0,0 +1,47 @@
+import pytest
+from rush_hour_app.packed_board import PackedBoard
+from rush_hour_app.parallel_astar import parallel_search
+from rush_hour_app import level_bfs as level_bfs_module
+from rush_hour_app.level_bfs import level_bfs
+from rush_hour_app.analytics import analyze_board
+from rush_hour_app.external_bfs import ExternalBFS
+from rush_hour_app.rush_hour_solver import csv_reader
+
+def replay(board, state, path):
+    for move in path:
+        state = dict((m, child) for child, m in board.expand(state))[move]
+    return board.is_goal(state)
+
+def test_parallel_a_star():
+    board, start = PackedBoard.from_csv(csv_reader(file_path="game_data/board1.board")[0])
+    for processes in (1, 2):
+        path = parallel_search(board, start, processes)
+        assert len(path) == 21 and replay(board, start, path)
+
+def test_level_bfs_shared_memory(monkeypatch):
+    monkeypatch.setattr(level_bfs_module, "MIN_PARALLEL_LAYER", 1)
+    board, start = PackedBoard.from_csv(csv_reader(file_path="game_data/board1.board")[0])
+    result = level_bfs(board, start, processes=2)
+    assert len(result.path) == 21 and replay(board, start, result.path)
+    exhaustive = level_bfs(board, start, processes=2, stop_at_goal=False)
+    assert exhaustive.path is None
+    assert sum(len(layer) for layer in exhaustive.layers) == analyze_board(board, start)['reachable_states']
+    assert [timing.states for timing in exhaustive.timings] == [len(layer) for layer in exhaustive.layers]
+
+def test_level_bfs_numpy_matches_python():
+    pytest.importorskip("numpy")
+    board, start = PackedBoard.from_csv(csv_reader(file_path="game_data/test.board")[0])
+    python_layers = level_bfs(board, start, use_numpy=False, stop_at_goal=False).layers
+    numpy_result = level_bfs(board, start, use_numpy=True)
+    assert len(numpy_result.path) == 49 and replay(board, start, numpy_result.path)
+    assert level_bfs(board, start, use_numpy=True, stop_at_goal=False).layers == python_layers
+
+def test_external_bfs_resumes(tmp_path):
+    board, start = PackedBoard.from_csv(csv_reader(file_path="game_data/board1.board")[0])
+    engine = ExternalBFS(board, str(tmp_path), memory_limit=2000)
+    result = engine.run(start)
+    assert len(result.path) == 21 and replay(board, start, result.path)
+    #a second run over the same work directory resumes from the saved layers
+    resumed = ExternalBFS(board, str(tmp_path), memory_limit=2000).run(start, stop_at_goal=False)
+    assert resumed.path == result.path
+    assert sum(resumed.layer_sizes) == analyze_board(board, start)['reachable_states']
@@ -0,0 +1,25 @@
+import pstats
+from rush_hour_app.profiling import TimingHooks, profiled
+from rush_hour_app.engines import PackedBoard, packed_a_star
+from rush_hour_app.rush_hour_solver import csv_reader
+
+def test_timing_hooks_are_removed_on_exit():
+    expand, heuristic = PackedBoard.expand, PackedBoard.heuristic
+    board, start = PackedBoard.from_csv(csv_reader(file_path="game_data/board1.board")[0])
+    with TimingHooks() as hooks:
+        assert PackedBoard.expand is not expand
+        path = packed_a_star(board, start)
+    assert PackedBoard.expand is expand and PackedBoard.heuristic is heuristic
+    totals = hooks.as_dict()
+    assert len(path) == 21 and totals['move_generation']['calls'] > 0
+    assert totals['queue_push']['calls'] == totals['heuristic']['calls']
+
+def test_profiled_writes_every_file(tmp_path):
+    prefix = str(tmp_path / 'board39')
+    board, start = PackedBoard.from_csv(csv_reader(file_path="game_data/board39.board")[0])
+    with profiled(prefix, interval=0.0005):
+        assert len(packed_a_star(board, start)) == 49
+    assert pstats.Stats(prefix + '.pstats').total_calls > 0
+    lines = open(prefix + '.collapsed').read().split('\n')
+    assert lines[0] and all(line.rsplit(' ', 1)[1].isdigit() for line in lines if line)
+    assert 'profiling.py:timed' not in ''.join(lines)
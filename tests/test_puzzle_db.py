@@ -0,0 +1,56 @@
+from rush_hour_app.puzzle_db import DatabaseBuilder, PuzzleDatabase, solve_for_database
+from rush_hour_app.hints import HintService
+from rush_hour_app.packed_board import PackedBoard
+from rush_hour_app.corpus import csv_to_board
+from rush_hour_app.rush_hour_solver import csv_reader
+
+def replay(board, state, path):
+    for move in path:
+        state = dict((m, child) for child, m in board.expand(state))[move]
+    return board.is_goal(state)
+
+def test_database_lookup(tmp_path):
+    path = str(tmp_path / "puzzles.rhdb")
+    with DatabaseBuilder(path) as builder:
+        for name in ('test', 'board1', 'one_car', 'board1'):
+            builder.add(*solve_for_database(csv_reader(file_path="game_data/{}.board".format(name))[0]))
+    file_contents = csv_reader(file_path="game_data/board1.board")[0]
+    board, start = PackedBoard.from_csv(file_contents)
+    with PuzzleDatabase(path) as database:
+        assert len(database) == 3
+        assert database.lookup(csv_to_board(file_contents)).reachable_states == 111
+        puzzle = database.lookup_grid(board.decode(start), board.goal_car_id)
+        assert puzzle.length == 21 and replay(board, start, puzzle.solution)
+        assert database.lookup("o" * 12 + "AA" + "o" * 22).length == 4
+        assert database.lookup("o" * 14 + "AA" + "o" * 20) is None
+        #hint service without a warm-up answers from the database
+        service = HintService(file_contents, max_states=0, fallback_states=0, database=database)
+        grid = board.decode(start)
+        assert service.distance(grid) == 21 and service.next_move(grid) == puzzle.solution[0]
+
+def test_bad_database_files_are_closed(tmp_path):
+    import os
+    import pytest
+    fds = len(os.listdir('/proc/self/fd'))
+    for contents in (b'', b'RHDB', b'NOPE' + bytes(28)):
+        bad = tmp_path / 'bad.rhdb'
+        bad.write_bytes(contents)
+        with pytest.raises(ValueError):
+            PuzzleDatabase(str(bad))
+    assert len(os.listdir('/proc/self/fd')) == fds
+
+def test_driver_searches_boards_too_big_for_the_database(tmp_path, capsys):
+    import os
+    from rush_hour_app.puzzle_db import build
+    from rush_hour_app.rush_hour_solver import driver
+    database = str(tmp_path / 'boards.rhdb')
+    build(['game_data/board1.board'], database)
+    #28 cars, more than a canonical board string has labels for
+    cars = ['{0},{1},{2},H,2,F'.format(1 + index, 2 * (index % 4), row)
+            for index, row in enumerate(row for row in (0, 1, 3, 4, 5, 6, 7) for _ in range(4))]
+    board_file = tmp_path / 'crowded.board'
+    board_file.write_text('\n'.join(['8,8', '0,4,2,H,2,T'] + cars))
+    driver(str(board_file), database=database)
+    out = capsys.readouterr().out
+    os.remove(out.split("Solution written to file: ")[1].strip())
+    assert "Successfully found a way out" in out
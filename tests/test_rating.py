@@ -0,0 +1,32 @@
+from rush_hour_app.rating import rate, effective_branching_factor
+from rush_hour_app.puzzle_db import build
+
+def test_effective_branching_factor():
+    assert effective_branching_factor(4, 4) == 1.0
+    assert abs(effective_branching_factor(14, 3) - 2.0) < 1e-3
+    assert effective_branching_factor(1, 0) is None
+    for expanded, depth in ((5000, 93), (3000000, 51)):
+        b = effective_branching_factor(expanded, depth)
+        assert 1.0 < b < 2.0 and abs(sum(b ** level for level in range(depth + 1)) - expanded - 1) < expanded * 1e-2
+
+def test_ratings_with_and_without_database(tmp_path):
+    boards = ['game_data/board1.board', 'game_data/one_car.board']
+    ratings = list(rate(boards))
+    assert [rating.length for rating in ratings] == [21, 4]
+    assert ratings[0].reachable_states == 111 and ratings[1].cars_moved == 1
+    assert all(rating.expanded >= rating.length for rating in ratings)
+    database = str(tmp_path / 'boards.rhdb')
+    build(boards, database)
+    assert list(rate(boards, database)) == ratings
+
+def test_bfs_results_are_cached_across_runs(tmp_path, monkeypatch):
+    from rush_hour_app import rating
+    boards = ['game_data/board1.board', 'game_data/one_car.board', 'game_data/board1.board']
+    cache = str(tmp_path / 'ratings.cache')
+    ratings = list(rate(boards, cache=cache))
+    with open(cache) as fi:
+        assert len(fi.readlines()) == 2
+    assert len(rating.load_cache(cache)) == 2
+    monkeypatch.setattr(rating, 'solve_for_database', None)
+    assert list(rate(boards, cache=cache)) == ratings
+    assert list(rate(boards, processes=2, cache=cache)) == ratings
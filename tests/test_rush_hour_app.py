@@ -1,5 +1,6 @@
 import copy
 from rush_hour_app.helpers.graph import Graph
+from rush_hour_app.helpers.graph_store import dump_graph, unpack_grid, MappedGraph
 from rush_hour_app.rush_hour_solver import *
 
 start_board = [[-1, -1, 0, 1, 1, 1], 
@@ -59,6 +60,22 @@ def test_reached_goal():
     goal_matrix[2][5] = 5
     assert reached_goal(goal_matrix)
 
+def test_a_star_state_space_recording():
+    init_state = init_represent(csv_reader(file_path="game_data/board1.board")[0])
+    path = a_star(copy.deepcopy(init_state))
+    recorded_path, state_space = a_star(copy.deepcopy(init_state), record_state_space=True)
+    assert path == recorded_path and len(path) == 21
+    assert len(state_space._get_node_arcs(stringify_grid(init_state))) > 0
+
+def test_graph_store_round_trip(tmp_path):
+    init_state = init_represent(csv_reader(file_path="game_data/board1.board")[0])
+    path, state_space = a_star(copy.deepcopy(init_state), record_state_space=True)
+    edge_count = dump_graph(state_space, str(tmp_path / "board1.graph"))
+    with MappedGraph(str(tmp_path / "board1.graph")) as loaded:
+        assert loaded.node_count == len(state_space) and loaded.edge_count == edge_count
+        assert unpack_grid(loaded.state(0), 6) == init_state
+        assert sum(loaded.out_degrees()) == edge_count
+
 
 # def test_expand_node():
 #     valid_state_space = Graph()
@@ -0,0 +1,34 @@
+import os
+from rush_hour_app.solution_io import SolutionArchive, write_solution, read_solution, solution_file_name
+
+PATH = [(2, 1), (3, -1), (5, -3), (0, 2)]
+
+def test_solution_files(tmp_path):
+    binary = write_solution(PATH, "game_data/board1.board", str(tmp_path))
+    assert binary == solution_file_name("board1.board", str(tmp_path)) == str(tmp_path / "solution_board1.sol")
+    assert os.path.getsize(binary) == 4 + 2 * len(PATH) and read_solution(binary) == PATH
+    text = write_solution(PATH, "game_data/board1.board", str(tmp_path), binary=False)
+    assert text == binary and read_solution(text) == PATH
+    assert open(text).read().split('\n')[2] == "5,-3"
+
+def test_solution_archive_recovers_index(tmp_path):
+    path = str(tmp_path / "solutions.rhsa")
+    with SolutionArchive(path) as archive:
+        archive.append("a", PATH)
+        archive.append("b", PATH[:2])
+        assert archive.get("a") == PATH
+    #lose the last index entry and cut the data file mid record
+    with open(path + ".idx", "r+b") as fo:
+        fo.truncate(os.path.getsize(path + ".idx") - 1)
+    with open(path, "ab") as fo:
+        fo.write(b"\x05\x00")
+    with SolutionArchive(path) as archive:
+        assert sorted(archive.keys()) == ["a", "b"] and archive.get("b") == PATH[:2]
+        archive.append("a", PATH[1:])
+    with SolutionArchive(path) as archive:
+        assert len(archive) == 2 and archive.get("a") == PATH[1:]
+
+def test_solver_writes_binary_solutions_by_default(tmp_path):
+    from rush_hour_app.rush_hour_solver import write_sol_to_file
+    file_name = write_sol_to_file(PATH, "game_data/board1.board", str(tmp_path))
+    assert os.path.getsize(file_name) == 4 + 2 * len(PATH) and read_solution(file_name) == PATH
@@ -0,0 +1,53 @@
+import os
+from rush_hour_app import unsolvable
+from rush_hour_app.packed_board import PackedBoard
+from rush_hour_app.rush_hour_solver import csv_reader
+
+def board_of(*lines):
+    return PackedBoard.from_csv(['6,6'] + list(lines))
+
+def test_structural_proofs():
+    #horizontal car between the goal car and the exit
+    assert "shares the goal row" in unsolvable.prove_unsolvable(*board_of('1,4,2,H,2,F', '3,0,2,H,2,T'))
+    #two trucks filling the blocker column
+    assert "can never move" in unsolvable.prove_unsolvable(*board_of('3,0,2,H,2,T', '4,4,0,V,3,F', '5,4,3,V,3,F'))
+    #truck with a car above it and a frozen bottom row below it
+    locked = board_of('3,0,2,H,2,T', '4,4,1,V,1,F', '5,4,2,V,3,F', '6,4,5,H,2,F', '7,0,5,H,4,F')
+    assert "can never clear the goal row" in unsolvable.prove_unsolvable(*locked)
+    for name in ('board1', 'board39', 'one_car', 'test'):
+        board, start = PackedBoard.from_csv(csv_reader(file_path="game_data/{}.board".format(name))[0])
+        assert unsolvable.prove_unsolvable(board, start) is None
+
+def test_exhaustive_fallback(monkeypatch):
+    board, start = PackedBoard.from_csv(csv_reader(file_path="game_data/board1.board")[0])
+    assert len(unsolvable.check_board(board, start).path) == 21
+    locked = board_of('3,0,2,H,2,T', '4,4,1,V,1,F', '5,4,2,V,3,F', '6,4,5,H,2,F', '7,0,5,H,4,F')
+    monkeypatch.setattr(unsolvable, "prove_unsolvable", lambda board, state: None)
+    result = unsolvable.check_board(*locked)
+    assert result.solvable is False and result.reachable_states == 9
+
+def test_driver_searches_boards_the_structural_checks_miss(tmp_path, capsys):
+    from rush_hour_app.rush_hour_solver import driver
+    board_file = tmp_path / 'stuck.board'
+    board_file.write_text('\n'.join(['6,6', '0,1,2,H,2,T', '1,3,4,H,2,F', '2,3,0,H,2,F', '3,3,5,H,3,F',
+                                     '4,5,3,V,2,F', '5,4,1,H,2,F', '6,1,0,H,2,F', '7,0,2,V,2,F', '8,2,1,H,2,F',
+                                     '9,2,4,V,2,F', '10,4,2,V,2,F', '11,0,1,H,2,F', '12,0,4,V,2,F']))
+    assert unsolvable.prove_unsolvable(*PackedBoard.from_csv(csv_reader(str(board_file))[0])) is None
+    driver(str(board_file))
+    assert "no solutions: no goal state is reachable (168 reachable states)" in capsys.readouterr().out
+
+def test_driver_solves_boards_too_big_for_the_level_bfs(tmp_path, capsys):
+    from rush_hour_app.rush_hour_solver import driver
+    board_file = tmp_path / 'big.board'
+    cars = ['{0},{1},{2},V,2,F'.format(1 + col + 10 * (row // 6), col, row) for row in (4, 6) for col in range(10)]
+    board_file.write_text('\n'.join(['10,10', '0,0,2,H,2,T'] + cars))
+    board, _ = PackedBoard.from_csv(csv_reader(str(board_file))[0])
+    assert board.state_bits > 64
+    driver(str(board_file), sol_format='text')
+    out = capsys.readouterr().out
+    os.remove(out.split("Solution written to file: ")[1].strip())
+    assert "Successfully found a way out" in out
+
+def test_goal_car_is_not_kept_between_boards():
+    PackedBoard.from_csv(csv_reader(file_path="game_data/board1.board")[0])
+    assert unsolvable.prove_unsolvable(*board_of('1,4,2,H,2,F', '2,0,0,V,2,F')) == "board has no goal car"
@@ -0,0 +1,35 @@
+from rush_hour_app.verify import replay, verify
+from rush_hour_app.solution_io import write_solution
+from rush_hour_app.packed_board import PackedBoard
+from rush_hour_app.rush_hour_solver import csv_reader
+
+def test_replay_checks_moves():
+    board, start = PackedBoard.from_csv(csv_reader(file_path="game_data/test.board")[0])
+    path = [tuple(map(int, line.split(','))) for line in open("game_data/test.sol").read().split() if line]
+    assert replay(board, start, path) is None
+    assert replay(board, start, path[:-1]) == "goal car does not reach the exit"
+    assert replay(board, start, [(1, 1)] + path).startswith("move 1:")
+    assert "no car" in replay(board, start, [(42, 1)])
+
+def test_bulk_verify(tmp_path):
+    sol = [tuple(map(int, line.split(','))) for line in open("game_data/test.sol").read().split() if line]
+    write_solution(sol, "test.board", str(tmp_path), binary=True)
+    write_solution(sol, "board39.board", str(tmp_path), binary=False)
+    write_solution(sol[:3], "board1.board", str(tmp_path))
+    boards = ["game_data/test.board", "game_data/board39.board", "game_data/board1.board", "game_data/one_car.board"]
+    for processes in (1, 2):
+        verdicts = list(verify(boards, str(tmp_path), processes))
+        assert [verdict.ok for verdict in verdicts] == [True, True, False, False]
+        assert verdicts[3].reason == "no solution"
+
+def test_verify_flags_bad_inputs(tmp_path):
+    import os, pytest
+    missing = str(tmp_path / 'missing.rhsa')
+    with pytest.raises(FileNotFoundError):
+        verify(['game_data/board1.board'], missing)
+    assert not os.path.exists(missing) and not os.path.exists(missing + '.idx')
+    corpus = tmp_path / 'walls.txt'
+    corpus.write_text("IBBxooIooLDDJAALooJoKEEMFFKooMGGHHHM\n")
+    verdicts = list(verify([str(corpus), 'game_data/board1.board'], str(tmp_path)))
+    assert [verdict.ok for verdict in verdicts] == [False, False]
+    assert verdicts[0].reason.startswith("bad board: walls") and verdicts[1].reason == "no solution"